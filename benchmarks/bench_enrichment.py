@@ -0,0 +1,83 @@
+"""
+Micro-benchmark for acronym expansion in ``enrich_question``.
+
+Compares the compiled single-pass ``AcronymExpander`` with the previous
+approach of one ``re.sub`` per acronym row, using synthetic acronym tables
+of increasing size. Per-question cost of the compiled expander should stay
+roughly flat as the table grows, while the per-row loop grows linearly.
+
+Usage:
+    python benchmarks/bench_enrichment.py
+    python benchmarks/bench_enrichment.py --sizes 1000 10000 50000 --repeat 200
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.enrichment import AcronymExpander, read_mapping_csv  # noqa: E402
+
+
+ACRONYMS_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "acronyms.csv")
+QUESTIONS = [
+    "What are the requirements to run for FC?",
+    "How do I stay current in boat crew as a AUXSCOUT member?",
+    "Can a DSO-CS approve an AUXDATA entry for a PE class taught by the FSO-PE?",
+]
+LEGACY_MAX_SIZE = 20000  # the per-row loop gets very slow beyond this
+
+
+def synthetic_acronyms(size: int, seed: int = 7) -> dict:
+    """Return the repo acronyms padded with random uppercase acronyms up to ``size``."""
+    rng = random.Random(seed)
+    acronyms = dict(read_mapping_csv(ACRONYMS_PATH))
+    while len(acronyms) < size:
+        key = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 8)))
+        acronyms.setdefault(key, f"Synthetic expansion for {key}")
+    return dict(list(acronyms.items())[:size])
+
+
+def legacy_expand(acronyms: dict, text: str) -> str:
+    for acronym, full_form in acronyms.items():
+        text = re.sub(r"\b" + re.escape(acronym) + r"\b", full_form, text)
+    return text
+
+
+def time_per_question(fn, repeat: int) -> float:
+    """Return mean microseconds per question for ``fn``."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUESTIONS:
+            fn(q)
+    return (time.perf_counter() - start) / (repeat * len(QUESTIONS)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 759, 2000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'build ms':>10} {'compiled us/q':>14} {'legacy us/q':>12}")
+    for size in args.sizes:
+        acronyms = synthetic_acronyms(size)
+        start = time.perf_counter()
+        expander = AcronymExpander(acronyms)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        compiled_us = time_per_question(expander.expand, args.repeat)
+        if size <= LEGACY_MAX_SIZE:
+            legacy_us = time_per_question(lambda q: legacy_expand(acronyms, q), max(1, args.repeat // 20))
+            legacy = f"{legacy_us:12.1f}"
+        else:
+            legacy = f"{'skipped':>12}"
+        print(f"{len(expander):>8} {build_ms:>10.1f} {compiled_us:>14.1f} {legacy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Offline end-to-end benchmark of ``utils.rag.rag``.
+
+Runs the real pipeline (enrichment, catalog snapshot and filter, Qdrant
+retrieval with MMR, metadata attach, prompt formatting, chat model call)
+against the offline stand-ins in ``benchmarks/offline_backends.py``: an
+in-memory Qdrant collection with a deterministic fake embedding, a synthetic
+catalog and a fake chat model. The questions of the ground-truth evaluation
+set ``rag_eval/ASK-groundtruth-v3.jsonl`` are replayed (``--questions`` also
+accepts a plain text file, one question per line, such as
+``tests/user_question_list_full.txt``) and the report shows:
+
+- per-stage and total latency (mean, p50, p95, max) from ``response["timings"]``
+- allocations per stage and per question from ``tracemalloc`` (peak above
+  the starting point, and net allocated), in a second pass over an evenly
+  spaced sample of ``--trace-sample`` questions so tracing overhead does not
+  skew the latencies
+- the source lines that allocated the most during the traced pass
+
+The retrieval and query embedding caches are off unless ``--caches`` is
+given, so every replay measures embedding and Qdrant retrieval.
+
+Requires the packages in requirements.txt but no network access or secrets.
+Qdrant's local mode scans points in Python, so ``retrieve`` grows with the
+collection size and filter length much faster than against a Qdrant server;
+compare it across runs of this script, not with production numbers.
+
+Usage:
+    python benchmarks/bench_rag_offline.py
+    python benchmarks/bench_rag_offline.py --catalog-rows 2000 --repeat 3 --trace-sample 0 --llm-latency 0.2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from offline_backends import StubVectorDBConnector, bench_config, offline_pipeline, synthetic_catalog  # noqa: E402
+from utils.metrics import StageTimer  # noqa: E402
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), "..", "rag_eval", "ASK-groundtruth-v3.jsonl")
+FILTERS = {
+    "none": None,
+    "national": {"public_release": True, "scope": "National", "exclude_expired": True},
+    "both": {"public_release": True, "scope": "Both", "units": ["7", "11N"], "exclude_expired": True},
+}
+
+
+def load_questions(path: str) -> List[str]:
+    """Read ``inputs.question`` from a JSONL dataset, or one question per line otherwise."""
+    with open(path, encoding="utf-8") as fh:
+        lines = [line.strip() for line in fh if line.strip()]
+    if path.endswith(".jsonl"):
+        return [json.loads(line)["inputs"]["question"] for line in lines]
+    return [line.strip('"') for line in lines]
+
+
+def sample(items: List[str], size: int) -> List[str]:
+    """Return up to ``size`` evenly spaced items; ``size <= 0`` returns none."""
+    if size <= 0:
+        return []
+    step = max(1, len(items) // size)
+    return items[::step][:size]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))]
+
+
+def print_latency(timings: List[Dict[str, float]]) -> None:
+    stages: List[str] = []
+    for run in timings:
+        stages += [name for name in run if name not in stages]
+    print(f"\n{'stage':<18} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in sorted(stages, key=lambda name: (name == "total", name)):
+        values = [run[stage] * 1e3 for run in timings if stage in run]
+        mean = sum(values) / len(values)
+        print(f"{stage:<18} {mean:>9.2f} {percentile(values, 50):>9.2f} {percentile(values, 95):>9.2f} {max(values):>9.2f}")
+
+
+class TracingStageTimer(StageTimer):
+    """``StageTimer`` that also records tracemalloc usage per stage, in bytes."""
+
+    peaks: Dict[str, List[int]] = defaultdict(list)
+    net: Dict[str, List[int]] = defaultdict(list)
+    absolute_peak = 0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        with super().stage(name):
+            yield
+        current, peak = tracemalloc.get_traced_memory()
+        TracingStageTimer.peaks[name].append(peak - start)
+        TracingStageTimer.net[name].append(current - start)
+        TracingStageTimer.absolute_peak = max(TracingStageTimer.absolute_peak, peak)
+
+
+def print_allocations(rows: Dict[str, Dict[str, List[int]]]) -> None:
+    print(f"\n{'allocations':<18} {'peak KiB':>9} {'p95 peak':>9} {'net KiB':>9}")
+    for name, values in rows.items():
+        peaks = [v / 1024 for v in values["peak"]]
+        net = [v / 1024 for v in values["net"]]
+        print(f"{name:<18} {sum(peaks) / len(peaks):>9.1f} {percentile(peaks, 95):>9.1f} {sum(net) / len(net):>9.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog-rows", type=int, default=200)
+    parser.add_argument("--chunks-per-pdf", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1, help="replays of the question list")
+    parser.add_argument("--filter", choices=sorted(FILTERS), default="national")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the fake chat model sleeps")
+    parser.add_argument(
+        "--caches", action="store_true", help="enable the retrieval and query embedding caches (off by default)"
+    )
+    parser.add_argument(
+        "--trace-sample", type=int, default=20, help="questions replayed under tracemalloc (0 skips the pass)"
+    )
+    parser.add_argument("--top-allocations", type=int, default=10)
+    parser.add_argument("--questions", default=QUESTIONS_PATH)
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    catalog_df = synthetic_catalog(args.catalog_rows)
+    start = time.perf_counter()
+    vectordb = StubVectorDBConnector(catalog_df, chunks_per_pdf=args.chunks_per_pdf)
+    print(f"Indexed {vectordb.points} chunks from {len(catalog_df)} catalog rows in {time.perf_counter() - start:.1f} s")
+
+    config = bench_config(k=args.k, fetch_k=args.fetch_k, caches=args.caches)
+    filter_conditions = FILTERS[args.filter]
+
+    with offline_pipeline(catalog_df, vectordb, config, llm_latency_s=args.llm_latency) as rag:
+        cold = rag.rag(questions[0], filter_conditions=filter_conditions)
+        print(f"Cold first question: {cold['timings']['total'] * 1e3:.1f} ms ({len(cold['context'])} documents)")
+
+        timings = []
+        for _ in range(args.repeat):
+            for question in questions:
+                timings.append(rag.rag(question, filter_conditions=filter_conditions)["timings"])
+        print(f"Warm runs: {len(timings)} ({len(questions)} questions x {args.repeat}), filter={args.filter}, "
+              f"caches={'on' if args.caches else 'off'}")
+        print_latency(timings)
+
+        traced = sample(questions, args.trace_sample)
+        if not traced:
+            return
+        # Allocation sites are grouped by line, so one frame per trace is enough
+        tracemalloc.start(1)
+        totals: Dict[str, List[int]] = {"peak": [], "net": []}
+        before = tracemalloc.take_snapshot()
+        with mock.patch.object(rag, "StageTimer", TracingStageTimer):
+            for question in traced:
+                start = tracemalloc.get_traced_memory()[0]
+                TracingStageTimer.absolute_peak = start
+                rag.rag(question, filter_conditions=filter_conditions)
+                totals["peak"].append(TracingStageTimer.absolute_peak - start)
+                totals["net"].append(tracemalloc.get_traced_memory()[0] - start)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    rows = {
+        name: {"peak": TracingStageTimer.peaks[name], "net": TracingStageTimer.net[name]}
+        for name in sorted(TracingStageTimer.peaks)
+    }
+    rows["total"] = totals
+    print_allocations(rows)
+
+    print(f"\nTop {args.top_allocations} allocation sites over {len(traced)} traced questions:")
+    for stat in after.compare_to(before, "lineno")[: args.top_allocations]:
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:>9.1f} KiB {stat.count_diff:>7} blocks  {frame.filename}:{frame.lineno}")
+
+
+if __name__ == "__main__":
+    main()
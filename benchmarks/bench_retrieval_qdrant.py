@@ -0,0 +1,211 @@
+"""
+Retrieval benchmark for ``get_retriever(...).invoke`` on synthetic Qdrant collections.
+
+Fills a Qdrant collection with random unit vectors and payloads shaped like
+our chunks (``page_content`` plus ``metadata.pdf_id``/``page``/``scope``/
+``unit``), then times MMR retrieval through
+``utils.rag.get_retriever(filter).invoke(question)`` for every combination of:
+
+- collection size (``--sizes``)
+- ``k``, ``fetch_k`` and ``lambda_mult`` (``--k``, ``--fetch-k``, ``--lambda-mult``)
+- filter selectivity: the share of pdf_ids in the ``metadata.pdf_id``
+  ``MatchAny`` filter, ``1.0`` meaning no filter (``--selectivity``)
+- a keyword payload index on ``metadata.pdf_id`` off and on
+
+The table (and ``--json`` file) gives p50/p95 latency per combination, which
+is what ``RAG.RETRIEVAL`` (``k``, ``fetch_k``, ``lambda_mult``) is tuned from.
+
+By default the collection lives in qdrant_client's in-memory local mode, so
+the benchmark runs offline. Local mode is a brute-force Python scan that
+ignores payload indexes and gets slow beyond ~100k points; for the 1M point
+runs and meaningful payload-index numbers, point ``--url`` at a local Qdrant
+server (e.g. ``docker run -p 6333:6333 qdrant/qdrant``).
+
+Usage:
+    python benchmarks/bench_retrieval_qdrant.py
+    python benchmarks/bench_retrieval_qdrant.py --url http://localhost:6333 \\
+        --sizes 10000 100000 1000000 --fetch-k 20 50 100 --json retrieval.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from offline_backends import bench_config  # noqa: E402  (also sets sys.path and disables tracing)
+
+COLLECTION = "ask_retrieval_bench"
+CHUNKS_PER_PDF = 40  # typical chunk count of a catalog document
+QUESTIONS = [
+    "What are the requirements to run for FC?",
+    "How do I stay current in boat crew?",
+    "What uniform is required for a vessel safety check?",
+    "Who approves a patrol order?",
+    "How often must I complete the annual mandated training?",
+]
+
+
+class PointsConnector:
+    """``VectorDBConnectorProtocol`` over an existing collection."""
+
+    def __init__(self, client, embedding_size: int):
+        self.client = client
+        self.embedding_size = embedding_size
+
+    def get_langchain_vectorstore(self):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_qdrant import QdrantVectorStore
+
+        return QdrantVectorStore(
+            client=self.client,
+            collection_name=COLLECTION,
+            embedding=DeterministicFakeEmbedding(size=self.embedding_size),
+        )
+
+
+def fill_collection(client, points: int, dim: int, seed: int = 11, batch_size: int = 2048) -> List[str]:
+    """Create the collection with ``points`` synthetic chunks; return all pdf_ids."""
+    from qdrant_client.http import models
+
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE))
+
+    rng = np.random.default_rng(seed)
+    pdf_count = max(1, points // CHUNKS_PER_PDF)
+    pdf_ids = [f"pdf-{i:06d}" for i in range(pdf_count)]
+    district = rng.random(pdf_count) < 0.3
+    units = rng.choice(["1", "5N", "7", "8", "11N", "13", "17"], pdf_count)
+    for start in range(0, points, batch_size):
+        ids = np.arange(start, min(points, start + batch_size))
+        vectors = rng.standard_normal((len(ids), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        payloads = []
+        for point_id in ids:
+            pdf = int(point_id) % pdf_count
+            payloads.append({
+                "page_content": f"Synthetic chunk {point_id} of {pdf_ids[pdf]}.",
+                "metadata": {
+                    "pdf_id": pdf_ids[pdf],
+                    "page": int(point_id) // pdf_count,
+                    "scope": "District" if district[pdf] else "National",
+                    "unit": units[pdf] if district[pdf] else "",
+                },
+            })
+        client.upsert(COLLECTION, points=models.Batch(ids=ids.tolist(), vectors=vectors.tolist(), payloads=payloads), wait=True)
+    return pdf_ids
+
+
+def set_payload_index(client, enabled: bool) -> None:
+    from qdrant_client.http import models
+
+    if enabled:
+        client.create_payload_index(COLLECTION, "metadata.pdf_id", field_schema=models.PayloadSchemaType.KEYWORD, wait=True)
+    else:
+        try:
+            client.delete_payload_index(COLLECTION, "metadata.pdf_id", wait=True)
+        except Exception:
+            pass  # no index yet
+
+
+def time_queries(rag, retrieval_filter, queries: int) -> List[float]:
+    retriever = rag.get_retriever(retrieval_filter=retrieval_filter)
+    retriever.invoke(QUESTIONS[0])  # warm-up
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        retriever.invoke(f"{QUESTIONS[i % len(QUESTIONS)]} ({i})")
+        latencies.append((time.perf_counter() - start) * 1e3)
+    return latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dim", type=int, default=256, help="vector size (text-embedding-3-small is 1536)")
+    parser.add_argument("--k", type=int, nargs="+", default=[5])
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[20, 50])
+    parser.add_argument("--lambda-mult", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--selectivity", type=float, nargs="+", default=[1.0, 0.5, 0.1, 0.01])
+    parser.add_argument("--payload-index", choices=["off", "on", "both"], default="both")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--url", default=None, help="Qdrant server URL; default is in-memory local mode")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    from utils import rag
+    from utils.filter import build_retrieval_filter
+    from utils.resource_pool import registry
+
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    index_modes = {"off": [False], "on": [True], "both": [False, True]}[args.payload_index]
+    rng = np.random.default_rng(13)
+    results: List[Dict] = []
+
+    print(f"{'points':>8} {'index':>5} {'k':>3} {'fetch_k':>7} {'lambda':>6} {'select':>6} {'ids':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in args.sizes:
+        start = time.perf_counter()
+        pdf_ids = fill_collection(client, size, args.dim)
+        print(f"# loaded {size} points ({len(pdf_ids)} pdf_ids) in {time.perf_counter() - start:.1f} s")
+        connector = PointsConnector(client, args.dim)
+        filters: Dict[float, Optional[object]] = {}
+        for share in args.selectivity:
+            if share >= 1.0:
+                filters[share] = None
+            else:
+                chosen = rng.choice(pdf_ids, max(1, round(share * len(pdf_ids))), replace=False).tolist()
+                filters[share] = build_retrieval_filter(allowed_pdf_ids=chosen)
+
+        for indexed in index_modes:
+            set_payload_index(client, indexed)
+            for k in args.k:
+                for fetch_k in args.fetch_k:
+                    for lambda_mult in args.lambda_mult:
+                        config = bench_config(k=k, fetch_k=fetch_k)
+                        config["RAG"]["RETRIEVAL"]["lambda_mult"] = lambda_mult
+                        with ExitStack() as stack:
+                            stack.enter_context(mock.patch.object(rag.stu, "cached_load_config_by_context", lambda: config, create=True))
+                            stack.enter_context(mock.patch.object(rag, "get_vectordb_connector", lambda: connector))
+                            registry.clear()
+                            for share, retrieval_filter in filters.items():
+                                latencies = time_queries(rag, retrieval_filter, args.queries)
+                                allowed = len(pdf_ids) if retrieval_filter is None else len(retrieval_filter.must[0].match.any)
+                                row = {
+                                    "points": size,
+                                    "payload_index": indexed,
+                                    "k": k,
+                                    "fetch_k": fetch_k,
+                                    "lambda_mult": lambda_mult,
+                                    "selectivity": share,
+                                    "allowed_pdf_ids": allowed,
+                                    "p50_ms": percentile(latencies, 50),
+                                    "p95_ms": percentile(latencies, 95),
+                                    "mean_ms": float(np.mean(latencies)),
+                                }
+                                results.append(row)
+                                print(
+                                    f"{size:>8} {'on' if indexed else 'off':>5} {k:>3} {fetch_k:>7} {lambda_mult:>6} "
+                                    f"{share:>6} {allowed:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f}"
+                                )
+    registry.clear()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"mode": args.url or "local-memory", "dim": args.dim, "results": results}, fh, indent=2)
+        print(f"Wrote {len(results)} rows to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
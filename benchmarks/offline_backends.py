@@ -0,0 +1,175 @@
+"""
+Offline stand-ins for the ASK backends, shared by the benchmark scripts.
+
+- ``StubCatalogConnector`` implements ``CatalogConnectorProtocol`` over a
+  synthetic catalog DataFrame already in the Streamlit shape.
+- ``StubVectorDBConnector`` implements ``VectorDBConnectorProtocol`` with a
+  real ``QdrantVectorStore`` on an in-memory ``QdrantClient`` and a
+  deterministic fake embedding, so Qdrant filters and MMR run locally.
+- ``offline_pipeline`` patches ``utils.rag`` and ``utils.backends_bridge`` to
+  use them, a fixed config and a deterministic fake chat model. The catalog
+  goes through the real ``CatalogSnapshotLoader``; only the uscgaux
+  normalization step is skipped, since the stub already returns normalized
+  rows.
+
+Nothing here touches the network.
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import uuid
+from typing import Iterator, List, Optional
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Keep LangSmith tracing off so the benchmarks stay offline
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["LANGSMITH_TRACING"] = "false"
+
+UNITS = np.array(["1", "5N", "5S", "7", "8", "9C", "11N", "11S", "13", "14", "17"])
+COLLECTION = "ask_offline_bench"
+
+
+def synthetic_catalog(rows: int, seed: int = 3) -> pd.DataFrame:
+    """Return a catalog shaped like the normalized live one."""
+    rng = np.random.default_rng(seed)
+    scope = np.where(rng.random(rows) < 0.7, "National", "District")
+    exp = pd.Timestamp("2020-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 5000, rows), unit="D")
+    exp_str = pd.Series(exp.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    exp_str[rng.random(rows) < 0.4] = None
+    return pd.DataFrame({
+        "pdf_id": [f"pdf-{i:06d}" for i in range(rows)],
+        "title": [f"Synthetic Directive {i}" for i in range(rows)],
+        "publication_number": [f"COMDTINST M{16000 + i}.{i % 10}" for i in range(rows)],
+        "organization": "Auxiliary National",
+        "issue_date": (pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3000, rows), unit="D")).strftime("%Y-%m-%d"),
+        "expiration_date": exp_str,
+        "scope": scope,
+        "unit": np.where(scope == "District", rng.choice(UNITS, rows), ""),
+        "public_release": rng.random(rows) < 0.95,
+        "aux_specific": rng.random(rows) < 0.5,
+        "link": [f"https://example.invalid/{i}.pdf" for i in range(rows)],
+    })
+
+
+def chunk_text(pdf_id: str, page: int, rng: np.random.Generator, words: int = 180) -> str:
+    vocabulary = (
+        "auxiliary member boat crew qualification currency workshop flotilla district "
+        "commander policy manual training requirement uniform inspection vessel safety "
+        "examination operations patrol mission annual review certification"
+    ).split()
+    body = " ".join(rng.choice(vocabulary, words))
+    return f"{pdf_id} page {page}. {body}"
+
+
+class StubCatalogConnector:
+    """``CatalogConnectorProtocol`` over an in-memory catalog."""
+
+    def __init__(self, catalog_df: pd.DataFrame, modified_time: str = "2024-01-01T00:00:00Z"):
+        self.catalog_df = catalog_df
+        self.modified_time = modified_time
+
+    def fetch_table_and_normalize_catalog_df_for_core(self) -> pd.DataFrame:
+        return self.catalog_df.copy()
+
+    def get_catalog_modified_time(self) -> str:
+        return self.modified_time
+
+
+class StubVectorDBConnector:
+    """``VectorDBConnectorProtocol`` backed by an in-memory Qdrant collection."""
+
+    def __init__(self, catalog_df: pd.DataFrame, chunks_per_pdf: int = 4, embedding_size: int = 256, seed: int = 5):
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_qdrant import QdrantVectorStore
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+
+        rng = np.random.default_rng(seed)
+        self.client = QdrantClient(":memory:")
+        self.client.create_collection(
+            COLLECTION,
+            vectors_config=models.VectorParams(size=embedding_size, distance=models.Distance.COSINE),
+        )
+        self.vectorstore = QdrantVectorStore(
+            client=self.client,
+            collection_name=COLLECTION,
+            embedding=DeterministicFakeEmbedding(size=embedding_size),
+        )
+        docs: List[Document] = [
+            Document(page_content=chunk_text(pdf_id, page, rng), metadata={"pdf_id": pdf_id, "page": page})
+            for pdf_id in catalog_df["pdf_id"]
+            for page in range(chunks_per_pdf)
+        ]
+        self.vectorstore.add_documents(docs, batch_size=512)
+        self.points = len(docs)
+
+    def get_langchain_vectorstore(self):
+        return self.vectorstore
+
+
+def bench_config(k: int = 5, fetch_k: int = 20, search_type: str = "mmr", caches: bool = False) -> dict:
+    """Pipeline config for the benchmarks.
+
+    The retrieval and query embedding caches are off unless ``caches`` is
+    true, so repeated questions still measure embedding and Qdrant search.
+    """
+    return {
+        "RAG_ALL": {"langchain_chat_model": "FakeListChatModel", "generation_model": "fake", "temperature": 0},
+        "RAG": {
+            "RETRIEVAL": {"search_type": search_type, "k": k, "fetch_k": fetch_k, "lambda_mult": 0.5},
+            "RETRIEVAL_CACHE": {"enabled": caches},
+            "EMBEDDING_CACHE": {"enabled": caches},
+        },
+    }
+
+
+def fake_chat_model(latency_s: float = 0.0):
+    """Deterministic chat model; ``latency_s`` sleeps before each response."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    return FakeListChatModel(
+        responses=["According to the retrieved Auxiliary directives, complete the required workshop annually."],
+        sleep=latency_s or None,
+    )
+
+
+@contextlib.contextmanager
+def offline_pipeline(
+    catalog_df: pd.DataFrame,
+    vectordb: StubVectorDBConnector,
+    config: Optional[dict] = None,
+    llm_latency_s: float = 0.0,
+) -> Iterator[object]:
+    """Patch the pipeline to use the offline stand-ins; yields ``utils.rag``."""
+    from utils import backends_bridge, rag
+    from utils.catalog_snapshot import CatalogSnapshotLoader
+    from utils.resource_pool import registry
+
+    config = config or bench_config()
+    # A fresh version per run, so per-version filter caches never mix catalogs
+    catalog = StubCatalogConnector(catalog_df, modified_time=f"offline-{uuid.uuid4().hex[:12]}")
+    llm = fake_chat_model(llm_latency_s)
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.ExitStack() as stack:
+        loader = CatalogSnapshotLoader(
+            lambda: (catalog.fetch_table_and_normalize_catalog_df_for_core(), str(catalog.get_catalog_modified_time())),
+            lambda: str(catalog.get_catalog_modified_time()),
+            path=os.path.join(tmp, "catalog.parquet"),
+            refresh_interval_s=0,
+        )
+        stack.callback(loader.stop)
+        stack.callback(registry.clear)
+        stack.enter_context(mock.patch.object(backends_bridge, "get_catalog_snapshot_loader", lambda: loader))
+        stack.enter_context(mock.patch.object(rag.stu, "cached_load_config_by_context", lambda: config, create=True))
+        stack.enter_context(mock.patch.object(rag, "get_vectordb_connector", lambda: vectordb))
+        stack.enter_context(mock.patch.object(rag, "get_chat_model", lambda _config: llm))
+        registry.clear()
+        yield rag
@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.answer_cache import AnswerCache, make_answer_key
+from utils.fingerprint import filter_fingerprint, normalize_question
+
+
+def test_answer_key_ignores_filter_order_and_whitespace():
+    a = make_answer_key(
+        "How do I stay  current in boat crew? ",
+        {"scope": "Both", "units": ["7", "1"], "public_release": True},
+        "cfg",
+        "2025-06-14",
+    )
+    b = make_answer_key(
+        "How do I stay current in boat crew?",
+        {"public_release": True, "units": ["1", "7"], "scope": "both", "exclude_expired": False},
+        "cfg",
+        "2025-06-14",
+    )
+    assert a == b
+
+
+def test_answer_key_changes_with_config_catalog_and_case():
+    base = make_answer_key("What is FC?", {}, "cfg", "v1")
+    assert make_answer_key("What is FC?", {}, "cfg2", "v1") != base
+    assert make_answer_key("What is FC?", {}, "cfg", "v2") != base
+    assert make_answer_key("What is FC?", {}, "cfg", "v1", ("a", "t")) != base
+    # Acronym expansion is case-sensitive, so case is part of the key
+    assert make_answer_key("What is fc?", {}, "cfg", "v1") != base
+    assert normalize_question("What is FC?") == "What is FC?"
+    assert filter_fingerprint({"exclude_expired": True}) != filter_fingerprint({})
+    # An explicit empty ``units`` list overrides ``unit`` in the catalog filter
+    assert filter_fingerprint({"units": [], "unit": "7"}) != filter_fingerprint(
+        {"unit": "7"}
+    )
+
+
+def test_answer_cache_lru_ttl_and_counters(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("utils.answer_cache.time.monotonic", lambda: clock[0])
+    cache = AnswerCache(maxsize=2, ttl_seconds=60)
+
+    assert cache.get("q1") is None
+    cache.put("q1", {"answer": "one"})
+    cache.put("q2", {"answer": "two"})
+    assert cache.get("q1") == {"answer": "one"}  # q1 becomes most recent
+    cache.put("q3", {"answer": "three"})  # evicts q2
+    assert cache.get("q2") is None
+
+    clock[0] += 61
+    assert cache.get("q1") is None  # expired
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
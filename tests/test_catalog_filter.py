@@ -13,3 +13,152 @@ def test_catalog_filter_excludes_expired():
     assert len(filtered_ids) < len(all_ids)
     assert set(filtered_ids).issubset(set(all_ids))
     assert all(isinstance(x, str) for x in filtered_ids)
+
+
+def test_catalog_filter_index_matches_scope_unit_and_flag_rules():
+    from utils.filter import CatalogFilterIndex, get_catalog_filter_index
+
+    df = pd.DataFrame([
+        {"pdf_id": "d7", "scope": "District", "unit": "7", "public_release": True, "expiration_date": None},
+        {"pdf_id": "n1", "scope": "National", "unit": "", "public_release": True, "expiration_date": "2001-01-01T00:00:00Z"},
+        {"pdf_id": "n2", "scope": "national", "unit": "", "public_release": False, "expiration_date": "2999-01-01T00:00:00Z"},
+        {"pdf_id": "d1", "scope": "District", "unit": "1", "public_release": True, "expiration_date": "2999-01-01T00:00:00Z"},
+        {"pdf_id": None, "scope": "National", "unit": "", "public_release": True, "expiration_date": None},
+    ])
+    index = CatalogFilterIndex(df)
+
+    # Combined selections list national rows first, like the old concat
+    assert index.pdf_ids_for({"scope": "Both", "units": ["7"]}) == ["n1", "n2", "d7"]
+    assert index.pdf_ids_for({"units": ["1"]}) == ["n1", "n2", "d1"]
+    assert index.pdf_ids_for({"scope": "National", "public_release": True}) == ["n1"]
+    assert index.pdf_ids_for({"scope": "National", "exclude_expired": True}) == ["n2"]
+    assert index.pdf_ids_for({"scope": "District", "units": ["99"]}) == []
+    assert index.pdf_ids_for({}) == ["d7", "n1", "n2", "d1"]
+
+    # Repeated selections come from the memo; an explicit empty ``units``
+    # list overrides ``unit`` and must not share its entry
+    both = index.pdf_ids_for({"scope": "Both", "units": ["7"]})
+    assert index.pdf_ids_for({"units": [" 7 "], "scope": "both"}) is both
+    assert index.pdf_ids_for({"scope": "District", "unit": "7"}) == ["d7"]
+    assert index.pdf_ids_for({"scope": "District", "unit": "7", "units": []}) == ["d7", "d1"]
+
+    # One index per catalog version
+    first = get_catalog_filter_index(df, "2025-06-14T14:42:09Z")
+    assert get_catalog_filter_index(df.copy(), "2025-06-14T14:42:09Z") is first
+    assert get_catalog_filter_index(df, "2025-06-15T00:00:00Z") is not first
+
+
+def test_retrieval_filter_memo_reuses_and_invalidates_by_version():
+    from utils.filter import RetrievalFilterMemo
+
+    df = pd.DataFrame([
+        {"pdf_id": "n1", "scope": "National", "unit": ""},
+        {"pdf_id": "d7", "scope": "District", "unit": "7"},
+        {"pdf_id": "d1", "scope": "District", "unit": "1"},
+    ])
+    memo = RetrievalFilterMemo()
+
+    first = memo.resolve(df, {"scope": "Both", "units": ["7", "1"]}, "v1")
+    assert set(first.allowed_pdf_ids) == {"n1", "d7", "d1"}
+    # Same selection in a different order hits the memo
+    again = memo.resolve(df, {"units": ["1", "7"], "scope": "both"}, "v1")
+    assert again.retrieval_filter is first.retrieval_filter
+
+    # A new catalog version rebuilds against the new data
+    df2 = df[df["pdf_id"] != "d1"]
+    second = memo.resolve(df2, {"scope": "Both", "units": ["7", "1"]}, "v2")
+    assert second.retrieval_filter is not first.retrieval_filter
+    assert set(second.allowed_pdf_ids) == {"n1", "d7"}
+
+
+def test_compile_retrieval_filter_strategies():
+    from utils.filter import CatalogFilterIndex, compile_retrieval_filter
+
+    df = pd.DataFrame(
+        [{"pdf_id": f"n{i}", "scope": "National", "unit": "", "public_release": True} for i in range(8)]
+        + [{"pdf_id": "d7", "scope": "District", "unit": "7", "public_release": True},
+           {"pdf_id": "d1", "scope": "District", "unit": "1", "public_release": True}]
+    )
+    index = CatalogFilterIndex(df)
+    fc = {"public_release": True, "scope": "Both", "units": ["7"]}
+
+    ids = compile_retrieval_filter(index, fc)
+    assert ids.strategy == "ids"
+    assert set(ids.retrieval_filter.must[0].match.any) == set(ids.allowed_pdf_ids)
+
+    # Without payload indexes, the shorter excluded-id list is sent instead
+    complement = compile_retrieval_filter(index, fc, mode="auto", indexed_fields={})
+    assert complement.strategy == "complement"
+    assert complement.retrieval_filter.must_not[0].match.any == ["d1"]
+    assert complement.payload_bytes < ids.payload_bytes
+    assert complement.filter_key != ids.filter_key
+    assert compile_retrieval_filter(index, fc).filter_key == ids.filter_key
+
+    indexed = {"metadata.scope": "keyword", "metadata.unit": "keyword", "metadata.public_release": "bool"}
+    native = compile_retrieval_filter(index, fc, mode="auto", indexed_fields=indexed)
+    assert native.strategy == "payload"
+    assert "pdf_id" not in native.retrieval_filter.model_dump_json()
+    assert native.allowed_pdf_ids == ids.allowed_pdf_ids
+
+    # A selection nothing would restrict still limits the search to catalog ids
+    unrestricted = compile_retrieval_filter(index, {}, mode="auto", indexed_fields=indexed)
+    assert unrestricted.strategy == "ids"
+    assert set(unrestricted.retrieval_filter.must[0].match.any) == set(index.all_pdf_ids())
+
+
+def test_catalog_metadata_lookup_is_built_once_per_version():
+    from utils.filter import get_catalog_metadata
+
+    df = pd.DataFrame(
+        [
+            {"pdf_id": "a", "title": "First", "unit": ""},
+            {"pdf_id": "b", "title": "Second", "unit": "7"},
+            {"pdf_id": "a", "title": "Duplicate", "unit": ""},
+        ]
+    )
+    lookup = get_catalog_metadata(df, "v1")
+    assert lookup == {"a": {"title": "First", "unit": ""}, "b": {"title": "Second", "unit": "7"}}
+    # A copy of the same catalog version reuses the lookup
+    assert get_catalog_metadata(df.copy(), "v1") is lookup
+    assert get_catalog_metadata(df.iloc[:2], "v2") is not lookup
+
+
+def _search_pdf_ids(df, compiled):
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    client.upsert("c", [
+        models.PointStruct(
+            id=i + 1, vector=[1.0, 0.5], payload={"metadata": {k: v for k, v in row.items() if pd.notna(v)}}
+        )
+        for i, row in enumerate(df.to_dict("records"))
+    ])
+    points = client.query_points(
+        "c", query=[1.0, 0.5], query_filter=compiled.retrieval_filter, limit=100, with_payload=True
+    ).points
+    return {p.payload["metadata"]["pdf_id"] for p in points}
+
+
+def test_auto_and_ids_modes_return_the_same_documents():
+    from utils.filter import CatalogFilterIndex, compile_retrieval_filter
+
+    indexed = {"metadata.scope": "keyword", "metadata.unit": "keyword", "metadata.expiration_date": "datetime"}
+    clean = [
+        ("past", "2001-01-01T00:00:00Z"), ("future", "2999-01-01T00:00:00Z"),
+        ("date", "2999-01-01"), ("spaced", "2999-01-01 00:00:00"), ("none", None),
+    ]
+    dirty = clean + [("blank", ""), ("malformed", "not a date"), ("us", "01/01/2999")]
+    for rows, native in ((clean, True), (dirty, False)):
+        df = pd.DataFrame(
+            [{"pdf_id": f"n-{name}", "scope": "National", "unit": "", "expiration_date": exp} for name, exp in rows]
+            + [{"pdf_id": f"d-{name}", "scope": "District", "unit": "7", "expiration_date": exp} for name, exp in rows]
+        )
+        index = CatalogFilterIndex(df)
+        selections = ({"scope": "National", "exclude_expired": True}, {"units": ["7"], "exclude_expired": True})
+        for fc in selections:
+            ids = compile_retrieval_filter(index, fc)
+            auto = compile_retrieval_filter(index, fc, mode="auto", indexed_fields=indexed)
+            assert (auto.strategy == "payload") is native
+            assert _search_pdf_ids(df, auto) == _search_pdf_ids(df, ids) == set(ids.allowed_pdf_ids)
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("pyarrow")
+
+from utils.catalog_snapshot import CatalogSnapshotLoader, read_catalog_snapshot, write_catalog_snapshot
+
+
+def _catalog(*titles):
+    return pd.DataFrame([{"pdf_id": f"p{i}", "title": t, "unit": ""} for i, t in enumerate(titles)])
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "catalog.parquet")
+    df = _catalog("AUXMAN", "Ops Policy")
+    assert write_catalog_snapshot(df, "2024-05-01T00:00:00Z", path)
+
+    loaded, modified_time = read_catalog_snapshot(path)
+    assert modified_time == "2024-05-01T00:00:00Z"
+    pd.testing.assert_frame_equal(loaded, df)
+    assert read_catalog_snapshot(str(tmp_path / "missing.parquet")) is None
+
+
+def test_loader_serves_snapshot_and_refreshes_in_background(tmp_path):
+    path = str(tmp_path / "catalog.parquet")
+    write_catalog_snapshot(_catalog("Old"), "v1", path)
+    fetches, updates = [], []
+
+    def fetch_catalog():
+        fetches.append(1)
+        return _catalog("New"), "v2"
+
+    loader = CatalogSnapshotLoader(
+        fetch_catalog,
+        lambda: "v2",
+        path=path,
+        on_update=lambda snapshot: updates.append(snapshot.modified_time),
+        refresh_interval_s=0,
+    )
+    df, version = loader.load()
+    assert version == "v1" and df["title"].tolist() == ["Old"]
+
+    assert loader.wait(5)
+    assert fetches == [1] and updates == ["v2"]
+    assert loader.load()[1] == "v2"
+    assert read_catalog_snapshot(path)[1] == "v2"
+
+    # Derived structures are published together with the DataFrame
+    snapshot = loader.current()
+    assert snapshot.metadata == {"p0": {"title": "New", "unit": ""}}
+    assert snapshot.filter_index.pdf_ids_for({}) == ["p0"]
+
+
+def test_loader_fetches_remote_without_snapshot(tmp_path):
+    path = str(tmp_path / "catalog.parquet")
+    loader = CatalogSnapshotLoader(lambda: (_catalog("Only"), "v1"), lambda: "v1", path=path, refresh_interval_s=0)
+    assert loader.load()[1] == "v1"
+    assert read_catalog_snapshot(path)[1] == "v1"
+    # An unchanged remote catalog is not fetched again
+    assert loader.check_remote() is False
+
+
+def test_refresher_polls_and_swaps_without_blocking_readers(tmp_path):
+    path = str(tmp_path / "catalog.parquet")
+    write_catalog_snapshot(_catalog("Old"), "v1", path)
+    remote = {"version": "v1"}
+
+    loader = CatalogSnapshotLoader(
+        lambda: (_catalog(f"Title {remote['version']}"), remote["version"]),
+        lambda: remote["version"],
+        path=path,
+        refresh_interval_s=0.01,
+    )
+    try:
+        assert loader.load()[1] == "v1"
+        remote["version"] = "v2"
+        deadline = time.monotonic() + 5
+        while loader.current().modified_time != "v2" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert loader.load()[0]["title"].tolist() == ["Title v2"]
+    finally:
+        loader.stop(5)
@@ -0,0 +1,92 @@
+import os
+import sys
+
+from langchain_core.documents import Document
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.context_packer import ApproxTokenizer, pack_context, pack_context_for_config
+
+
+TOKENIZER = ApproxTokenizer()  # 4 characters per token, "\n\n" is one token
+
+
+def _doc(chars, pdf_id):
+    return Document(page_content="x" * chars, metadata={"pdf_id": pdf_id})
+
+
+def test_pack_context_without_budget_keeps_everything_and_counts_tokens():
+    docs = [_doc(40, "a"), _doc(80, "b")]
+
+    packed = pack_context(docs, tokenizer=TOKENIZER)
+
+    assert packed.docs == docs
+    assert packed.tokens == 10 + 1 + 20
+    assert packed.dropped == packed.truncated == 0
+
+
+def test_pack_context_fills_budget_in_order_and_trims_the_crossing_chunk():
+    docs = [_doc(400, "a"), _doc(400, "b"), _doc(400, "c")]
+
+    packed = pack_context(docs, max_tokens=180, min_chunk_tokens=50, tokenizer=TOKENIZER)
+
+    assert [d.metadata["pdf_id"] for d in packed.docs] == ["a", "b"]
+    assert len(packed.docs[1].page_content) == (180 - 100 - 1) * 4
+    assert docs[1].page_content == "x" * 400  # retrieved document left intact
+    assert packed.tokens == 180
+    assert (packed.truncated, packed.dropped, packed.dropped_tokens) == (1, 1, 21 + 100)
+
+
+def test_pack_context_drops_chunks_too_big_for_a_small_remainder():
+    docs = [_doc(360, "a"), _doc(400, "b"), _doc(20, "c")]
+
+    packed = pack_context(docs, max_tokens=100, min_chunk_tokens=50, tokenizer=TOKENIZER)
+
+    assert [d.metadata["pdf_id"] for d in packed.docs] == ["a", "c"]
+    assert packed.tokens == 90 + 1 + 5
+    assert packed.truncated == 0 and packed.dropped == 1
+
+
+def test_pack_context_always_keeps_part_of_the_first_chunk():
+    packed = pack_context([_doc(400, "a")], max_tokens=10, min_chunk_tokens=50, tokenizer=TOKENIZER)
+
+    assert packed.tokens == 10
+    assert packed.docs[0].page_content == "x" * 40
+
+
+def test_pack_context_for_config_reads_budget(monkeypatch):
+    import utils.context_packer as context_packer
+
+    monkeypatch.setattr(context_packer, "get_tokenizer", lambda _model: TOKENIZER)
+    config = {"RAG_ALL": {"generation_model": "gpt-4o-mini"}, "RAG": {"CONTEXT": {"max_tokens": 15}}}
+
+    packed = pack_context_for_config([_doc(40, "a"), _doc(40, "b")], config)
+
+    assert packed.budget == 15
+    assert [d.metadata["pdf_id"] for d in packed.docs] == ["a"]
+    assert packed.stats()["packed"] == 1
+
+
+def test_get_tokenizer_retries_after_a_failed_load(monkeypatch):
+    import utils.context_packer as context_packer
+
+    loaded = ApproxTokenizer()
+    loaded.name = "loaded"
+    attempts = []
+
+    def load(model):
+        attempts.append(model)
+        if len(attempts) == 1:
+            raise OSError("no network")
+        return loaded
+
+    monkeypatch.setattr(context_packer, "_load_tiktoken", load)
+    monkeypatch.setattr(context_packer, "_tokenizers", {})
+    monkeypatch.setattr(context_packer, "_load_failed_at", {})
+
+    assert context_packer.get_tokenizer("gpt-4o").name == "approx"
+    assert context_packer.get_tokenizer("gpt-4o").name == "approx"  # within the backoff
+    context_packer._load_failed_at["gpt-4o"] -= context_packer.TOKENIZER_RETRY_S
+    assert context_packer.get_tokenizer("gpt-4o") is loaded
+    assert context_packer.get_tokenizer("gpt-4o") is loaded
+    assert attempts == ["gpt-4o", "gpt-4o"]
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+from langchain_core.documents import Document
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.dedup import dedupe_documents, minhash_signatures
+
+
+def _texts(count, words=180, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"word{i}" for i in range(400)]
+    return [" ".join(rng.choice(vocabulary, words)) for _ in range(count)]
+
+
+def test_exact_duplicates_ignore_case_and_whitespace():
+    a, b = _texts(2)
+    docs = [Document(page_content=a), Document(page_content=b), Document(page_content="  " + a.upper() + "\n")]
+
+    result = dedupe_documents(docs, threshold=None)
+
+    assert result.docs == docs[:2]
+    assert result.duplicate_of == {2: 0}
+
+
+def test_near_duplicates_keep_the_best_ranked_copy():
+    a, b, c = _texts(3)
+    overlapping = " ".join(a.split()[5:] + ["continued", "on", "next", "page"])
+    docs = [Document(page_content=text, metadata={"rank": i}) for i, text in enumerate([b, overlapping, a, c])]
+
+    result = dedupe_documents(docs)
+
+    assert [d.metadata["rank"] for d in result.docs] == [0, 1, 3]
+    assert result.removed == [docs[2]]
+    assert result.duplicate_of == {2: 1}
+
+
+def test_partially_overlapping_chunks_are_kept():
+    a, b = _texts(2)
+    half = " ".join(a.split()[:90] + b.split()[:90])
+
+    result = dedupe_documents([Document(page_content=a), Document(page_content=half)])
+
+    assert len(result.docs) == 2
+
+
+def test_minhash_signatures_estimate_jaccard():
+    a, b = _texts(2)
+    signatures = minhash_signatures([a, a + " tail", b, ""])
+
+    assert (signatures[0] == signatures[1]).mean() > 0.8
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+    assert (signatures[3] == np.iinfo(np.uint32).max).all()
+
+
+def test_a_near_duplicate_pair_uses_exact_jaccard():
+    a, b = _texts(2)
+    overlapping = " ".join(a.split()[5:] + ["continued"])
+
+    result = dedupe_documents([Document(page_content=a), Document(page_content=overlapping)])
+    assert result.duplicate_of == {1: 0}
+    assert len(dedupe_documents([Document(page_content=a), Document(page_content=b)]).docs) == 2
+
+
+def test_signatures_of_short_texts_match_when_batched():
+    texts = ["a b c d", "x", "", "y z", "p q r"]
+    batched = minhash_signatures(texts)
+
+    for row, text in enumerate(texts):
+        assert (batched[row] == minhash_signatures([text])[0]).all()
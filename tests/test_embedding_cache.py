@@ -0,0 +1,84 @@
+import os
+import sys
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.embedding_cache import CachedQueryEmbeddings, with_query_embedding_cache
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_repeat_questions_skip_the_embedding_call():
+    inner = CountingEmbeddings(size=8)
+    cached = CachedQueryEmbeddings(inner)
+
+    first = cached.embed_query("How do I stay current?")
+    again = cached.embed_query("  How do I   stay current? ")
+
+    assert inner.calls == 1
+    assert again == first
+    assert cached.embed_query("how do i stay current?") is not None
+    assert inner.calls == 2  # case is preserved in the key
+    assert cached.stats()["memory_hits"] == 1
+
+
+def test_memory_tier_is_lru_bounded():
+    inner = CountingEmbeddings(size=8)
+    cached = CachedQueryEmbeddings(inner, maxsize=2)
+    for question in ("a", "b", "a", "c", "a", "b"):
+        cached.embed_query(question)
+
+    assert cached.stats()["size"] == 2
+    assert inner.calls == 4  # "b" was evicted by "c"
+
+
+def test_persistent_tier_survives_a_new_process(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    first = CachedQueryEmbeddings(CountingEmbeddings(size=8), path=path)
+    vector = first.embed_query("Who approves a patrol order?")
+    first.store.close()
+
+    inner = CountingEmbeddings(size=8)
+    second = CachedQueryEmbeddings(inner, path=path)
+
+    assert second.embed_query("Who approves a patrol order?") == vector
+    assert inner.calls == 0
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_model_identity_is_part_of_the_key():
+    small = CachedQueryEmbeddings(DeterministicFakeEmbedding(size=8))
+    large = CachedQueryEmbeddings(DeterministicFakeEmbedding(size=16))
+
+    assert small.key("q") != large.key("q")
+
+
+def test_vectorstore_queries_go_through_the_cache():
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE))
+    inner = CountingEmbeddings(size=8)
+    base = QdrantVectorStore(client=client, collection_name="c", embedding=inner)
+    base.add_texts(["workshop", "uniform"])
+
+    store = with_query_embedding_cache(base, {"maxsize": 16})
+    store.similarity_search("workshop", k=1)
+    store.similarity_search("workshop", k=1)
+
+    assert isinstance(store.embeddings, CachedQueryEmbeddings)
+    assert base.embeddings is inner  # the connector's store is left as is
+    assert store.client is base.client
+    assert inner.calls == 1
+    assert with_query_embedding_cache(store) is store
+    assert with_query_embedding_cache(base, {"enabled": False}) is base
@@ -0,0 +1,135 @@
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.enrichment import (
+    AcronymExpander,
+    EnrichmentStore,
+    QuestionEnricher,
+    TermMatcher,
+    build_trie_pattern,
+    get_question_enricher,
+    read_mapping_csv,
+)
+
+ACRONYMS_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'acronyms.csv')
+TERMS_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'terms.csv')
+
+
+def test_read_mapping_csv_skips_blank_rows(tmp_path):
+    path = tmp_path / "terms.csv"
+    path.write_text("﻿term,implication\nBoat crew,Boat crew is a program\n,\n", encoding="utf-8")
+    assert read_mapping_csv(str(path)) == {"Boat crew": "Boat crew is a program"}
+
+
+def test_read_mapping_csv_requires_two_columns(tmp_path):
+    bad = tmp_path / "bad.csv"
+    bad.write_text("only_one_col\nvalue\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_mapping_csv(str(bad))
+
+
+def test_trie_pattern_prefers_longest_key():
+    pattern = re.compile(r"\b(?:" + build_trie_pattern(["AUX", "AUXDATA", "AUXD"]) + r")\b")
+    assert pattern.findall("AUXDATA AUX AUXD AUXDAT") == ["AUXDATA", "AUX", "AUXD"]
+
+
+def test_expander_is_single_pass_and_word_bounded():
+    expander = AcronymExpander({"AS": "Auxiliary AUXSCOUT Officer", "AUXSCOUT": "Sea Scout program"})
+    # The expansion of AS contains AUXSCOUT, which must not be expanded again
+    assert expander.expand("What does AS do? BASS") == "What does Auxiliary AUXSCOUT Officer do? BASS"
+    assert expander.expand("AUXSCOUT") == "Sea Scout program"
+
+
+def test_expander_matches_per_row_substitution_on_repo_acronyms():
+    acronyms = read_mapping_csv(ACRONYMS_PATH)
+    expander = get_question_enricher(ACRONYMS_PATH, TERMS_PATH).acronyms
+    question = "What are the requirements to run for FC? Is AUXDATA needed for a PQS?"
+    expected = question
+    for acronym, full_form in acronyms.items():
+        # Per-row expansion over the original text only (single-pass semantics)
+        if re.search(r"\b" + re.escape(acronym) + r"\b", question):
+            expected = re.sub(r"\b" + re.escape(acronym) + r"\b", full_form, expected)
+    assert expander.expand(question) == expected
+    assert get_question_enricher(ACRONYMS_PATH, TERMS_PATH).acronyms is expander  # cached per file version
+
+
+def test_term_matcher_finds_overlapping_terms_in_one_scan():
+    matcher = TermMatcher({
+        "Boat crew": "boat crew program",
+        "Boat crew currency": "currency requirements",
+        "crew": "crew in general",
+        "Pilot": "aviation",
+    })
+    assert [matcher.terms[i] for i in matcher.find("How is Boat crew currency kept?")] == [
+        "Boat crew", "Boat crew currency", "crew",
+    ]
+    assert matcher.find("pilot") == []  # case-sensitive, like the old substring test
+
+
+def test_enricher_emits_each_implication_once():
+    shared = "(Qualification is a required step to initial certification and becoming certified.)"
+    enricher = get_question_enricher(ACRONYMS_PATH, TERMS_PATH)
+    enriched = enricher.enrich("How do I become certified and get certified?")
+    assert enriched.count(shared) == 1
+    assert enriched.startswith("How do I become certified and get certified?")
+
+
+def _write_csvs(tmp_path, acronym_rows, term_rows):
+    acronyms = tmp_path / "acronyms.csv"
+    terms = tmp_path / "terms.csv"
+    acronyms.write_text("acronym,definition\n" + "".join(f"{k},{v}\n" for k, v in acronym_rows), encoding="utf-8")
+    terms.write_text("term,implication\n" + "".join(f"{k},{v}\n" for k, v in term_rows), encoding="utf-8")
+    return str(acronyms), str(terms)
+
+
+def test_store_hot_reloads_on_csv_edit(tmp_path):
+    acronyms, terms = _write_csvs(tmp_path, [("FC", "Flotilla Commander")], [("Flotilla", "a local unit")])
+    store = EnrichmentStore(acronyms, terms, artifact_dir=str(tmp_path / "cache"))
+    first = store.get()
+    assert first.enrich("Who is the FC?") == "Who is the Flotilla Commander? (a local unit)"
+    assert store.get() is first
+
+    # Same content with a new mtime keeps the compiled enricher
+    os.utime(acronyms, ns=(0, 0))
+    assert store.get() is first
+
+    key = store.content_key()
+    _write_csvs(tmp_path, [("FC", "Flotilla Commander"), ("VFC", "Vice Flotilla Commander")], [])
+    os.utime(acronyms, ns=(1, 1))
+    second = store.get()
+    assert second is not first
+    assert store.content_key() != key
+    assert second.enrich("VFC") == "Vice Flotilla Commander"
+
+
+def test_store_keeps_serving_while_a_csv_is_being_replaced(tmp_path):
+    acronyms, terms = _write_csvs(tmp_path, [("FC", "Flotilla Commander")], [])
+    store = EnrichmentStore(acronyms, terms, artifact_dir=None)
+    first = store.get()
+
+    os.remove(acronyms)
+    assert store.get() is first
+    with open(acronyms, "w", encoding="utf-8") as fh:
+        fh.write("acronym")  # partially written
+    assert store.get() is first
+
+    _write_csvs(tmp_path, [("VFC", "Vice Flotilla Commander")], [])
+    assert store.get().enrich("VFC") == "Vice Flotilla Commander"
+
+
+def test_store_loads_persisted_artifact(tmp_path, monkeypatch):
+    acronyms, terms = _write_csvs(tmp_path, [("FC", "Flotilla Commander")], [("Flotilla", "a local unit")])
+    cache_dir = str(tmp_path / "cache")
+    EnrichmentStore(acronyms, terms, artifact_dir=cache_dir).get()
+
+    # A fresh store (new process) must not read the CSVs through the compiler
+    def fail(*_args, **_kwargs):
+        raise AssertionError("artifact should have been loaded from disk")
+
+    monkeypatch.setattr(QuestionEnricher, "from_mappings", fail)
+    enricher = EnrichmentStore(acronyms, terms, artifact_dir=cache_dir).get()
+    assert enricher.enrich("FC") == "Flotilla Commander (a local unit)"
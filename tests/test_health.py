@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.health import CheckDeferred, HealthMonitor, check_openai, check_qdrant, default_checks
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_status_is_served_instantly_and_refreshed_in_background():
+    release = threading.Event()
+    calls = []
+
+    def slow_check():
+        calls.append(1)
+        release.wait(5)
+        return True, "All Systems Operational"
+
+    monitor = HealthMonitor({"openai": slow_check}, ttl_s=60)
+    start = time.perf_counter()
+    first = monitor.status("openai")
+    assert time.perf_counter() - start < 0.5
+    assert first.ok is None and first.stale
+
+    # A second read while the check is running does not start another one
+    monitor.status("openai")
+    release.set()
+    assert _wait_for(lambda: monitor.status("openai").ok is True)
+    assert calls == [1]
+    status = monitor.status("openai")
+    assert not status.stale and status.latency_s is not None
+
+
+def test_failed_and_stale_checks():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("connection refused")
+        return True, "ok"
+
+    monitor = HealthMonitor({"qdrant": flaky}, ttl_s=0)
+    failed = monitor.refresh("qdrant")
+    assert failed.ok is False and "connection refused" in failed.message
+
+    # With ttl_s=0 every read is stale and schedules a refresh
+    assert monitor.status("qdrant").stale
+    assert _wait_for(lambda: monitor.status("qdrant").ok is True)
+
+
+def test_deferred_check_keeps_status_unknown_until_it_can_run(monkeypatch):
+    ready = []
+
+    def check():
+        if not ready:
+            raise CheckDeferred("not yet")
+        return True, "green"
+
+    monitor = HealthMonitor({"qdrant": check}, ttl_s=60)
+    deferred = monitor.refresh("qdrant")
+    assert deferred.ok is None and deferred.checked_at is None
+    assert monitor.status("qdrant").stale
+
+    ready.append(1)
+    assert _wait_for(lambda: monitor.status("qdrant").ok is True)
+
+    # The real Qdrant check never imports the RAG pipeline itself
+    monkeypatch.delitem(sys.modules, "utils.rag", raising=False)
+    with pytest.raises(CheckDeferred):
+        check_qdrant()
+    assert "utils.rag" not in sys.modules
+
+
+def test_qdrant_check_is_deferred_while_the_pipeline_is_still_importing(monkeypatch):
+    import types
+
+    partial = types.ModuleType("utils.rag")  # in sys.modules, body not yet run
+    monkeypatch.setitem(sys.modules, "utils.rag", partial)
+    monitor = HealthMonitor({"qdrant": check_qdrant}, ttl_s=60)
+
+    status = monitor.refresh("qdrant")
+
+    assert status.ok is None and status.checked_at is None
+
+
+def test_default_checks_use_the_given_connectors(monkeypatch):
+    import types
+
+    class Catalog:
+        def get_catalog_modified_time(self):
+            return "2025-06-14"
+
+    class Response:
+        def json(self):
+            return {"status": {"indicator": "minor", "description": "Partial outage"}}
+
+    calls = []
+    rag = types.ModuleType("utils.rag")
+    rag.PIPELINE_READY = True
+    rag.get_vectorstore = lambda vectordb, settings: calls.append((vectordb, settings)) or types.SimpleNamespace(
+        collection_name="ask",
+        client=types.SimpleNamespace(get_collection=lambda name: types.SimpleNamespace(status="green")),
+    )
+    monkeypatch.setitem(sys.modules, "utils.rag", rag)
+    monkeypatch.setattr("requests.get", lambda url, timeout: Response())
+    checks = default_checks("vectordb", Catalog(), {"enabled": False})
+
+    assert checks["qdrant"]() == (True, "ask: green")
+    assert calls == [("vectordb", {"enabled": False})]
+    assert checks["catalog"]() == (True, "modified 2025-06-14")
+    assert check_openai() == (False, "Partial outage")
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.local_mmr import CandidatePool, CandidatePoolCache, LocalMMRRetriever, mmr_select
+
+
+def test_mmr_select_trades_relevance_for_diversity():
+    # Candidates 0 and 1 are near-identical and most relevant; 2 is different
+    vectors = np.array([[1.0, 0.0], [0.99, 0.14], [0.6, 0.8]])
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = np.array([1.0, -0.1])
+    pool = CandidatePool.build([None] * 3, query, vectors)
+
+    assert mmr_select(pool.query_similarity, pool.similarity, 2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(pool.query_similarity, pool.similarity, 2, lambda_mult=0.3) == [0, 2]
+    assert mmr_select(pool.query_similarity, pool.similarity, 10, lambda_mult=0.3) == [0, 2, 1]
+    assert mmr_select(pool.query_similarity, pool.similarity, 0) == []
+
+
+def _store(texts):
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=models.VectorParams(size=16, distance=models.Distance.COSINE))
+    store = QdrantVectorStore(client=client, collection_name="c", embedding=DeterministicFakeEmbedding(size=16))
+    store.add_texts(texts, metadatas=[{"pdf_id": f"p{i % 3}"} for i in range(len(texts))])
+    return store
+
+
+def test_retriever_reranks_from_one_cached_pool(monkeypatch):
+    store = _store([f"chunk {i}" for i in range(40)])
+    queries = []
+    original = store.client.query_points
+    monkeypatch.setattr(store.client, "query_points", lambda **kw: queries.append(kw) or original(**kw))
+    retriever = LocalMMRRetriever(vectorstore=store, k=4, fetch_k=12, pool_cache=CandidatePoolCache())
+
+    docs = retriever.invoke("annual workshop")
+    by_relevance = retriever.rerank("annual workshop", k=6, lambda_mult=1.0)
+
+    assert len(queries) == 1 and queries[0]["limit"] == 12 and queries[0]["with_vectors"]
+    assert len(docs) == 4 and len(by_relevance) == 6
+    expected = store.similarity_search("annual workshop", k=6)
+    assert [(d.page_content, {**d.metadata, "relevance_score": None}) for d in by_relevance] == [
+        (d.page_content, {**d.metadata, "relevance_score": None}) for d in expected
+    ]
+    docs[0].metadata["title"] = "changed"
+    assert "title" not in retriever.invoke("annual workshop")[0].metadata
+
+
+def test_pools_are_keyed_on_the_catalog_version(monkeypatch):
+    store = _store([f"chunk {i}" for i in range(20)])
+    queries = []
+    original = store.client.query_points
+    monkeypatch.setattr(store.client, "query_points", lambda **kw: queries.append(kw) or original(**kw))
+    cache = CandidatePoolCache()
+
+    for version in ("v1", "v1", "v2"):
+        LocalMMRRetriever(vectorstore=store, k=3, fetch_k=8, catalog_version=version, pool_cache=cache).invoke("drill")
+
+    assert len(queries) == 2
+
+
+def test_retriever_applies_the_filter():
+    from qdrant_client.http import models
+
+    store = _store([f"chunk {i}" for i in range(30)])
+    only_p1 = models.Filter(must=[models.FieldCondition(key="metadata.pdf_id", match=models.MatchAny(any=["p1"]))])
+    retriever = LocalMMRRetriever(vectorstore=store, retrieval_filter=only_p1, k=5, fetch_k=20, pool_cache=CandidatePoolCache())
+
+    assert {d.metadata["pdf_id"] for d in retriever.invoke("patrol order")} == {"p1"}
+
+
+def test_get_retriever_selects_local_mmr(monkeypatch):
+    import utils.rag as rag
+
+    cfg = {"RAG": {"RETRIEVAL": {"search_type": "local_mmr", "k": 3, "fetch_k": 9, "lambda_mult": 0.7}}}
+    monkeypatch.setattr(rag.stu, "cached_load_config_by_context", lambda: cfg, raising=False)
+    monkeypatch.setattr(rag, "get_vectorstore", lambda: "store")
+
+    retriever = rag.get_retriever(retrieval_filter=None, catalog_version="v1")
+
+    assert isinstance(retriever, LocalMMRRetriever)
+    assert (retriever.k, retriever.fetch_k, retriever.lambda_mult) == (3, 9, 0.7)
+    assert retriever.catalog_version == "v1"
@@ -0,0 +1,76 @@
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.metrics import Histogram, MetricsRegistry, StageTimer
+
+
+def test_histogram_percentiles_and_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [2.0]:
+        histogram.observe(value)
+
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == 0.05
+    assert summary["p95"] == 0.5
+    assert summary["p99"] == 0.5
+    assert summary["max"] == 2.0
+    assert histogram.counts == [90, 9, 1]
+    assert histogram.percentile(100) == 2.0
+
+
+def test_stage_timer_exports_to_registry():
+    registry = MetricsRegistry(buckets=(0.001, 1.0))
+    timer = StageTimer()
+    with timer.stage("retrieve"):
+        time.sleep(0.002)
+    timer.record("retrieve", 0.5)
+    assert timer.timed("enrich", lambda q: q.upper(), "fc") == "FC"
+
+    timings = timer.finish(registry)
+
+    assert timings["retrieve"] >= 0.502
+    assert set(timings) == {"retrieve", "enrich", "total"}
+    snapshot = registry.snapshot()
+    assert snapshot["rag.stage.retrieve"]["count"] == 1
+    assert snapshot["rag.stage.total"]["count"] == 1
+    assert registry.histogram("rag.stage.retrieve").counts == [0, 1, 0]
+
+
+def test_counters_accumulate_and_clear():
+    registry = MetricsRegistry()
+    registry.increment("rag.llm_skipped.low_relevance")
+    registry.increment("rag.llm_skipped.low_relevance", 2)
+
+    assert registry.counters() == {"rag.llm_skipped.low_relevance": 3}
+    registry.clear()
+    assert registry.counters() == {}
+
+
+def test_log_summary_reports_percentiles_once_per_change(caplog):
+    registry = MetricsRegistry()
+    for seconds in (0.01, 0.02, 0.5):
+        registry.observe("rag.stage.retrieve", seconds)
+
+    assert registry.summary_lines() == ["rag.stage.retrieve n=3 p50/p95/p99=20.0/500.0/500.0 ms"]
+    with caplog.at_level(logging.INFO, logger="utils.metrics"):
+        assert registry.log_summary()
+        assert not registry.log_summary()  # nothing new since the last summary
+    assert "rag.stage.retrieve n=3" in caplog.text
+
+
+def test_log_summary_includes_counters(caplog):
+    registry = MetricsRegistry()
+    registry.increment("rag.llm_skipped.low_relevance")
+
+    assert registry.summary_lines() == ["rag.llm_skipped.low_relevance total=1"]
+    with caplog.at_level(logging.INFO, logger="utils.metrics"):
+        assert registry.log_summary()
+        assert not registry.log_summary()
+        registry.increment("rag.llm_skipped.low_relevance")
+        assert registry.log_summary()
+    assert "rag.llm_skipped.low_relevance total=2" in caplog.text
@@ -0,0 +1,277 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pandas as pd
+import streamlit as st
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _patch_pipeline(monkeypatch, docs):
+    monkeypatch.setattr(
+        st,
+        "secrets",
+        {"QDRANT_URL": "http://localhost", "QDRANT_API_KEY": "test", "OPENAI_API_KEY_ASK": "key"},
+        raising=False,
+    )
+    import utils.rag as rag
+
+    cfg = {"RAG_ALL": {}, "RAG": {"RETRIEVAL": {}}}
+    catalog = pd.DataFrame([{"pdf_id": "p1", "title": "AUXMAN", "scope": "National", "unit": ""}])
+
+    class DummyRetriever:
+        def with_config(self, **_kwargs):
+            return self
+
+        def invoke(self, _question):
+            return docs
+
+        async def ainvoke(self, _question):
+            return docs
+
+    monkeypatch.setattr(rag.stu, "cached_load_config_by_context", lambda: cfg, raising=False)
+    monkeypatch.setattr(rag, "fetch_table_and_date_from_catalog", lambda: (catalog, "v1"))
+    monkeypatch.setattr(rag, "get_retriever", lambda retrieval_filter, catalog_version=None: DummyRetriever())
+    monkeypatch.setattr(
+        rag,
+        "get_chat_model",
+        lambda _cfg: GenericFakeChatModel(messages=iter(["Stay current by completing the workshop."])),
+    )
+    return rag
+
+
+def test_rag_stream_yields_sources_then_tokens_then_response(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [Document(page_content="Workshop text", metadata={"pdf_id": "p1"})])
+
+    events = list(rag.rag_stream("How do I stay current in boat crew?"))
+
+    assert events[0]["type"] == "sources"
+    assert events[0]["sources"] == ["AUXMAN"]
+    tokens = [e["content"] for e in events if e["type"] == "token"]
+    assert len(tokens) > 1
+    assert events[-1]["type"] == "done"
+    response = events[-1]["response"]
+    assert response["answer"] == "".join(tokens) == "Stay current by completing the workshop."
+    assert response["sources"] == ["AUXMAN"]
+    assert {"enrich", "catalog_load", "catalog_filter", "retrieve", "llm_first_token", "llm", "total"} <= set(
+        response["timings"]
+    )
+
+
+def test_rag_stream_skips_llm_without_documents(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [])
+
+    events = list(rag.rag_stream("Unrelated question"))
+
+    assert [e["type"] for e in events] == ["sources", "done"]
+    assert events[-1]["response"]["answer"] == rag.NO_DOCUMENTS_ANSWER
+
+
+def test_arag_overlaps_independent_stages(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [Document(page_content="Workshop text", metadata={"pdf_id": "p1"})])
+
+    # Each stage blocks until all three are running; a sequential pipeline
+    # would break the barrier
+    barrier = threading.Barrier(3, timeout=5)
+    make_model = rag.get_chat_model
+    enrich = rag.enrich_question
+    resolve = rag._resolve_retrieval_filter
+
+    def waiting(fn):
+        def wrapper(*args, **kwargs):
+            barrier.wait()
+            return fn(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(rag, "get_chat_model", waiting(make_model))
+    monkeypatch.setattr(rag, "enrich_question", waiting(enrich))
+    monkeypatch.setattr(rag, "_resolve_retrieval_filter", waiting(resolve))
+
+    response = asyncio.run(rag.arag("How do I stay current in boat crew?"))
+
+    assert response["answer"] == "Stay current by completing the workshop."
+    assert response["sources"] == ["AUXMAN"]
+
+
+def test_rag_batch_shares_resources_and_keeps_order(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [Document(page_content="Workshop text", metadata={"pdf_id": "p1"})])
+
+    built = []
+
+    def make_model(_cfg):
+        built.append(1)
+        return GenericFakeChatModel(messages=iter(["a1", "a2", "a3"]))
+
+    enrich = rag.enrich_question
+
+    def flaky_enrich(question, *args):
+        if question == "bad":
+            raise RuntimeError("boom")
+        return enrich(question, *args)
+
+    monkeypatch.setattr(rag, "get_chat_model", make_model)
+    monkeypatch.setattr(rag, "enrich_question", flaky_enrich)
+
+    results = rag.rag_batch(["q1", "bad", "q3"], max_concurrency=2)
+
+    assert len(built) == 1
+    assert [r["question"] for r in results] == ["q1", "bad", "q3"]
+    assert results[1]["response"] is None
+    assert "boom" in results[1]["error"]
+    assert {results[0]["response"]["answer"], results[2]["response"]["answer"]} == {"a1", "a2"}
+    assert all(r["elapsed_s"] >= 0 for r in results)
+
+
+def test_create_rate_limiter_is_provider_aware():
+    import utils.rag as rag
+
+    assert rag.create_rate_limiter({"RAG_ALL": {"langchain_chat_model": "ChatOllama"}}) is None
+    assert rag.create_rate_limiter({"RAG_ALL": {"langchain_chat_model": "ChatOpenAI"}}) is not None
+    assert rag.create_rate_limiter({"RAG_ALL": {"langchain_chat_model": "ChatOpenAI", "requests_per_second": 0}}) is None
+
+
+def test_catalog_metadata_feeds_context_and_source_lists(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [Document(page_content="Complete the workshop.", metadata={"pdf_id": "p1", "page": 2})])
+
+    response = rag.rag("How do I stay current?")
+    assert response["catalog_version"] == "v1"
+    assert response["context"][0].metadata["title"] == "AUXMAN"
+
+    short_list, long_list = rag.create_source_lists(response, rag.fetch_table_and_date_from_catalog()[0])
+    assert "AUXMAN" in short_list and "page 3" in short_list
+
+
+def test_rag_records_stage_timings_and_metrics(monkeypatch):
+    from utils.metrics import metrics
+
+    rag = _patch_pipeline(monkeypatch, [Document(page_content="Workshop text", metadata={"pdf_id": "p1"})])
+    metrics.clear()
+
+    response = rag.rag("How do I stay current in boat crew?")
+
+    stages = {
+        "chat_model", "enrich", "catalog_load", "catalog_filter", "retriever_build",
+        "retrieve", "dedup", "attach_metadata", "context_pack", "prompt_format", "llm", "total",
+    }
+    assert set(response["timings"]) == stages
+    assert all(seconds >= 0 for seconds in response["timings"].values())
+    assert response["timings"]["total"] >= response["timings"]["llm"]
+    assert metrics.snapshot()["rag.stage.total"]["count"] == 1
+
+
+def test_rag_packs_context_into_token_budget(monkeypatch):
+    import utils.context_packer as context_packer
+
+    docs = [
+        Document(page_content="a" * 400, metadata={"pdf_id": "p1"}),
+        Document(page_content="b" * 400, metadata={"pdf_id": "p1"}),
+    ]
+    rag = _patch_pipeline(monkeypatch, docs)
+    monkeypatch.setattr(context_packer, "get_tokenizer", lambda _model: context_packer.ApproxTokenizer())
+    rag.stu.cached_load_config_by_context()["RAG"]["CONTEXT"] = {"max_tokens": 120, "min_chunk_tokens": 50}
+
+    response = rag.rag("How do I stay current?")
+
+    assert response["context_tokens"] == 100
+    assert [doc.page_content for doc in response["context"]] == ["a" * 400]
+    assert response["sources"] == ["AUXMAN"]
+    assert response["context_packing"]["dropped"] == 1
+
+
+def test_rag_removes_duplicate_chunks_before_prompting(monkeypatch):
+    text = "Boat crew members complete the annual workshop to stay current in the program."
+    docs = [
+        Document(page_content=text, metadata={"pdf_id": "p1", "page": 2}),
+        Document(page_content=text.upper(), metadata={"pdf_id": "p1", "page": 3}),
+    ]
+    rag = _patch_pipeline(monkeypatch, docs)
+
+    response = rag.rag("How do I stay current?")
+
+    assert [doc.metadata["page"] for doc in response["context"]] == [2]
+    assert response["dedup"]["removed"] == 1
+    assert response["dedup"]["removed_tokens"] > 0
+
+
+def test_rag_reuses_cached_retrieval_for_the_same_question(monkeypatch):
+    from utils.retrieval_cache import retrieval_cache
+
+    docs = [Document(page_content="Workshop text", metadata={"_id": "pt-1", "pdf_id": "p1", "page": 0})]
+    rag = _patch_pipeline(monkeypatch, docs)
+    invocations = []
+
+    class CountingRetriever:
+        def with_config(self, **_kwargs):
+            return self
+
+        def invoke(self, _question):
+            invocations.append(1)
+            return [Document(page_content=d.page_content, metadata=dict(d.metadata)) for d in docs]
+
+    class Store:
+        def get_by_ids(self, ids):
+            return [Document(page_content="Workshop text", metadata={"_id": i, "pdf_id": "p1", "page": 0}) for i in ids]
+
+    monkeypatch.setattr(rag, "get_retriever", lambda retrieval_filter, catalog_version=None: CountingRetriever())
+    monkeypatch.setattr(rag, "get_vectorstore", lambda: Store())
+    retrieval_cache.clear()
+
+    first = rag.rag("How do I stay current?")
+    second = rag.rag("How do I stay current?")
+
+    assert (first["retrieval_cache"], second["retrieval_cache"]) == ("miss", "hit")
+    assert len(invocations) == 1
+    assert second["context"][0].metadata["title"] == "AUXMAN"
+    retrieval_cache.clear()
+
+
+def test_rag_skips_llm_when_no_document_clears_the_relevance_gate(monkeypatch):
+    from utils.metrics import metrics
+
+    docs = [
+        Document(page_content="Uniform text", metadata={"pdf_id": "p1", "relevance_score": 0.21}),
+        Document(page_content="Patrol text", metadata={"pdf_id": "p1", "relevance_score": 0.34}),
+    ]
+    rag = _patch_pipeline(monkeypatch, docs)
+    rag.stu.cached_load_config_by_context()["RAG"]["RELEVANCE_GATE"] = {"min_score": 0.5}
+
+    class NoCallModel:
+        def invoke(self, _prompt):
+            raise AssertionError("LLM called")
+
+        stream = invoke
+
+    monkeypatch.setattr(rag, "get_chat_model", lambda _cfg: NoCallModel())
+    metrics.clear()
+
+    response = rag.rag("What is the capital of France?")
+    events = list(rag.rag_stream("What is the capital of France?"))
+
+    assert response["answer"] == rag.LOW_RELEVANCE_ANSWER
+    assert response["relevance_scores"] == [0.21, 0.34]
+    assert response["context"] == [] and response["sources"] == []
+    assert [e["type"] for e in events] == ["sources", "done"]
+    assert metrics.counters()["rag.llm_skipped.low_relevance"] == 2
+
+
+def test_rag_answers_when_a_document_clears_the_relevance_gate(monkeypatch):
+    docs = [Document(page_content="Workshop text", metadata={"pdf_id": "p1", "relevance_score": 0.62})]
+    rag = _patch_pipeline(monkeypatch, docs)
+    rag.stu.cached_load_config_by_context()["RAG"]["RELEVANCE_GATE"] = {"min_score": 0.5}
+
+    response = rag.rag("How do I stay current?")
+
+    assert response["answer"] == "Stay current by completing the workshop."
+    assert response["relevance_scores"] == [0.62]
+
+
+def test_pipeline_fingerprint_changes_with_the_relevance_gate(monkeypatch):
+    rag = _patch_pipeline(monkeypatch, [])
+    config = {"RAG_ALL": {}, "RAG": {"RETRIEVAL": {}}}
+    gated = {"RAG_ALL": {}, "RAG": {"RETRIEVAL": {}, "RELEVANCE_GATE": {"min_score": 0.5}}}
+
+    assert rag.pipeline_fingerprint(config) != rag.pipeline_fingerprint(gated)
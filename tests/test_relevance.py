@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.relevance import ScoredVectorStoreRetriever, relevance_gate, with_relevance_scores
+
+
+def _doc(score=None):
+    metadata = {"pdf_id": "p1"} if score is None else {"pdf_id": "p1", "relevance_score": score}
+    return Document(page_content="text", metadata=metadata)
+
+
+def test_relevance_gate_uses_the_best_score():
+    assert relevance_gate([_doc(0.2), _doc(0.5)], 0.4) == (True, 0.5)
+    assert relevance_gate([_doc(0.2), _doc(0.3)], 0.4) == (False, 0.3)
+    assert relevance_gate([_doc(0.2)], None) == (True, 0.2)
+    # Nothing to judge by without scores
+    assert relevance_gate([_doc(), _doc()], 0.4) == (True, None)
+
+
+def _store():
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=models.VectorParams(size=16, distance=models.Distance.COSINE))
+    store = QdrantVectorStore(client=client, collection_name="c", embedding=DeterministicFakeEmbedding(size=16))
+    store.add_texts([f"chunk {i}" for i in range(20)])
+    return store
+
+
+def test_vectorstore_retrievers_are_upgraded_to_record_scores():
+    store = _store()
+    for search_type, kwargs in (("mmr", {"k": 3, "fetch_k": 10, "lambda_mult": 0.5}), ("similarity", {"k": 3})):
+        retriever = with_relevance_scores(store.as_retriever(search_type=search_type, search_kwargs=kwargs))
+        assert isinstance(retriever, ScoredVectorStoreRetriever)
+
+        docs = retriever.invoke("chunk 3")
+        async_docs = asyncio.run(retriever.ainvoke("chunk 3"))
+
+        scores = [d.metadata["relevance_score"] for d in docs]
+        assert len(docs) == 3 and all(-1.0 <= s <= 1.0 for s in scores)
+        assert [d.metadata["_id"] for d in async_docs] == [d.metadata["_id"] for d in docs]
+    expected = store.similarity_search_with_score("chunk 3", k=1)[0][1]
+    assert scores[0] == expected
+
+
+def test_local_mmr_selection_carries_scores():
+    from utils.local_mmr import CandidatePoolCache, LocalMMRRetriever
+
+    retriever = LocalMMRRetriever(vectorstore=_store(), k=3, fetch_k=10, pool_cache=CandidatePoolCache())
+
+    docs = retriever.rerank("chunk 3", lambda_mult=1.0)
+
+    scores = [d.metadata["relevance_score"] for d in docs]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_other_retrievers_are_left_alone():
+    retriever = object()
+    assert with_relevance_scores(retriever) is retriever
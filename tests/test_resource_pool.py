@@ -0,0 +1,55 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.resource_pool import ResourceRegistry
+
+
+def test_registry_reuses_instance_until_key_changes():
+    registry = ResourceRegistry()
+    first = registry.get("chat_model", "cfg-a", object)
+    assert registry.get("chat_model", "cfg-a", object) is first
+    second = registry.get("chat_model", "cfg-b", object)
+    assert second is not first
+    assert registry.get("chat_model", "cfg-b", object) is second
+
+
+def test_registry_builds_once_under_concurrency():
+    registry = ResourceRegistry()
+    calls = []
+    start = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        return object()
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(registry.get("vectorstore", "cfg", factory))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+
+
+def test_get_chat_model_pools_by_config(monkeypatch):
+    import utils.chat_model_factory as factory
+
+    monkeypatch.setattr(factory, "registry", ResourceRegistry())
+    cfg = {
+        "OPENAI_API_KEY_ASK": "sk-test",
+        "RAG_ALL": {"langchain_chat_model": "ChatOpenAI", "generation_model": "gpt-4o-mini", "temperature": 0.2},
+    }
+    llm = factory.get_chat_model(cfg)
+    assert factory.get_chat_model(dict(cfg)) is llm
+
+    changed = {**cfg, "RAG_ALL": {**cfg["RAG_ALL"], "temperature": 0.5}}
+    assert factory.get_chat_model(changed) is not llm
@@ -0,0 +1,84 @@
+import os
+import sys
+
+from langchain_core.documents import Document
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.retrieval_cache import RetrievalCache, make_retrieval_key
+
+
+class FakeVectorStore:
+    def __init__(self, docs):
+        self.points = {doc.metadata["_id"]: doc for doc in docs}
+        self.calls = 0
+
+    def get_by_ids(self, ids):
+        self.calls += 1
+        # Qdrant returns points in its own order and copies of the payload
+        return [
+            Document(page_content=self.points[i].page_content, metadata=dict(self.points[i].metadata))
+            for i in sorted(ids)
+            if i in self.points
+        ]
+
+
+def _docs():
+    return [
+        Document(page_content="second chunk", metadata={"_id": "b", "pdf_id": "p1", "page": 4}),
+        Document(page_content="first chunk", metadata={"_id": "a", "pdf_id": "p2", "page": 0, "relevance_score": 0.42}),
+    ]
+
+
+def test_key_covers_question_filter_settings_and_catalog_version():
+    base = make_retrieval_key("q", "f", {"k": 5}, "v1")
+
+    assert base == make_retrieval_key(" q ", "f", {"k": 5}, "v1")
+    assert base != make_retrieval_key("q2", "f", {"k": 5}, "v1")
+    assert base != make_retrieval_key("q", "f2", {"k": 5}, "v1")
+    assert base != make_retrieval_key("q", "f", {"k": 6}, "v1")
+    assert base != make_retrieval_key("q", "f", {"k": 5}, "v2")
+
+
+def test_hit_rehydrates_documents_in_ranked_order():
+    docs = _docs()
+    store = FakeVectorStore(docs)
+    cache = RetrievalCache()
+
+    assert cache.get("key", lambda: store) is None
+    assert store.calls == 0
+    assert cache.put("key", docs)
+    hit = cache.get("key", lambda: store)
+
+    assert [d.page_content for d in hit] == ["second chunk", "first chunk"]
+    assert hit[0] is not docs[0]
+    assert hit[1].metadata["relevance_score"] == 0.42
+    assert cache._refs.get("key") == (("b", "p1", 4, None), ("a", "p2", 0, 0.42))
+    assert cache.stats()["hits"] >= 1
+
+
+def test_missing_points_turn_a_hit_into_a_miss():
+    docs = _docs()
+    store = FakeVectorStore(docs[:1])
+    cache = RetrievalCache()
+    cache.put("key", docs)
+
+    assert cache.get("key", lambda: store) is None
+    assert len(cache) == 0
+    assert cache.stats()["stale"] == 1
+
+
+def test_documents_without_point_ids_are_not_cached():
+    cache = RetrievalCache()
+
+    assert not cache.put("key", [Document(page_content="x", metadata={"pdf_id": "p1"})])
+    assert len(cache) == 0
+
+
+def test_lru_eviction_bounds_entries():
+    cache = RetrievalCache(maxsize=2)
+    for key in ("k1", "k2", "k3"):
+        cache.put(key, _docs())
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
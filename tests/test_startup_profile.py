@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.startup_profile import ImportProfiler
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_import_profiler_records_cumulative_and_self_time(tmp_path, monkeypatch):
+    (tmp_path / "profiled_child.py").write_text("import time\ntime.sleep(0.05)\n")
+    (tmp_path / "profiled_parent.py").write_text("import profiled_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler()
+    profiler.install()
+    try:
+        import profiled_parent  # noqa: F401
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("profiled_parent", None)
+        sys.modules.pop("profiled_child", None)
+
+    parent = profiler.records["profiled_parent"]
+    child = profiler.records["profiled_child"]
+    assert child.cumulative_s >= 0.05
+    assert parent.cumulative_s >= child.cumulative_s
+    assert parent.self_s < child.cumulative_s
+    assert profiler.top(1)[0].module == "profiled_parent"
+
+
+def test_catalog_and_model_modules_defer_heavy_imports():
+    code = (
+        "import sys, utils.catalog_snapshot, utils.filter, utils.chat_model_factory; "
+        "print(sorted(m for m in ('qdrant_client', 'langchain_openai', 'langchain_ollama') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -1,14 +1,16 @@
 import os  # needed for local testing
 import uuid
+import logging
+import threading
+from utils import startup_profile
+
+startup_profile.enable_from_env()  # ASK_PROFILE_STARTUP=1 reports import times and time to first render
+
 import pandas as pd
 import streamlit as st
 
 st.set_page_config(page_title="ASK Auxiliary Source of Knowledge", initial_sidebar_state="collapsed")
 
-from streamlit_feedback import streamlit_feedback
-from langsmith import Client
-from streamlit_extras.stylable_container import stylable_container
-
 
 # Config LangSmith observability
 os.environ["LANGCHAIN_API_KEY_ASK"] = st.secrets["LANGCHAIN_API_KEY"] # check which account you are using
@@ -18,24 +20,77 @@ os.environ["LANGCHAIN_PROJECT"] = st.secrets["LANGCHAIN_PROJECT"] # use this for
 
 from utils.backends_bridge import (
     fetch_table_and_date_from_catalog,
+    get_catalog_connector,
+    get_vectordb_connector,
 )
-from utils import rag
+from utils.answer_cache import AnswerCache, make_answer_key
+from utils.health import HealthMonitor, default_checks
+from utils.metrics import DEFAULT_LOG_INTERVAL_S, log_metrics_periodically, metrics
 from uscgaux import stui, stu
 from utils.filter_spec import validate_local_spec_against_upstream
 import sidebar   
 
 stui.apply_ui_styles()
+startup_profile.mark("imports_done")
+
+
+def load_rag():
+    """Import the RAG pipeline on first use.
+
+    ``utils.rag`` pulls in LangChain, the Qdrant client and the chat model
+    providers, which dominate import time. Deferring it lets the page render
+    first; ``start_rag_warmup`` then imports it in the background.
+    """
+    from utils import rag
+
+    return rag
+
+
+@st.cache_resource(show_spinner=False)
+def start_rag_warmup() -> threading.Thread:
+    """Import the RAG pipeline in a background thread, once per process."""
+    thread = threading.Thread(target=load_rag, name="rag-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource(show_spinner=False)
+def get_health_monitor() -> HealthMonitor:
+    """Return the process-wide health monitor, with its first checks started.
+
+    Connectors and settings are resolved here, in the script thread, so the
+    background checks never touch Streamlit caches.
+    """
+    rag_settings = stu.cached_load_config_by_context()["RAG"]
+    checks = default_checks(
+        get_vectordb_connector(), get_catalog_connector(), rag_settings.get("EMBEDDING_CACHE") or {}
+    )
+    return HealthMonitor(checks, ttl_s=float(rag_settings.get("HEALTH", {}).get("ttl_s", 60))).start()
+
 
-from langsmith import traceable
+@st.cache_resource(show_spinner=False)
+def start_metrics_log():
+    """Log per-stage latency percentiles periodically, once per process.
+
+    ``RAG.METRICS.log_interval_s`` sets the interval; ``0`` disables it.
+    """
+    settings = stu.cached_load_config_by_context()["RAG"].get("METRICS", {})
+    interval_s = float(settings.get("log_interval_s", DEFAULT_LOG_INTERVAL_S))
+    return log_metrics_periodically(interval_s) if interval_s > 0 else None
 
 
+start_metrics_log()
 
 
-# Check Open AI service status
-api_status_message = stu.get_openai_api_status()
-api_operational = "operational" in api_status_message
+# Check Open AI service status (last known result; refreshed in the background)
+health = get_health_monitor()
+openai_status = health.status("openai")
+api_status_message = openai_status.message
+api_operational = openai_status.ok is not False  # unknown until the first check finishes
 if not api_operational:
     st.error(f"ASK is currently down due to OpenAI issue: '{api_status_message}.'")
+if health.status("qdrant").ok is False:
+    st.warning("ASK cannot reach its document search service right now. Answers may fail until it recovers.")
 
 # Ensure variables exist even if backend initialization fails
 df: pd.DataFrame = pd.DataFrame()
@@ -46,7 +101,6 @@ try:
     df, last_update_date = fetch_table_and_date_from_catalog()
     backend_ready = True
 except Exception as exc:
-    import logging
     logging.getLogger(__name__).exception("Backend init/fetch failed")
     st.error("ASK is currently unavailable due to a dependency issue. Please try again later.")
     # Fallback to empty catalog so downstream code can render
@@ -69,7 +123,16 @@ example_questions.write("""
 st.write("  ")
 
 
-ls_client = Client(api_key=st.secrets["LANGCHAIN_API_KEY"])
+startup_profile.mark("first_render")
+start_rag_warmup()
+
+
+@st.cache_resource(show_spinner=False)
+def get_feedback_client():
+    """Return the LangSmith client, created when the first feedback is sent."""
+    from langsmith import Client
+
+    return Client(api_key=st.secrets["LANGCHAIN_API_KEY"])
 
 
 def langsmith_feedback(feedback_data):
@@ -78,7 +141,7 @@ def langsmith_feedback(feedback_data):
     run_id = st.session_state.get("run_id")  
     if run_id:
         print(f"Sending feedback for run_id: {run_id}")
-        ls_client.create_feedback(
+        get_feedback_client().create_feedback(
             run_id=run_id,
             key="user_feedback",
             score=score,
@@ -88,14 +151,80 @@ def langsmith_feedback(feedback_data):
         st.warning("Run ID not found. Feedback not sent.")
 
 
-@st.cache_data(show_spinner=False)
-def cached_rag(question, filter_selections, run_id):
-    """Wrapper to run the RAG pipeline with caching & feedback support."""
-    return rag.rag(
+@st.cache_resource(show_spinner=False)
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache shared by all sessions."""
+    settings = stu.cached_load_config_by_context()["RAG"].get("ANSWER_CACHE", {})
+    return AnswerCache(
+        maxsize=int(settings.get("maxsize", 256)),
+        ttl_seconds=float(settings.get("ttl_seconds", 6 * 3600)),
+    )
+
+
+def stream_rag(question, filter_selections, run_id, placeholder):
+    """Run the streaming RAG pipeline, rendering the answer as tokens arrive.
+
+    ``placeholder`` shows the "Checking documents..." status during retrieval,
+    then a provisional line naming the retrieved sources as soon as the
+    "sources" event arrives, and is then overwritten with the partial answer
+    (still followed by that line) after every token, so time-to-first-token
+    rather than total latency is what the user waits for. Returns the final
+    response dict from the pipeline.
+    """
+    placeholder.status(label="Checking documents...", expanded=False)
+    response: dict = {}
+    answer = ""
+    sources_line = ""
+    for event in load_rag().rag_stream(
         user_question=question,
         filter_conditions=filter_selections,
-        langsmith_extra={"run_id": run_id}
+        langsmith_extra={"run_id": run_id},
+    ):
+        if event["type"] == "sources":
+            titles = list(dict.fromkeys(title for title in event["sources"] if title))
+            sources_line = f"\n\n*Sources: {'; '.join(titles)}*" if titles else ""
+            placeholder.info(f"**Question:** *{question}*\n\n ##### Response:\n▌{sources_line}")
+        elif event["type"] == "token":
+            answer += event["content"]
+            placeholder.info(f"**Question:** *{question}*\n\n ##### Response:\n{answer}▌{sources_line}")
+        elif event["type"] == "done":
+            response = event["response"]
+    return response
+
+
+def cached_rag(question, filter_selections, catalog_version, placeholder):
+    """Wrapper to run the RAG pipeline with caching & feedback support.
+
+    The cache key is content-based (question, filters, model/prompt config,
+    catalog version and enrichment CSV contents). A fresh run_id is minted
+    only when the pipeline actually runs; cache hits reuse the run_id stored
+    with the answer so feedback reaches the LangSmith run that produced it.
+    Misses are streamed into ``placeholder``. Sessions get their own shallow
+    copy of the cached response dict. Hits and misses are counted as
+    ``answer_cache.hit``/``answer_cache.miss`` in ``utils.metrics``, so the
+    periodic metrics log reports the hit rate.
+    """
+    cache = get_answer_cache()
+    rag = load_rag()
+    key = make_answer_key(
+        question,
+        filter_selections,
+        rag.pipeline_fingerprint(stu.cached_load_config_by_context()),
+        catalog_version,
+        rag.enrichment_version(),
     )
+    response = cache.get(key)
+    metrics.increment("answer_cache.miss" if response is None else "answer_cache.hit")
+    if response is None:
+        run_id = str(uuid.uuid4())
+        response = stream_rag(question, filter_selections, run_id, placeholder)
+        response["run_id"] = run_id
+        # Don't pin error answers in the cache
+        if not str(response.get("answer", "")).startswith("⚠️"):
+            cache.put(key, dict(response))
+    else:
+        response = dict(response)
+    return response
 
 
 def initialize_session_states():
@@ -128,23 +257,23 @@ user_question = st.text_input("Type your question or task here", max_chars=200)
 if user_question and (user_question != st.session_state["user_question"]):
     st.session_state["user_question"] = user_question
     st.session_state.pop("response", None)
-    st.session_state["run_id"] = str(uuid.uuid4())
+    st.session_state["run_id"] = None
     print(">>> 🧑‍💼 New user question submited  <<<")
 
 status_placeholder = st.empty()
     # Generate the response only if the question is new
 if st.session_state.get("user_question") and "response" not in st.session_state:
-    # Generate a response
-    with status_placeholder.status(label="Checking documents...", expanded=False) as response_container:
-        st.session_state["response"] = cached_rag(
-            st.session_state["user_question"], st.session_state.filter_conditions, st.session_state["run_id"]
-        )
+    # Generate a response (streamed into the placeholder on a cache miss)
+    st.session_state["response"] = cached_rag(
+        st.session_state["user_question"], st.session_state.filter_conditions, last_update_date, status_placeholder
+    )
+    st.session_state["run_id"] = st.session_state["response"]["run_id"]
 
 # Format Response
 if st.session_state.get("response"):
     status_placeholder.empty()
     response = st.session_state["response"]
-    short_source_list, long_source_list = rag.create_source_lists(response, df)
+    short_source_list, long_source_list = load_rag().create_source_lists(response, df, last_update_date)
     example_questions.empty()  
     # Show active filter summary chip above results
     fc = st.session_state.get("filter_conditions", {}) or {}
@@ -169,6 +298,8 @@ if st.session_state.get("response"):
 
 
     # Show user feedback widget once a response is returned
+    from streamlit_feedback import streamlit_feedback
+
     user_feedback = streamlit_feedback(
         feedback_type="thumbs",
         optional_text_label="(Optional) Please explain your rating, so we can improve ASK",
@@ -181,6 +312,8 @@ if st.session_state.get("response"):
         langsmith_feedback(user_feedback)
 
 # Lock the chat input container 50 pixels above bottom of viewport
+from streamlit_extras.stylable_container import stylable_container
+
 with stylable_container(
     key="bottom_content",
     css_styles="""
@@ -204,3 +337,5 @@ with stylable_container(
     )
 
 st.markdown(stui.FOOTER, unsafe_allow_html=True)
+startup_profile.mark("script_done")
+startup_profile.report()
@@ -0,0 +1,123 @@
+"""In-process answer cache shared across Streamlit sessions.
+
+Answers are keyed on content, not on the LangSmith ``run_id``: the
+normalized question, a canonical hash of the filter conditions, a
+fingerprint of the model/prompt config and the catalog version. Each cached
+entry keeps the ``run_id`` of the run that produced it, so tracing and user
+feedback on a cache hit still point at a real LangSmith run.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from .fingerprint import filter_fingerprint, fingerprint, normalize_question
+
+
+def make_answer_key(
+    question: str,
+    filter_conditions: Optional[Mapping[str, Any]],
+    config_fingerprint: str,
+    catalog_version: str,
+    enrichment_version: Any = "",
+) -> str:
+    """Return the cache key for one answer.
+
+    Parameters
+    ----------
+    question : str
+        Raw user question; normalized with ``normalize_question``.
+    filter_conditions : Mapping, optional
+        Sidebar filter selections; hashed with ``filter_fingerprint``.
+    config_fingerprint : str
+        Fingerprint of the model, retrieval and prompt settings
+        (see ``utils.rag.pipeline_fingerprint``).
+    catalog_version : str
+        Catalog modified time from ``fetch_table_and_date_from_catalog``.
+    enrichment_version : optional
+        Content hashes of the enrichment CSVs
+        (see ``utils.rag.enrichment_version``).
+    """
+    return fingerprint(
+        normalize_question(question),
+        filter_fingerprint(filter_conditions),
+        config_fingerprint,
+        str(catalog_version),
+        enrichment_version,
+    )
+
+
+class AnswerCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries; the least recently used entry is evicted.
+    ttl_seconds : float, optional
+        Entries older than this are treated as misses. ``None`` disables expiry.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: Optional[float] = 6 * 3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        """Remove ``key`` if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -8,6 +8,7 @@ import streamlit as st
 from uscgaux import stu
 from uscgaux.config.loader import load_config_by_context
 from uscgaux.backends import BackendContainer
+from .catalog_snapshot import DEFAULT_REFRESH_INTERVAL_S, CatalogSnapshotLoader
 from .protocols import CatalogConnectorProtocol, VectorDBConnectorProtocol
 from typing import Any
 
@@ -48,18 +49,8 @@ def get_backend_container() -> BackendContainer:
 
 
 
-@st.cache_data(show_spinner=False)
-def fetch_table_and_date_from_catalog() -> tuple[pd.DataFrame, str]:
-    """Return the catalog DataFrame and its last modified timestamp using a connector.
-
-    Parameters
-    ----------
-    None
-
-    Returns
-    -------
-    tuple[pd.DataFrame, str]
-        Filtered DataFrame (status="live") and ISO 8601 or epoch modified time string.
+def _fetch_remote_catalog() -> tuple[pd.DataFrame, str]:
+    """Fetch and normalize the catalog through the catalog connector.
 
     Raises
     ------
@@ -84,6 +75,54 @@ def fetch_table_and_date_from_catalog() -> tuple[pd.DataFrame, str]:
     return st_df, str(modified_time) if modified_time is not None else "--"
 
 
+def fetch_catalog_modified_time() -> str | None:
+    """Return the remote catalog's modified time without fetching the table."""
+    modified_time = get_catalog_connector().get_catalog_modified_time()
+    return str(modified_time) if modified_time is not None else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_catalog_snapshot_loader() -> CatalogSnapshotLoader:
+    """Return the process-wide catalog loader and background refresher.
+
+    The polling interval comes from the optional ``RAG.CATALOG_REFRESH``
+    config section (``interval_s``, default 300; ``0`` checks once at
+    startup only).
+    """
+    settings = load_config_by_context().get("RAG", {}).get("CATALOG_REFRESH", {})
+    return CatalogSnapshotLoader(
+        _fetch_remote_catalog,
+        fetch_catalog_modified_time,
+        refresh_interval_s=float(settings.get("interval_s", DEFAULT_REFRESH_INTERVAL_S)),
+    )
+
+
+def fetch_table_and_date_from_catalog() -> tuple[pd.DataFrame, str]:
+    """Return the catalog DataFrame and its last modified timestamp.
+
+    Returns the snapshot currently published by the background refresher
+    (see ``utils.catalog_snapshot``), so requests never wait on a catalog
+    reload. Only a process without a local snapshot fetches the catalog on
+    its first call. The DataFrame is shared and must not be modified.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    tuple[pd.DataFrame, str]
+        Filtered DataFrame (status="live") and ISO 8601 or epoch modified time string.
+
+    Raises
+    ------
+    RuntimeError
+        If there is no snapshot and the catalog cannot be accessed, is empty,
+        or cannot be converted.
+    """
+    return get_catalog_snapshot_loader().load()
+
+
 @st.cache_resource(show_spinner=False)
 def get_catalog_connector() -> CatalogConnectorProtocol:
     """Return the active catalog connector using the container boundary."""
@@ -0,0 +1,253 @@
+"""Local Parquet snapshot of the normalized catalog and its background refresher.
+
+Fetching the catalog goes through the Google Sheets-backed catalog connector
+and ``stu.normalize_core_catalog_df_to_streamlit``, which puts a network round
+trip in front of the first page render of every new process. The normalized
+catalog is therefore persisted under ``.cache/`` as a Parquet file tagged with
+the catalog's modified time. A cold start reads the snapshot from disk
+(memory-mapped).
+
+A background thread then polls the remote modified time. When it changes,
+the thread fetches the catalog, builds the derived filter index and metadata
+lookup, writes the snapshot to disk and publishes everything as one
+``CatalogSnapshot`` with a single reference assignment. Requests keep reading
+the previous snapshot until then and never wait on a reload.
+
+Requires ``pyarrow``. Without it, the loader falls back to fetching the
+remote catalog on every cold start.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .filter import CatalogFilterIndex, build_catalog_metadata, publish_catalog_indexes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is listed in requirements.txt
+    pa = None
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "1"
+DEFAULT_REFRESH_INTERVAL_S = 300.0
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_SNAPSHOT_PATH = os.path.join(BASE_DIR, ".cache", "catalog", "catalog.parquet")
+
+# Parquet schema metadata keys
+_FORMAT_KEY = b"ask.snapshot_format"
+_MODIFIED_TIME_KEY = b"ask.catalog_modified_time"
+
+
+def write_catalog_snapshot(catalog_df: pd.DataFrame, modified_time: str, path: str = DEFAULT_SNAPSHOT_PATH) -> bool:
+    """Persist ``catalog_df`` and its modified time to ``path``.
+
+    The file is written to a temporary name and moved into place, so readers
+    never see a partial snapshot.
+
+    Returns
+    -------
+    bool
+        ``True`` when the snapshot was written.
+    """
+    if pa is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(catalog_df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_FORMAT_KEY] = SNAPSHOT_FORMAT.encode()
+        metadata[_MODIFIED_TIME_KEY] = str(modified_time).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)  # atomic on POSIX and Windows
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception as exc:
+        logger.warning("Could not persist catalog snapshot: %s", exc)
+        return False
+    logger.info("Wrote catalog snapshot (%d rows, modified %s) to %s", len(catalog_df), modified_time, path)
+    return True
+
+
+def read_catalog_snapshot(
+    path: str = DEFAULT_SNAPSHOT_PATH, memory_map: bool = True
+) -> Optional[Tuple[pd.DataFrame, str]]:
+    """Return ``(catalog_df, modified_time)`` from the snapshot at ``path``.
+
+    Returns ``None`` when there is no usable snapshot.
+    """
+    if pq is None or not os.path.exists(path):
+        return None
+    try:
+        table = pq.read_table(path, memory_map=memory_map)
+        metadata = table.schema.metadata or {}
+        if metadata.get(_FORMAT_KEY, b"").decode() != SNAPSHOT_FORMAT or _MODIFIED_TIME_KEY not in metadata:
+            return None
+        return table.to_pandas(), metadata[_MODIFIED_TIME_KEY].decode()
+    except Exception as exc:
+        logger.warning("Ignoring unreadable catalog snapshot %s: %s", path, exc)
+        return None
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One catalog version together with the structures derived from it."""
+
+    catalog_df: pd.DataFrame
+    modified_time: str
+    filter_index: CatalogFilterIndex
+    metadata: Dict[str, dict]
+
+    @classmethod
+    def build(cls, catalog_df: pd.DataFrame, modified_time: str) -> "CatalogSnapshot":
+        return cls(catalog_df, modified_time, CatalogFilterIndex(catalog_df), build_catalog_metadata(catalog_df))
+
+
+class CatalogSnapshotLoader:
+    """Serve the current catalog snapshot and refresh it in the background.
+
+    The first ``load()`` reads the local snapshot (or, when there is none,
+    fetches the remote catalog) and starts the refresher thread. The thread
+    checks the remote modified time right away and then every
+    ``refresh_interval_s`` seconds.
+
+    Parameters
+    ----------
+    fetch_catalog : callable
+        Returns ``(catalog_df, modified_time)`` from the remote catalog.
+    fetch_modified_time : callable
+        Returns the remote catalog's modified time as a string, or ``None``
+        when it is unknown.
+    path : str, optional
+        Snapshot location.
+    memory_map : bool, default=True
+        Memory-map the Parquet file when reading it.
+    on_update : callable, optional
+        Called with the new ``CatalogSnapshot`` after it was published.
+    refresh_interval_s : float, default=300
+        Seconds between remote checks. ``0`` checks once at startup only.
+    """
+
+    def __init__(
+        self,
+        fetch_catalog: Callable[[], Tuple[pd.DataFrame, str]],
+        fetch_modified_time: Callable[[], Optional[str]],
+        path: str = DEFAULT_SNAPSHOT_PATH,
+        memory_map: bool = True,
+        on_update: Optional[Callable[[CatalogSnapshot], None]] = None,
+        refresh_interval_s: float = DEFAULT_REFRESH_INTERVAL_S,
+    ):
+        self.fetch_catalog = fetch_catalog
+        self.fetch_modified_time = fetch_modified_time
+        self.path = path
+        self.memory_map = memory_map
+        self.on_update = on_update
+        self.refresh_interval_s = refresh_interval_s
+        self._current: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._first_check_done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def current(self) -> CatalogSnapshot:
+        """Return the published snapshot, loading it on first use."""
+        current = self._current
+        if current is not None:
+            return current
+        with self._lock:
+            if self._current is None:
+                snapshot = read_catalog_snapshot(self.path, self.memory_map)
+                if snapshot is not None:
+                    logger.info("Loaded catalog snapshot (modified %s) from %s", snapshot[1], self.path)
+                    self._publish(CatalogSnapshot.build(*snapshot))
+                else:
+                    self._publish(self._fetch_and_build())
+                self.start()
+            return self._current  # type: ignore[return-value]
+
+    def load(self) -> Tuple[pd.DataFrame, str]:
+        """Return ``(catalog_df, modified_time)`` for the current snapshot.
+
+        The DataFrame is shared by all callers and must not be modified.
+        """
+        snapshot = self.current()
+        return snapshot.catalog_df, snapshot.modified_time
+
+    def check_remote(self) -> bool:
+        """Fetch the remote catalog if its modified time differs from ours.
+
+        Returns ``True`` when a newer catalog was published.
+        """
+        with self._refresh_lock:
+            remote_time = self.fetch_modified_time()
+            current = self._current
+            if not remote_time or remote_time == "--" or (current is not None and current.modified_time == remote_time):
+                return False
+            logger.info(
+                "Catalog changed remotely (%s -> %s); refreshing snapshot",
+                current.modified_time if current else None,
+                remote_time,
+            )
+            snapshot = self._fetch_and_build()
+            self._publish(snapshot)
+        if self.on_update is not None:
+            self.on_update(snapshot)
+        return True
+
+    def start(self) -> None:
+        """Start the refresher thread if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the refresher thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the refresher's first remote check has finished."""
+        return self._first_check_done.wait(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check_remote()
+            except Exception as exc:
+                logger.warning("Background catalog check failed; serving current snapshot: %s", exc)
+            finally:
+                self._first_check_done.set()
+            if self.refresh_interval_s <= 0:
+                return
+            self._stop.wait(self.refresh_interval_s)
+
+    def _fetch_and_build(self) -> CatalogSnapshot:
+        catalog_df, modified_time = self.fetch_catalog()
+        write_catalog_snapshot(catalog_df, modified_time, self.path)
+        return CatalogSnapshot.build(catalog_df, modified_time)
+
+    def _publish(self, snapshot: CatalogSnapshot) -> None:
+        publish_catalog_indexes(snapshot.catalog_df, snapshot.modified_time, snapshot.filter_index, snapshot.metadata)
+        self._current = snapshot  # single reference swap; readers see old or new
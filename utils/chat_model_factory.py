@@ -1,9 +1,14 @@
-"""Factory function to create chat models based on TOML configuration."""
+"""Factory function to create chat models based on TOML configuration.
+
+Provider packages (``langchain_openai``, ``langchain_ollama``) are imported
+inside ``create_chat_model`` so only the configured provider is loaded, and
+only when the first model is built.
+"""
 import os 
 from typing import Mapping, Any
 import logging
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama  # to test other LLMs
+from .fingerprint import fingerprint
+from .resource_pool import registry
 
 
 
@@ -35,7 +40,8 @@ def create_chat_model(config: Mapping[str, Any]):
     temperature = rag_config["temperature"]
     
     if chat_model_type == "ChatOpenAI":
-        
+        from langchain_openai import ChatOpenAI
+
         # Config langchain_openai for langchain_openai.OpenAIEmbeddings
         os.environ["OPENAI_API_KEY"] = config["OPENAI_API_KEY_ASK"] # for openai client in cloud environment
 
@@ -53,6 +59,8 @@ def create_chat_model(config: Mapping[str, Any]):
         return ChatOpenAI(**kwargs)
         
     elif chat_model_type == "ChatOllama":
+        from langchain_ollama import ChatOllama  # to test other LLMs
+
         kwargs = {
             "model": model_name,
             "temperature": temperature
@@ -66,3 +74,21 @@ def create_chat_model(config: Mapping[str, Any]):
     else:
         raise ValueError(f"Unsupported chat model type: {chat_model_type}")
 
+
+
+
+def get_chat_model(config: Mapping[str, Any]):
+    """Return a pooled chat model for the current configuration.
+
+    The model (and its HTTP client) is built by ``create_chat_model`` once per
+    fingerprint of the ``RAG_ALL`` section and API key, then shared across
+    requests and sessions. A config change builds a replacement.
+
+    Args:
+        config: Configuration mapping, as for ``create_chat_model``.
+
+    Returns:
+        Configured chat model instance (ChatOpenAI or ChatOllama)
+    """
+    key = fingerprint(config["RAG_ALL"], config.get("OPENAI_API_KEY_ASK"))
+    return registry.get("chat_model", key, lambda: create_chat_model(config))
@@ -0,0 +1,221 @@
+"""Token-budgeted packing of retrieved chunks into the prompt context.
+
+``format_docs`` joins every retrieved chunk, so prompt size (and with it LLM
+latency and cost) follows whatever the retriever returns. ``pack_context``
+instead counts tokens with the generation model's tokenizer and fills a
+token budget in relevance (retriever) order: chunks that fit are kept whole,
+the chunk that crosses the budget is trimmed at a token boundary when enough
+room is left for it to be useful, and the rest are dropped.
+
+The budget comes from ``RAG.CONTEXT.max_tokens``; without it nothing is
+dropped, but the context is still counted. When tiktoken has no encoding for
+the model, or cannot load one (its BPE files are downloaded on first use),
+tokens are approximated at four characters each until loading is retried
+``TOKENIZER_RETRY_S`` seconds later.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Protocol, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_CHUNK_TOKENS = 64
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o, gpt-4o-mini and o1
+CHARS_PER_TOKEN = 4
+SEPARATOR = "\n\n"  # must match format_docs
+TOKENIZER_RETRY_S = 300.0
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def encode(self, text: str) -> List[Any]: ...
+
+    def decode(self, tokens: List[Any]) -> str: ...
+
+
+class ApproxTokenizer:
+    """Fallback tokenizer treating every ``CHARS_PER_TOKEN`` characters as a token."""
+
+    name = "approx"
+
+    def encode(self, text: str) -> List[str]:
+        return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+class _TiktokenTokenizer:
+    def __init__(self, encoding: Any):
+        self._encoding = encoding
+        self.name = encoding.name
+
+    def encode(self, text: str) -> List[int]:
+        return self._encoding.encode(text, disallowed_special=())
+
+    def decode(self, tokens: List[int]) -> str:
+        return self._encoding.decode(tokens)
+
+
+_tokenizers: Dict[Optional[str], Tokenizer] = {}
+_load_failed_at: Dict[Optional[str], float] = {}
+
+
+def _load_tiktoken(model: Optional[str]) -> Tokenizer:
+    import tiktoken
+
+    try:
+        encoding = tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+    return _TiktokenTokenizer(encoding)
+
+
+def get_tokenizer(model: Optional[str]) -> Tokenizer:
+    """Return the tokenizer for ``model``, loaded once per model name.
+
+    Unknown models (e.g. local Ollama models) use ``DEFAULT_ENCODING``; when
+    tiktoken or its encoding files are unavailable, ``ApproxTokenizer``.
+    Only loaded encodings are kept: after a failure the approximation is
+    used for ``TOKENIZER_RETRY_S`` seconds, then loading is tried again.
+    """
+    tokenizer = _tokenizers.get(model)
+    if tokenizer is not None:
+        return tokenizer
+    failed_at = _load_failed_at.get(model)
+    if failed_at is not None and time.monotonic() - failed_at < TOKENIZER_RETRY_S:
+        return ApproxTokenizer()
+    try:
+        tokenizer = _load_tiktoken(model)
+    except Exception as e:
+        logger.warning(
+            "No tiktoken encoding for %r, approximating token counts for %.0f s: %s", model, TOKENIZER_RETRY_S, e
+        )
+        _load_failed_at[model] = time.monotonic()
+        return ApproxTokenizer()
+    _tokenizers[model] = tokenizer
+    _load_failed_at.pop(model, None)
+    return tokenizer
+
+
+@dataclass
+class PackedContext:
+    """Result of ``pack_context``.
+
+    ``docs`` are the chunks that went into the prompt, in order; a trimmed
+    chunk is a copy with shortened ``page_content``. ``tokens`` counts the
+    joined context including separators.
+    """
+
+    docs: List[Any]
+    tokens: int
+    budget: Optional[int]
+    candidates: int
+    truncated: int = 0
+    dropped: int = 0
+    dropped_tokens: int = 0
+    tokenizer: str = ""
+
+    def stats(self) -> dict:
+        """Return the counters recorded on the response (everything but ``docs``)."""
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "candidates": self.candidates,
+            "packed": len(self.docs),
+            "truncated": self.truncated,
+            "dropped": self.dropped,
+            "dropped_tokens": self.dropped_tokens,
+            "tokenizer": self.tokenizer,
+        }
+
+
+def _with_content(doc: Any, page_content: str) -> Any:
+    """Copy ``doc`` with new ``page_content``, leaving the retrieved document intact."""
+    if hasattr(doc, "model_copy"):
+        return doc.model_copy(update={"page_content": page_content})
+    return type(doc)(page_content=page_content, metadata=dict(doc.metadata))
+
+
+def pack_context(
+    docs: Sequence[Any],
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+    min_chunk_tokens: int = DEFAULT_MIN_CHUNK_TOKENS,
+    tokenizer: Optional[Tokenizer] = None,
+) -> PackedContext:
+    """Select and trim ``docs`` so the joined context fits ``max_tokens``.
+
+    Parameters
+    ----------
+    docs : sequence of Document
+        Retrieved chunks, most relevant first.
+    max_tokens : int, optional
+        Token budget for the joined context. ``None`` keeps every chunk.
+    model : str, optional
+        Generation model name used to pick the tokenizer.
+    min_chunk_tokens : int, default=64
+        Smallest remainder worth trimming a chunk into. With less room left a
+        chunk that does not fit is dropped and later, shorter chunks are tried.
+        The first chunk is always trimmed rather than dropped.
+    tokenizer : Tokenizer, optional
+        Overrides the tokenizer looked up for ``model``.
+
+    Returns
+    -------
+    PackedContext
+        The packed chunks and token counts.
+    """
+    tokenizer = tokenizer or get_tokenizer(model)
+    separator_tokens = len(tokenizer.encode(SEPARATOR))
+    packed: List[Any] = []
+    used = truncated = dropped = dropped_tokens = 0
+
+    for doc in docs:
+        content = doc.page_content or ""
+        if not content.strip():
+            dropped += 1
+            continue
+        tokens = tokenizer.encode(content)
+        separator = separator_tokens if packed else 0
+        if max_tokens is None or used + separator + len(tokens) <= max_tokens:
+            packed.append(doc)
+            used += separator + len(tokens)
+            continue
+
+        room = max_tokens - used - separator
+        if room > 0 and (room >= min_chunk_tokens or not packed):
+            packed.append(_with_content(doc, tokenizer.decode(tokens[:room])))
+            used += separator + room
+            truncated += 1
+            dropped_tokens += len(tokens) - room
+        else:
+            dropped += 1
+            dropped_tokens += len(tokens)
+
+    return PackedContext(
+        docs=packed,
+        tokens=used,
+        budget=max_tokens,
+        candidates=len(docs),
+        truncated=truncated,
+        dropped=dropped,
+        tokenizer=tokenizer.name,
+        dropped_tokens=dropped_tokens,
+    )
+
+
+def pack_context_for_config(docs: Sequence[Any], config: Mapping[str, Any]) -> PackedContext:
+    """``pack_context`` with the budget from ``RAG.CONTEXT`` and the model from ``RAG_ALL``."""
+    settings = config.get("RAG", {}).get("CONTEXT", {}) or {}
+    return pack_context(
+        docs,
+        max_tokens=settings.get("max_tokens"),
+        model=config.get("RAG_ALL", {}).get("generation_model"),
+        min_chunk_tokens=settings.get("min_chunk_tokens", DEFAULT_MIN_CHUNK_TOKENS),
+    )
@@ -0,0 +1,232 @@
+"""Query embedding cache for the vector store.
+
+Every ``retriever.invoke(enriched_question)`` embeds the query through the
+remote embedding API before searching Qdrant. ``CachedQueryEmbeddings``
+wraps the vector store's embeddings so repeat questions skip that round
+trip:
+
+- an in-memory LRU tier (``maxsize`` vectors per process)
+- an optional persistent SQLite tier (``path``), which survives restarts and
+  is shared by processes on the same host
+
+Keys are the embedding model identity plus the question normalized with
+``normalize_question`` (NFKC, collapsed whitespace), so questions differing
+only in spacing share a vector. Vectors are kept and returned as float32
+values, the precision Qdrant stores them at, whether or not they were
+cached. ``embed_documents`` (ingestion) is passed through uncached. Settings come from ``RAG.EMBEDDING_CACHE``
+(``enabled``, ``maxsize``, ``path``); see ``utils.rag.get_vectorstore``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .fingerprint import fingerprint, normalize_question
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 4096
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PATH = os.path.join(BASE_DIR, ".cache", "embeddings", "query_embeddings.sqlite")
+
+
+def embedding_model_id(embeddings: Any) -> str:
+    """Identify the model behind ``embeddings`` (class, model name, dimensions)."""
+    return fingerprint(
+        type(embeddings).__name__,
+        getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None),
+        getattr(embeddings, "dimensions", None) or getattr(embeddings, "size", None),
+    )
+
+
+class SQLiteEmbeddingStore:
+    """Persistent ``key -> float32 vector`` table in one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, np.asarray(vector, dtype=np.float32).tobytes(), time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """``Embeddings`` wrapper that caches ``embed_query`` results.
+
+    Parameters
+    ----------
+    inner : Embeddings
+        The embeddings used by the vector store.
+    maxsize : int, default=4096
+        Vectors kept in the in-memory LRU tier.
+    path : str, optional
+        SQLite file for the persistent tier; ``None`` keeps the cache in
+        memory only. A store that cannot be opened is logged and skipped.
+    """
+
+    def __init__(self, inner: Embeddings, maxsize: int = DEFAULT_MAXSIZE, path: Optional[str] = None):
+        self.inner = inner
+        self.maxsize = maxsize
+        self.model_id = embedding_model_id(inner)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.store: Optional[SQLiteEmbeddingStore] = None
+        if path:
+            try:
+                self.store = SQLiteEmbeddingStore(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Query embedding store %s unavailable, using memory only: %s", path, e)
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        return fingerprint(self.model_id, normalize_question(text))
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return vector.tolist()
+
+        if self.store is not None:
+            vector = self._read_store(key)
+            if vector is not None:
+                self.hits["disk"] += 1
+                self._remember(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        vector = np.asarray(self.inner.embed_query(text), dtype=np.float32)
+        self._remember(key, vector)
+        if self.store is not None:
+            self._write_store(key, vector)
+        # Same float32 values a later hit returns
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def _read_store(self, key: str) -> Optional[np.ndarray]:
+        try:
+            return self.store.get(key)
+        except sqlite3.Error as e:
+            logger.warning("Query embedding store read failed: %s", e)
+            return None
+
+    def _write_store(self, key: str, vector: np.ndarray) -> None:
+        try:
+            self.store.put(key, vector)
+        except sqlite3.Error as e:
+            logger.warning("Query embedding store write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._memory)
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "persistent": self.store.path if self.store is not None else None,
+        }
+
+
+def cached_query_embeddings(embeddings: Any, settings: Optional[Dict[str, Any]] = None) -> Any:
+    """Return ``embeddings`` wrapped in ``CachedQueryEmbeddings`` per ``settings``.
+
+    ``settings`` is the ``RAG.EMBEDDING_CACHE`` section; ``path: true``
+    selects ``DEFAULT_PATH`` for the persistent tier. ``embeddings`` is
+    returned unchanged when it is ``None``, already cached, or the cache is
+    disabled.
+    """
+    settings = settings or {}
+    if not settings.get("enabled", True) or embeddings is None or isinstance(embeddings, CachedQueryEmbeddings):
+        return embeddings
+    path = settings.get("path")
+    return CachedQueryEmbeddings(
+        embeddings,
+        maxsize=int(settings.get("maxsize", DEFAULT_MAXSIZE)),
+        path=DEFAULT_PATH if path is True else path,
+    )
+
+
+def with_query_embedding_cache(vectorstore: Any, settings: Optional[Dict[str, Any]] = None) -> Any:
+    """Return a ``QdrantVectorStore`` like ``vectorstore`` but with cached query embeddings.
+
+    The new store is built through the public constructor and shares
+    ``vectorstore``'s client, collection and payload keys; ``vectorstore``
+    itself is not modified. Other vector stores, and settings that leave the
+    embeddings unchanged (see ``cached_query_embeddings``), return
+    ``vectorstore`` as is.
+    """
+    from langchain_qdrant import QdrantVectorStore, RetrievalMode
+
+    if not isinstance(vectorstore, QdrantVectorStore):
+        return vectorstore
+    embeddings = cached_query_embeddings(vectorstore.embeddings, settings)
+    if embeddings is vectorstore.embeddings:
+        return vectorstore
+    return QdrantVectorStore(
+        client=vectorstore.client,
+        collection_name=vectorstore.collection_name,
+        embedding=embeddings,
+        retrieval_mode=vectorstore.retrieval_mode,
+        vector_name=vectorstore.vector_name,
+        content_payload_key=vectorstore.content_payload_key,
+        metadata_payload_key=vectorstore.metadata_payload_key,
+        distance=vectorstore.distance,
+        sparse_embedding=(
+            None if vectorstore.retrieval_mode == RetrievalMode.DENSE else vectorstore.sparse_embeddings
+        ),
+        sparse_vector_name=vectorstore.sparse_vector_name,
+        # Already validated when the connector built ``vectorstore``
+        validate_embeddings=False,
+        validate_collection_config=False,
+    )
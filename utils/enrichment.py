@@ -0,0 +1,440 @@
+"""Precompiled matchers used to enrich user questions.
+
+``enrich_question`` expands acronyms from ``config/acronyms.csv`` and adds
+implications for terms from ``config/terms.csv`` on every request. Rather
+than scanning the question once per CSV row, both tables are compiled once
+per CSV version: acronyms into a trie-shaped regular expression that expands
+every acronym in one left-to-right pass, and terms into an Aho-Corasick
+automaton that finds every term occurrence in one scan. Matching cost then
+depends on the length of the question, not on the size of the tables.
+
+The compiled matchers are persisted as a JSON artifact under ``.cache/`` and
+tagged with the mtime, size and SHA-256 of both CSVs, so a cold start loads
+them in milliseconds without pandas and an edited CSV is picked up on the
+next question without a restart.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_ARTIFACT_DIR = os.path.join(BASE_DIR, ".cache", "enrichment")
+
+
+def read_mapping_csv(file_path: str) -> Dict[str, str]:
+    """Read the first two columns of a CSV file into a dictionary.
+
+    The header row is skipped and rows with a blank key or value are ignored.
+    Later duplicates of a key win, matching ``dict(zip(...))`` semantics.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a CSV file such as ``config/acronyms.csv``.
+
+    Returns
+    -------
+    dict[str, str]
+        Mapping from the first column to the second column.
+
+    Raises
+    ------
+    ValueError
+        If the CSV has fewer than two columns.
+    """
+    with open(file_path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        if len(header) < 2:
+            raise ValueError("CSV must contain at least two columns")
+        mapping: Dict[str, str] = {}
+        for row in reader:
+            if len(row) < 2:
+                continue
+            key, value = row[0], row[1]
+            if key.strip() and value.strip():
+                mapping[key] = value
+    return mapping
+
+
+def build_trie_pattern(keys: Iterable[str]) -> str:
+    """Return a regex alternation for ``keys`` factored into a prefix trie.
+
+    A flat ``a|b|c`` alternation is tried key by key at every position in the
+    text. Factoring shared prefixes means the regex engine walks at most one
+    path per position, so cost is bounded by the longest key rather than the
+    number of keys. Optional suffixes are greedy, so the longest key wins.
+    """
+    trie: dict = {}
+    for key in keys:
+        if not key:
+            continue
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[""] = None  # terminal marker
+
+    def emit(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return emit(trie)
+
+
+class AcronymExpander:
+    """Expand acronyms to their full forms in a single pass.
+
+    Acronyms are matched on word boundaries and are case-sensitive, as with
+    the previous per-row ``re.sub`` loop. Because replacement happens in one
+    pass, an expansion is never rewritten again by another acronym.
+
+    Parameters
+    ----------
+    acronyms : dict[str, str]
+        Mapping from acronym to full form.
+    pattern : str, optional
+        Precompiled trie pattern from a stored artifact. Built from
+        ``acronyms`` when omitted.
+    """
+
+    def __init__(self, acronyms: Dict[str, str], pattern: Optional[str] = None):
+        self.acronyms: Dict[str, str] = {k: v for k, v in acronyms.items() if k}
+        body = build_trie_pattern(self.acronyms) if pattern is None else pattern
+        self.body = body
+        self.pattern = re.compile(r"\b(?:" + body + r")\b") if body else None
+
+    def __len__(self) -> int:
+        return len(self.acronyms)
+
+    def expand(self, text: str) -> str:
+        """Return ``text`` with every known acronym replaced by its full form."""
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(lambda m: self.acronyms[m.group(0)], text)
+
+
+class TermMatcher:
+    """Find defined terms in a question with an Aho-Corasick automaton.
+
+    Terms are matched as case-sensitive substrings, as with the previous
+    ``term in question`` test, including overlapping terms such as
+    ``Boat crew`` inside ``Boat crew currency``. Many terms share the same
+    implication text, so each distinct implication is returned only once.
+
+    Parameters
+    ----------
+    terms : dict[str, str]
+        Mapping from term to implication.
+    """
+
+    def __init__(self, terms: Dict[str, str]):
+        self.terms: List[str] = [t for t in terms if t]
+        self.implications: List[str] = [terms[t] for t in self.terms]
+        # goto[state] maps a character to the next state; out[state] holds
+        # the indices of terms that end at that state (including via fail links)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        for idx, term in enumerate(self.terms):
+            state = 0
+            for ch in term:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(idx)
+
+        # Breadth-first pass to compute failure links
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find(self, text: str) -> List[int]:
+        """Return the sorted indices of all terms that occur in ``text``."""
+        goto, fail, out = self.goto, self.fail, self.out
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return sorted(found)
+
+    def implications_for(self, text: str) -> List[str]:
+        """Return distinct implications for terms in ``text``, in CSV order."""
+        return list(dict.fromkeys(self.implications[i] for i in self.find(text)))
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "TermMatcher":
+        """Rebuild a matcher from ``to_state()`` output without recomputing links."""
+        matcher = cls.__new__(cls)
+        matcher.terms = state["terms"]
+        matcher.implications = state["implications"]
+        matcher.goto = state["goto"]
+        matcher.fail = state["fail"]
+        matcher.out = state["out"]
+        return matcher
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "terms": self.terms,
+            "implications": self.implications,
+            "goto": self.goto,
+            "fail": self.fail,
+            "out": self.out,
+        }
+
+
+class QuestionEnricher:
+    """Compiled acronym expander and term matcher for one CSV version."""
+
+    def __init__(self, acronyms: AcronymExpander, terms: TermMatcher):
+        self.acronyms = acronyms
+        self.terms = terms
+
+    @classmethod
+    def from_mappings(cls, acronyms: Dict[str, str], terms: Dict[str, str]) -> "QuestionEnricher":
+        return cls(AcronymExpander(acronyms), TermMatcher(terms))
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "QuestionEnricher":
+        return cls(
+            AcronymExpander(state["acronyms"], pattern=state["acronym_pattern"]),
+            TermMatcher.from_state(state["term_matcher"]),
+        )
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "acronyms": self.acronyms.acronyms,
+            "acronym_pattern": self.acronyms.body,
+            "term_matcher": self.terms.to_state(),
+        }
+
+    def enrich(self, question: str) -> str:
+        """Expand acronyms, then append each distinct term implication once."""
+        enriched = self.acronyms.expand(question)
+        for implication in self.terms.implications_for(enriched):
+            enriched += f" ({implication})"
+        return enriched
+
+
+def _file_stat(file_path: str) -> tuple[int, int]:
+    """Return ``(mtime_ns, size)`` used as a cheap change check."""
+    st = os.stat(file_path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_sha256(file_path: str) -> str:
+    with open(file_path, "rb") as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+@dataclass(frozen=True)
+class SourceVersion:
+    """Version of one source CSV: stat fields plus a content hash."""
+
+    mtime_ns: int
+    size: int
+    sha256: str
+
+    @classmethod
+    def of(cls, file_path: str) -> "SourceVersion":
+        mtime_ns, size = _file_stat(file_path)
+        return cls(mtime_ns=mtime_ns, size=size, sha256=_file_sha256(file_path))
+
+
+@dataclass(frozen=True)
+class EnrichmentArtifact:
+    """A compiled ``QuestionEnricher`` together with the CSV versions it came from."""
+
+    enricher: QuestionEnricher
+    acronyms_version: SourceVersion
+    terms_version: SourceVersion
+
+    def content_key(self) -> tuple[str, str]:
+        return self.acronyms_version.sha256, self.terms_version.sha256
+
+
+class EnrichmentStore:
+    """Serve the current ``QuestionEnricher`` and hot-reload it when the CSVs change.
+
+    Every ``get()`` compares the CSVs' mtime and size with the loaded artifact
+    (two ``os.stat`` calls). When they differ, the files are hashed; an
+    unchanged hash only refreshes the stat fields, otherwise the artifact is
+    loaded from disk or recompiled. The new artifact is published with a
+    single reference assignment, so concurrent readers always see either the
+    old or the new enricher, never a partial one. While one thread rebuilds,
+    other threads keep serving the previous version. If a CSV is missing or
+    unreadable during a reload, the previous version is served as well and
+    the reload is retried on the next call.
+
+    Parameters
+    ----------
+    acronyms_path, terms_path : str
+        Source CSVs.
+    artifact_dir : str, optional
+        Directory for the persisted JSON artifact. Pass ``None`` to disable
+        persistence.
+    """
+
+    def __init__(self, acronyms_path: str, terms_path: str, artifact_dir: Optional[str] = DEFAULT_ARTIFACT_DIR):
+        self.acronyms_path = acronyms_path
+        self.terms_path = terms_path
+        self.artifact_path: Optional[str] = None
+        if artifact_dir:
+            digest = hashlib.sha1(
+                f"{os.path.abspath(acronyms_path)}|{os.path.abspath(terms_path)}".encode()
+            ).hexdigest()[:12]
+            self.artifact_path = os.path.join(artifact_dir, f"enrichment_{digest}.json")
+        self._current: Optional[EnrichmentArtifact] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> QuestionEnricher:
+        """Return the enricher for the CSVs as they are on disk now."""
+        current = self._current
+        if current is not None and self._stats_match(current):
+            return current.enricher
+        # Only the first load blocks; later reloads let other readers continue
+        if not self._lock.acquire(blocking=current is None):
+            return current.enricher  # type: ignore[union-attr]
+        try:
+            current = self._current
+            if current is not None and self._stats_match(current):
+                return current.enricher  # another thread already reloaded
+            try:
+                return self._refresh().enricher
+            except (OSError, ValueError, csv.Error) as exc:
+                if current is None:
+                    raise
+                # e.g. a CSV being replaced or partially written; retried on the next call
+                logger.warning("Could not reload enrichment CSVs, keeping the loaded version: %s", exc)
+                return current.enricher
+        finally:
+            self._lock.release()
+
+    def content_key(self) -> tuple[str, str]:
+        """Return the SHA-256 hashes of the CSVs behind the enricher ``get`` serves."""
+        self.get()
+        return self._current.content_key()  # type: ignore[union-attr]
+
+    def reload(self) -> EnrichmentArtifact:
+        """Force a version check and swap in a new artifact if the CSVs changed."""
+        with self._lock:
+            return self._refresh()
+
+    def _stats_match(self, artifact: EnrichmentArtifact) -> bool:
+        try:
+            return (
+                _file_stat(self.acronyms_path) == (artifact.acronyms_version.mtime_ns, artifact.acronyms_version.size)
+                and _file_stat(self.terms_path) == (artifact.terms_version.mtime_ns, artifact.terms_version.size)
+            )
+        except OSError:
+            return False
+
+    def _refresh(self) -> EnrichmentArtifact:
+        acronyms_version = SourceVersion.of(self.acronyms_path)
+        terms_version = SourceVersion.of(self.terms_path)
+        key = (acronyms_version.sha256, terms_version.sha256)
+
+        current = self._current
+        if current is not None and current.content_key() == key:
+            # Touched but unchanged: keep the compiled enricher, refresh stats
+            artifact = EnrichmentArtifact(current.enricher, acronyms_version, terms_version)
+        else:
+            enricher = self._load_artifact(key)
+            if enricher is None:
+                enricher = QuestionEnricher.from_mappings(
+                    read_mapping_csv(self.acronyms_path), read_mapping_csv(self.terms_path)
+                )
+                self._save_artifact(enricher, key)
+                logger.info(
+                    "Compiled question enricher with %d acronyms and %d terms",
+                    len(enricher.acronyms),
+                    len(enricher.terms),
+                )
+            artifact = EnrichmentArtifact(enricher, acronyms_version, terms_version)
+        self._current = artifact
+        return artifact
+
+    def _load_artifact(self, key: tuple[str, str]) -> Optional[QuestionEnricher]:
+        if not self.artifact_path or not os.path.exists(self.artifact_path):
+            return None
+        try:
+            with open(self.artifact_path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("format") != ARTIFACT_FORMAT or tuple(data.get("sources", ())) != key:
+                return None
+            enricher = QuestionEnricher.from_state(data["state"])
+            logger.info("Loaded question enricher artifact from %s", self.artifact_path)
+            return enricher
+        except Exception as exc:
+            logger.warning("Ignoring unreadable enrichment artifact %s: %s", self.artifact_path, exc)
+            return None
+
+    def _save_artifact(self, enricher: QuestionEnricher, key: tuple[str, str]) -> None:
+        if not self.artifact_path:
+            return
+        data = {"format": ARTIFACT_FORMAT, "sources": list(key), "state": enricher.to_state()}
+        try:
+            directory = os.path.dirname(self.artifact_path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(data, fh, ensure_ascii=False)
+            os.replace(tmp_path, self.artifact_path)  # atomic on POSIX and Windows
+        except OSError as exc:
+            logger.warning("Could not persist enrichment artifact: %s", exc)
+
+
+_stores: Dict[tuple[str, str], EnrichmentStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_enrichment_store(acronyms_path: str, terms_path: str) -> EnrichmentStore:
+    """Return the process-wide store for a CSV pair."""
+    key = (acronyms_path, terms_path)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, EnrichmentStore(acronyms_path, terms_path))
+    return store
+
+
+def get_question_enricher(acronyms_path: str, terms_path: str) -> QuestionEnricher:
+    """Return the compiled enricher for the CSV pair, reloaded when either file changes."""
+    return get_enrichment_store(acronyms_path, terms_path).get()
@@ -1,7 +1,20 @@
-from typing import List, Optional, Iterable
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Iterable, Tuple
+import numpy as np
 import pandas as pd
-from qdrant_client.http import models
+from .fingerprint import filter_fingerprint, fingerprint
+
+if TYPE_CHECKING:  # qdrant_client is imported on first filter build; it is slow to import
+    from qdrant_client.http import models
+
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -13,6 +26,7 @@ def build_retrieval_filter(
 
     All other filtering is handled using the catalog.
     """
+    from qdrant_client.http import models
 
     must: list[models.Condition] = []  
     if allowed_pdf_ids is not None:
@@ -26,9 +40,316 @@ def build_retrieval_filter(
     return models.Filter(must=must) if must else None
 
 
+FLAG_COLUMNS = ("public_release", "aux_specific")
+
+
+def _normalized(series: pd.Series) -> np.ndarray:
+    """Return ``series`` as lowercase strings, as the legacy filter compared them."""
+    return series.astype(str).str.lower().to_numpy(dtype=object)
+
+
+def _value_masks(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Return one boolean mask per distinct value in ``values``."""
+    codes, uniques = pd.factorize(values)
+    return {str(u): codes == i for i, u in enumerate(uniques)}
+
+
+def _raw_values(series: pd.Series) -> Optional[Dict[str, List[str]]]:
+    """Map each normalized value to the raw strings that produce it.
+
+    Returns ``None`` for non-string columns, whose ``astype(str)`` form (e.g.
+    ``"7.0"``) need not match what is stored in the Qdrant payload.
+    """
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    variants: Dict[str, List[str]] = {}
+    for raw in series.dropna().unique():
+        variants.setdefault(str(raw).lower(), []).append(str(raw))
+    return variants
+
+
+# Datetime strings Qdrant's datetime payload index parses: RFC 3339 and plain dates
+_QDRANT_DATETIME = r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?)?"
+
+
+def _qdrant_comparable_dates(series: pd.Series) -> bool:
+    """Whether Qdrant reads every expiration in ``series`` as the catalog mask does.
+
+    The catalog treats blank and unparseable dates as never expiring, while a
+    Qdrant datetime range excludes them, so any such value rules out
+    payload-native expiration filtering.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return True
+    values = series.dropna()
+    is_str = values.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if not all(isinstance(v, datetime) for v in values[~is_str]):
+        return False
+    strings = values[is_str].astype(str)
+    if not strings.str.fullmatch(_QDRANT_DATETIME).all():
+        return False
+    return bool(pd.to_datetime(strings, errors="coerce", utc=True, format="ISO8601").notna().all())
+
+
+def _scope_and_units(fc: dict) -> Tuple[Optional[str], List[str]]:
+    """Return the normalized scope choice and unit list from filter conditions."""
+    scope_val_raw = fc.get("scope")
+    scope_val = str(scope_val_raw).strip().lower() if scope_val_raw else None
+
+    # Support multi-district selection via `units` and single via `unit`
+    units_sel = fc.get("units")  # may be list[str]
+    unit_val = fc.get("unit")
+    units: List[str] = []
+    if isinstance(units_sel, Iterable) and not isinstance(units_sel, (str, bytes)):
+        units = [str(u).strip().lower() for u in units_sel]
+    elif unit_val:
+        units = [str(unit_val).strip().lower()]
+    return scope_val, units
+
+
+class CatalogFilterIndex:
+    """Precomputed boolean masks for filtering one catalog version.
+
+    Built once per catalog version. Per-value masks for ``scope``, ``unit``
+    and the boolean flag columns, plus expiration timestamps as int64
+    microseconds, turn each ``catalog_filter`` query into a handful of
+    vectorized AND/OR operations with no DataFrame copies. ``pdf_ids_for``
+    memoizes the id list of recent selections, so repeating a selection
+    against the same version is a dict lookup.
+
+    Parameters
+    ----------
+    catalog_df : pandas.DataFrame
+        Catalog with at least a ``pdf_id`` column. ``scope``, ``unit``,
+        ``expiration_date`` and the flag columns are optional.
+    memo_size : int, default=64
+        Number of selections whose ``pdf_id`` lists are kept.
+    """
+
+    def __init__(self, catalog_df: pd.DataFrame, memo_size: int = 64):
+        self.memo_size = memo_size
+        self._ids_memo: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.size = len(catalog_df)
+        self.has_pdf_id = "pdf_id" in catalog_df.columns
+        if self.has_pdf_id:
+            ids = catalog_df["pdf_id"]
+            self.valid_id = ids.notna().to_numpy()
+            self.pdf_ids = ids.astype(str).to_numpy(dtype=object)
+            self.ids_unique = bool(ids[self.valid_id].is_unique)
+        else:
+            self.valid_id = np.zeros(self.size, dtype=bool)
+            self.pdf_ids = np.empty(0, dtype=object)
+            self.ids_unique = True
+
+        self.empty = np.zeros(self.size, dtype=bool)
+        self.flag_masks: Dict[str, Dict[str, np.ndarray]] = {
+            flag: _value_masks(_normalized(catalog_df[flag]))
+            for flag in FLAG_COLUMNS
+            if flag in catalog_df.columns
+        }
+        self.scope_masks = _value_masks(_normalized(catalog_df["scope"])) if "scope" in catalog_df.columns else {}
+        self.unit_masks = _value_masks(_normalized(catalog_df["unit"])) if "unit" in catalog_df.columns else {}
+        # Raw spellings per normalized value, for payload-native Qdrant filters
+        self.scope_values = _raw_values(catalog_df["scope"]) if "scope" in catalog_df.columns else None
+        self.unit_values = _raw_values(catalog_df["unit"]) if "unit" in catalog_df.columns else None
+
+        self.has_expiration = "expiration_date" in catalog_df.columns
+        if self.has_expiration:
+            exp = pd.to_datetime(catalog_df["expiration_date"], errors="coerce", utc=True)
+            self.has_expiry = exp.notna().to_numpy()  # NaT never expires
+            # Microseconds avoid the year-2262 overflow of nanosecond timestamps
+            self.expiration_us = exp.dt.tz_localize(None).to_numpy(dtype="datetime64[us]").view("int64")
+            self.expiration_payload_ok = _qdrant_comparable_dates(catalog_df["expiration_date"])
+
+    def _scope(self, value: str) -> np.ndarray:
+        return self.scope_masks.get(value, self.empty)
+
+    def _units(self, units: List[str]) -> np.ndarray:
+        mask = self.empty.copy()
+        for unit in units:
+            unit_mask = self.unit_masks.get(unit)
+            if unit_mask is not None:
+                mask |= unit_mask
+        return mask
+
+    def select(self, filter_conditions: Optional[dict[str, str | bool | None | List[str]]] = None) -> np.ndarray:
+        """Return the catalog row positions matching ``filter_conditions``.
+
+        Rows are ordered as the legacy filter returned them: catalog order,
+        except that combined national + district selections list national
+        rows first.
+        """
+        fc = filter_conditions or {}
+        mask = self.valid_id.copy()
+
+        # Apply boolean flag filters
+        for flag, masks in self.flag_masks.items():
+            if flag in fc:
+                mask &= masks.get(str(fc[flag]).lower(), self.empty)
+
+        if fc.get("exclude_expired", False) and self.has_expiration:
+            now_us = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us").view("int64")
+            mask &= ~self.has_expiry | (self.expiration_us > now_us)
+
+        scope_val, units = _scope_and_units(fc)
+
+        # Apply scope/unit logic
+        if scope_val == "national":
+            # units typically don't apply to national docs; ignore units
+            return np.flatnonzero(mask & self._scope("national"))
+        if scope_val == "district":
+            dist = mask & self._scope("district")
+            if units:
+                dist &= self._units(units)
+            return np.flatnonzero(dist)
+        if scope_val == "both" or units:
+            # No explicit scope with units: national plus selected districts
+            nat = mask & self._scope("national")
+            dist = mask & self._scope("district")
+            if units:
+                dist &= self._units(units)
+            return np.concatenate([np.flatnonzero(nat), np.flatnonzero(dist)])
+        return np.flatnonzero(mask)
+
+    def all_pdf_ids(self) -> List[str]:
+        """Return every unique ``pdf_id`` in the catalog."""
+        ids = self.pdf_ids[self.valid_id]
+        if not self.ids_unique:
+            ids = pd.unique(ids)
+        return ids.tolist()
+
+    def pdf_ids_for(self, filter_conditions: Optional[dict[str, str | bool | None | List[str]]] = None) -> List[str]:
+        """Return unique ``pdf_id`` values matching ``filter_conditions``.
+
+        Results are memoized per canonical selection (plus the UTC date for
+        ``exclude_expired``); the returned list is shared, so callers must
+        copy before mutating.
+        """
+        if not self.has_pdf_id:
+            return []
+        key = filter_fingerprint(filter_conditions)
+        if (filter_conditions or {}).get("exclude_expired"):
+            key += datetime.now(timezone.utc).strftime(":%Y-%m-%d")
+        with self._memo_lock:
+            cached = self._ids_memo.get(key)
+            if cached is not None:
+                self._ids_memo.move_to_end(key)
+                return cached
+
+        ids = self.pdf_ids[self.select(filter_conditions)]
+        if not self.ids_unique:
+            ids = pd.unique(ids)
+        result = ids.tolist()
+        with self._memo_lock:
+            self._ids_memo[key] = result
+            while len(self._ids_memo) > self.memo_size:
+                self._ids_memo.popitem(last=False)
+        return result
+
+
+# (version key, DataFrame, index) for the most recent catalog
+_index_slot: Tuple[Any, Optional[pd.DataFrame], Optional[CatalogFilterIndex]] = (None, None, None)
+_index_lock = threading.Lock()
+
+
+def _catalog_key(catalog_df: pd.DataFrame, catalog_version: Optional[str]) -> Optional[tuple]:
+    """Cache key for per-version catalog structures, or ``None`` if unversioned."""
+    return (catalog_version, len(catalog_df)) if catalog_version and catalog_version != "--" else None
+
+
+def get_catalog_filter_index(catalog_df: pd.DataFrame, catalog_version: Optional[str] = None) -> CatalogFilterIndex:
+    """Return the filter index for ``catalog_df``, building it once per version.
+
+    ``catalog_version`` is the catalog modified time from
+    ``fetch_table_and_date_from_catalog``. Without a usable version the
+    DataFrame object itself is the key, which only helps when callers reuse
+    the same object.
+    """
+    global _index_slot
+    key = _catalog_key(catalog_df, catalog_version)
+
+    def matches(slot: tuple) -> bool:
+        slot_key, slot_df, slot_index = slot
+        if slot_index is None:
+            return False
+        return slot_key == key if key is not None else slot_df is catalog_df
+
+    slot = _index_slot
+    if matches(slot):
+        return slot[2]  # type: ignore[return-value]
+    with _index_lock:
+        if not matches(_index_slot):
+            _index_slot = (key, catalog_df, CatalogFilterIndex(catalog_df))
+        return _index_slot[2]  # type: ignore[return-value]
+
+
+def build_catalog_metadata(catalog_df: pd.DataFrame) -> Dict[str, dict]:
+    """Return a ``pdf_id`` -> catalog row mapping for ``catalog_df``.
+
+    Each value is a plain dict of the row's columns, excluding ``pdf_id``.
+    The first row wins when a ``pdf_id`` appears more than once.
+    """
+    if "pdf_id" not in catalog_df.columns:
+        return {}
+    rows = catalog_df.drop_duplicates("pdf_id", keep="first")
+    pdf_ids = rows["pdf_id"].tolist()
+    records = rows.drop(columns="pdf_id").to_dict("records")
+    return {pdf_id: record for pdf_id, record in zip(pdf_ids, records) if pdf_id}
+
+
+# (version key, DataFrame, lookup) for the most recent catalog
+_metadata_slot: Tuple[Any, Optional[pd.DataFrame], Optional[Dict[str, dict]]] = (None, None, None)
+_metadata_lock = threading.Lock()
+
+
+def get_catalog_metadata(catalog_df: pd.DataFrame, catalog_version: Optional[str] = None) -> Dict[str, dict]:
+    """Return the ``pdf_id`` metadata lookup for ``catalog_df``, built once per version.
+
+    Cached like ``get_catalog_filter_index``. The returned dict and its
+    records are shared; callers must copy before mutating.
+    """
+    global _metadata_slot
+    key = _catalog_key(catalog_df, catalog_version)
+
+    def matches(slot: tuple) -> bool:
+        slot_key, slot_df, slot_lookup = slot
+        if slot_lookup is None:
+            return False
+        return slot_key == key if key is not None else slot_df is catalog_df
+
+    slot = _metadata_slot
+    if matches(slot):
+        return slot[2]  # type: ignore[return-value]
+    with _metadata_lock:
+        if not matches(_metadata_slot):
+            _metadata_slot = (key, catalog_df, build_catalog_metadata(catalog_df))
+        return _metadata_slot[2]  # type: ignore[return-value]
+
+
+def publish_catalog_indexes(
+    catalog_df: pd.DataFrame,
+    catalog_version: str,
+    index: CatalogFilterIndex,
+    metadata: Dict[str, dict],
+) -> None:
+    """Install prebuilt catalog structures as the current cache entries.
+
+    Used by the background catalog refresher, which builds the index and
+    metadata lookup off the request path.
+    """
+    global _index_slot, _metadata_slot
+    key = _catalog_key(catalog_df, catalog_version)
+    with _index_lock:
+        _index_slot = (key, catalog_df, index)
+    with _metadata_lock:
+        _metadata_slot = (key, catalog_df, metadata)
+
+
 def catalog_filter(
     catalog_df: pd.DataFrame,
     filter_conditions: Optional[dict[str, str | bool | None | List[str]]] = None,
+    catalog_version: Optional[str] = None,
 ) -> List[str]:
     """Return a list of ``pdf_id`` values from ``catalog_df`` that satisfy
     ``filter_conditions``.
@@ -40,66 +361,277 @@ def catalog_filter(
         columns.
     filter_conditions : dict, optional
         Same structure as ``build_retrieval_filter`` accepts.
+    catalog_version : str, optional
+        Catalog modified time. When given, the ``CatalogFilterIndex`` is
+        reused for every query against the same catalog version.
 
     Returns
     -------
     list[str]
         Unique ``pdf_id`` values matching the filter conditions.
     """
-    fc = (filter_conditions or {}).copy()
-    df = catalog_df.copy()
+    return get_catalog_filter_index(catalog_df, catalog_version).pdf_ids_for(filter_conditions)
 
-    # Apply boolean flag filters
-    for flag in ("public_release", "aux_specific"):
-        if flag in df.columns and flag in fc:
-            val = fc.pop(flag)
-            df = df[df[flag].astype(str).str.lower() == str(val).lower()]
 
-    if fc.pop("exclude_expired", False) and "expiration_date" in df.columns:
-        now = datetime.now(timezone.utc)
-        exp = pd.to_datetime(df["expiration_date"], errors="coerce", utc=True)
-        df = df[(exp.isna()) | (exp > now)]
+# Catalog fields that may be filtered natively in Qdrant, and the payload
+# index type each one needs
+PAYLOAD_INDEX_TYPES: Dict[str, str] = {
+    "metadata.scope": "keyword",
+    "metadata.unit": "keyword",
+    "metadata.public_release": "bool",
+    "metadata.aux_specific": "bool",
+    "metadata.expiration_date": "datetime",
+}
 
-    scope_val_raw = fc.get("scope")
-    scope_val = str(scope_val_raw).strip().lower() if scope_val_raw else None
 
-    # Support multi-district selection via `units` and single via `unit`
-    units_sel = fc.get("units")  # may be list[str]
-    unit_val = fc.get("unit")
-    units: List[str] = []
-    if isinstance(units_sel, Iterable) and not isinstance(units_sel, (str, bytes)):
-        units = [str(u).strip().lower() for u in units_sel]
-    elif unit_val:
-        units = [str(unit_val).strip().lower()]
+@dataclass(frozen=True)
+class CompiledFilter:
+    """A Qdrant filter plus the catalog result it was compiled from.
 
-    # Normalize column values safely
-    if "scope" in df.columns:
-        df["scope"] = df["scope"].astype(str)
-    if "unit" in df.columns:
-        df["unit"] = df["unit"].astype(str)
-
-    # Apply scope/unit logic
-    if scope_val == "national":
-        df = df[df["scope"].str.lower() == "national"]
-        # units typically don't apply to national docs; ignore units
-    elif scope_val == "district":
-        df = df[df["scope"].str.lower() == "district"]
-        if units:
-            df = df[df["unit"].str.lower().isin(units)]
-    elif scope_val == "both":
-        nat = df[df["scope"].str.lower() == "national"]
-        dist = df[df["scope"].str.lower() == "district"]
-        if units:
-            dist = dist[dist["unit"].str.lower().isin(units)]
-        df = pd.concat([nat, dist], ignore_index=True)
-    else:
-        # No explicit scope; if units provided, filter district by units, otherwise leave as-is
+    Attributes
+    ----------
+    allowed_pdf_ids : list[str]
+        ``pdf_id`` values the catalog allows for the filter selection.
+    retrieval_filter : models.Filter, optional
+        Filter to send with the search request.
+    strategy : str
+        ``"payload"`` (native payload conditions), ``"complement"``
+        (``must_not`` on excluded ids), ``"ids"`` (``MatchAny`` on allowed
+        ids) or ``"none"``.
+    payload_bytes : int
+        Size of the serialized filter, to track request bloat.
+    filter_key : str
+        Fingerprint of the serialized filter; equal filters share it, which
+        makes it usable in retrieval cache keys.
+    """
+
+    allowed_pdf_ids: List[str]
+    retrieval_filter: Optional[models.Filter]
+    strategy: str
+    payload_bytes: int
+    filter_key: str = ""
+
+
+def _filter_json(retrieval_filter: Optional[models.Filter]) -> str:
+    return "" if retrieval_filter is None else retrieval_filter.model_dump_json(exclude_none=True)
+
+
+def filter_payload_size(retrieval_filter: Optional[models.Filter]) -> int:
+    """Return the JSON size in bytes of ``retrieval_filter`` as sent to Qdrant."""
+    return len(_filter_json(retrieval_filter).encode("utf-8"))
+
+
+def _payload_native_filter(
+    fc: dict,
+    index: CatalogFilterIndex,
+    indexed_fields: Dict[str, str],
+) -> Optional[models.Filter]:
+    """Express ``fc`` as payload conditions, or ``None`` if it cannot be.
+
+    Mirrors ``CatalogFilterIndex.select`` using the raw catalog spellings of
+    each scope/unit value. Every field used must carry a payload index of the
+    type listed in ``PAYLOAD_INDEX_TYPES``, and expiration dates must all be
+    ones Qdrant compares as the catalog does (see ``_qdrant_comparable_dates``).
+    """
+    from qdrant_client.http import models
+
+    def indexed(key: str) -> bool:
+        return indexed_fields.get(key) == PAYLOAD_INDEX_TYPES[key]
+
+    def any_of(key: str, variants: Optional[Dict[str, List[str]]], values: List[str]) -> Optional[models.FieldCondition]:
+        if variants is None or not indexed(key):
+            return None
+        raw = [r for v in values for r in variants.get(v, [])]
+        return models.FieldCondition(key=key, match=models.MatchAny(any=raw)) if raw else None
+
+    must: list = []
+    for flag in FLAG_COLUMNS:
+        if flag in fc and flag in index.flag_masks:
+            value = fc[flag]
+            if not isinstance(value, bool) or not indexed(f"metadata.{flag}"):
+                return None
+            must.append(models.FieldCondition(key=f"metadata.{flag}", match=models.MatchValue(value=value)))
+
+    if fc.get("exclude_expired", False) and index.has_expiration:
+        key = "metadata.expiration_date"
+        if not indexed(key) or not index.expiration_payload_ok:
+            return None
+        now = datetime.now(timezone.utc)
+        must.append(models.Filter(should=[
+            models.IsEmptyCondition(is_empty=models.PayloadField(key=key)),
+            models.IsNullCondition(is_null=models.PayloadField(key=key)),
+            models.FieldCondition(key=key, range=models.DatetimeRange(gt=now)),
+        ]))
+
+    scope_val, units = _scope_and_units(fc)
+    if scope_val in ("national", "district", "both") or units:
+        nat = any_of("metadata.scope", index.scope_values, ["national"])
+        dist = any_of("metadata.scope", index.scope_values, ["district"])
         if units:
-            dist = df[(df["scope"].str.lower() == "district") & (df["unit"].str.lower().isin(units))]
-            nat = df[df["scope"].str.lower() == "national"]
-            df = pd.concat([nat, dist], ignore_index=True)
+            unit_cond = any_of("metadata.unit", index.unit_values, units)
+            if unit_cond is None:
+                return None
+            dist_filter: Optional[models.Filter] = models.Filter(must=[dist, unit_cond]) if dist else None
+        else:
+            dist_filter = models.Filter(must=[dist]) if dist else None
+
+        if scope_val == "national":
+            if nat is None:
+                return None
+            must.append(nat)
+        elif scope_val == "district":
+            if dist_filter is None:
+                return None
+            must.append(dist_filter)
+        else:
+            branches = [b for b in (nat, dist_filter) if b is not None]
+            if not branches:
+                return None
+            must.append(models.Filter(should=branches))
+
+    return models.Filter(must=must) if must else None
+
+
+def compile_retrieval_filter(
+    index: CatalogFilterIndex,
+    filter_conditions: Optional[dict[str, str | bool | None | List[str]]] = None,
+    mode: str = "ids",
+    indexed_fields: Optional[Dict[str, str]] = None,
+) -> CompiledFilter:
+    """Compile filter selections into the smallest suitable Qdrant filter.
+
+    With ``mode="ids"`` (the default) this is ``build_retrieval_filter``: a
+    ``MatchAny`` over every allowed ``pdf_id``. With ``mode="auto"``:
+
+    1. native payload conditions (scope, unit, flags, expiration range) when
+       every field involved is indexed in the collection;
+    2. otherwise, when fewer ids are excluded than allowed, ``must_not`` on
+       the excluded ids;
+    3. otherwise the allowed-id list.
+
+    ``auto`` assumes the collection only holds documents that are in the
+    catalog, with payload metadata that matches it, since documents outside
+    the catalog are not excluded by payload or ``must_not`` conditions. A
+    selection that neither payload conditions nor excluded ids would
+    restrict uses the allowed-id list, so the search is never unfiltered and
+    stays limited to the live catalog. Native expiration filtering compares
+    against the compile time.
+    """
+    from qdrant_client.http import models
+
+    fc = filter_conditions or {}
+    allowed_ids = index.pdf_ids_for(fc)
+    retrieval_filter: Optional[models.Filter] = None
+    strategy = ""
+
+    if mode == "auto":
+        retrieval_filter = _payload_native_filter(fc, index, indexed_fields or {})
+        if retrieval_filter is not None:
+            strategy = "payload"
+        else:
+            allowed = set(allowed_ids)
+            excluded = [i for i in index.all_pdf_ids() if i not in allowed]
+            # Nothing excluded would leave the search unfiltered; use ids then
+            if excluded and len(excluded) < len(allowed_ids):
+                strategy = "complement"
+                retrieval_filter = models.Filter(must_not=[
+                    models.FieldCondition(key="metadata.pdf_id", match=models.MatchAny(any=excluded))
+                ])
+
+    if not strategy:
+        strategy = "ids"
+        retrieval_filter = build_retrieval_filter(filter_conditions, allowed_pdf_ids=allowed_ids)
+    if retrieval_filter is None:
+        strategy = "none"
+    serialized = _filter_json(retrieval_filter)
+    return CompiledFilter(allowed_ids, retrieval_filter, strategy, len(serialized.encode("utf-8")), fingerprint(serialized))
+
+
+class RetrievalFilterMemo:
+    """Memoize compiled retrieval filters per filter selection.
 
-    if "pdf_id" not in df.columns:
-        return []
+    The sidebar yields only a handful of distinct filter combinations, so the
+    allowed ``pdf_id`` list and the prebuilt ``models.Filter`` are cached under
+    a canonical, order-independent hash of ``filter_conditions``. Entries are
+    scoped to one catalog version: the first lookup with a new version drops
+    every entry. Selections with ``exclude_expired`` also key on the UTC date,
+    so documents that expire later today drop out by tomorrow.
 
-    return df["pdf_id"].dropna().astype(str).unique().tolist()
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of filter combinations kept for the current version.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._version: Optional[str] = None
+        self._entries: "OrderedDict[str, CompiledFilter]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(
+        self,
+        catalog_df: pd.DataFrame,
+        filter_conditions: Optional[dict[str, str | bool | None | List[str]]],
+        catalog_version: Optional[str],
+        mode: str = "ids",
+        indexed_fields: Optional[Dict[str, str]] = None,
+    ) -> CompiledFilter:
+        """Return the compiled filter for ``filter_conditions``."""
+        if not catalog_version or catalog_version == "--":
+            # Without a version there is no way to know when to invalidate
+            return self._build(catalog_df, filter_conditions, catalog_version, mode, indexed_fields)
+
+        key = fingerprint(filter_fingerprint(filter_conditions), mode, indexed_fields or {})
+        if (filter_conditions or {}).get("exclude_expired"):
+            key += datetime.now(timezone.utc).strftime(":%Y-%m-%d")
+        with self._lock:
+            if self._version != catalog_version:
+                self._entries.clear()
+                self._version = catalog_version
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        result = self._build(catalog_df, filter_conditions, catalog_version, mode, indexed_fields)
+        with self._lock:
+            if self._version == catalog_version:
+                self._entries[key] = result
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _build(catalog_df, filter_conditions, catalog_version, mode, indexed_fields) -> CompiledFilter:
+        index = get_catalog_filter_index(catalog_df, catalog_version)
+        compiled = compile_retrieval_filter(index, filter_conditions, mode=mode, indexed_fields=indexed_fields)
+        logger.info(
+            "Compiled retrieval filter: strategy=%s allowed=%d payload=%d bytes",
+            compiled.strategy,
+            len(compiled.allowed_pdf_ids),
+            compiled.payload_bytes,
+        )
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+retrieval_filter_memo = RetrievalFilterMemo()
+
+
+def resolve_retrieval_filter(
+    catalog_df: pd.DataFrame,
+    filter_conditions: Optional[dict[str, str | bool | None | List[str]]] = None,
+    catalog_version: Optional[str] = None,
+    mode: str = "ids",
+    indexed_fields: Optional[Dict[str, str]] = None,
+) -> CompiledFilter:
+    """Return the memoized compiled filter for ``filter_conditions``.
+
+    See ``RetrievalFilterMemo`` and ``compile_retrieval_filter``.
+    """
+    return retrieval_filter_memo.resolve(catalog_df, filter_conditions, catalog_version, mode, indexed_fields)
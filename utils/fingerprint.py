@@ -0,0 +1,62 @@
+"""Canonical hashing helpers for cache keys.
+
+Cache keys built from filter selections and config sections must not depend
+on dict ordering, list ordering for set-like selections, or incidental
+whitespace/case differences that the pipeline itself ignores.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import unicodedata
+from typing import Any, Mapping, Optional
+
+
+def canonical_json(obj: Any) -> str:
+    """Serialize ``obj`` deterministically (sorted keys, compact separators)."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def fingerprint(*parts: Any) -> str:
+    """Return a short SHA-256 hex digest of the canonical JSON of ``parts``."""
+    return hashlib.sha256(canonical_json(list(parts)).encode("utf-8")).hexdigest()[:32]
+
+
+def canonical_filter_conditions(filter_conditions: Optional[Mapping[str, Any]]) -> dict:
+    """Normalize sidebar filter conditions into an order-independent form.
+
+    Strings are stripped and case-folded (``catalog_filter`` compares them
+    case-insensitively), list selections such as ``units`` are deduplicated
+    and sorted, and keys with ``None`` or empty string values are dropped. A
+    false ``exclude_expired`` is dropped as well, since it is the default.
+    Empty lists are kept: an explicit ``units: []`` overrides ``unit`` in
+    the catalog filter, so it selects differently from no ``units`` key.
+    """
+    canonical: dict = {}
+    for key, value in (filter_conditions or {}).items():
+        if value is None:
+            continue
+        if key == "exclude_expired" and not value:
+            continue
+        if isinstance(value, str):
+            value = value.strip().casefold()
+            if not value:
+                continue
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            value = sorted({str(v).strip().casefold() for v in value})
+        canonical[str(key)] = value
+    return canonical
+
+
+def filter_fingerprint(filter_conditions: Optional[Mapping[str, Any]]) -> str:
+    """Return a canonical hash of ``filter_conditions``."""
+    return fingerprint(canonical_filter_conditions(filter_conditions))
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups.
+
+    Applies NFKC and collapses whitespace. Case is preserved because acronym
+    expansion is case-sensitive, so ``FC`` and ``fc`` can enrich differently.
+    """
+    return " ".join(unicodedata.normalize("NFKC", question).split())
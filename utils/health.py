@@ -0,0 +1,182 @@
+"""Non-blocking health checks for the services ASK depends on.
+
+``HealthMonitor`` runs each check in a background thread and serves the last
+known result instantly, so script reruns never wait on an external request.
+A result older than ``ttl_s`` is returned as is (flagged ``stale``) while a
+refresh runs; at most one check per service is in flight at a time.
+
+``default_checks`` covers the LLM provider status page, the Qdrant
+collection and the catalog backend, using connectors resolved by the caller.
+The Qdrant check needs ``utils.rag``, which ``ui.py`` imports in the
+background after the first render; until then the check is deferred
+(``CheckDeferred``) rather than importing it early.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 60.0
+OPENAI_STATUS_URL = "https://status.openai.com/api/v2/status.json"
+
+# A check returns (ok, message) or raises; an exception counts as unhealthy
+HealthCheck = Callable[[], Tuple[bool, str]]
+
+
+class CheckDeferred(Exception):
+    """Raised by a check that cannot run yet; the status stays as it was."""
+
+
+@dataclass(frozen=True)
+class HealthStatus:
+    """Last known result of one health check.
+
+    ``ok`` is ``None`` until the first check has finished. ``checked_at`` is
+    a ``time.time()`` timestamp and ``stale`` marks a result older than the
+    monitor's TTL.
+    """
+
+    name: str
+    ok: Optional[bool] = None
+    message: str = "unknown"
+    checked_at: Optional[float] = None
+    latency_s: Optional[float] = None
+    stale: bool = True
+
+    def age_s(self, now: Optional[float] = None) -> Optional[float]:
+        if self.checked_at is None:
+            return None
+        return (time.time() if now is None else now) - self.checked_at
+
+
+class HealthMonitor:
+    """Serve cached health results and refresh them in the background.
+
+    Parameters
+    ----------
+    checks : mapping of str to callable
+        Service name -> check returning ``(ok, message)``.
+    ttl_s : float, default=60
+        Age after which a result is refreshed on the next read.
+    """
+
+    def __init__(self, checks: Mapping[str, HealthCheck], ttl_s: float = DEFAULT_TTL_S):
+        self.checks = dict(checks)
+        self.ttl_s = ttl_s
+        self._results: Dict[str, HealthStatus] = {name: HealthStatus(name) for name in self.checks}
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+
+    def start(self) -> "HealthMonitor":
+        """Kick off the first round of checks without waiting for them."""
+        for name in self.checks:
+            self._refresh_async(name)
+        return self
+
+    def status(self, name: str) -> HealthStatus:
+        """Return the last known status of ``name`` without blocking."""
+        result = self._results[name]
+        age = result.age_s()
+        stale = age is None or age > self.ttl_s
+        if stale:
+            self._refresh_async(name)
+        return replace(result, stale=stale)
+
+    def statuses(self) -> Dict[str, HealthStatus]:
+        """Return the last known status of every service."""
+        return {name: self.status(name) for name in self.checks}
+
+    def refresh(self, name: str) -> HealthStatus:
+        """Run the check for ``name`` now and return its result."""
+        check = self.checks[name]
+        start = time.perf_counter()
+        try:
+            ok, message = check()
+        except CheckDeferred as exc:
+            logger.debug("Health check %s deferred: %s", name, exc)
+            return self._results[name]
+        except Exception as exc:
+            ok, message = False, f"{type(exc).__name__}: {exc}"
+        result = HealthStatus(
+            name,
+            ok=bool(ok),
+            message=message,
+            checked_at=time.time(),
+            latency_s=time.perf_counter() - start,
+            stale=False,
+        )
+        if not result.ok:
+            logger.warning("Health check %s failed: %s", name, message)
+        self._results[name] = result
+        return result
+
+    def _refresh_async(self, name: str) -> None:
+        with self._lock:
+            if name in self._in_flight:
+                return
+            self._in_flight.add(name)
+
+        def run() -> None:
+            try:
+                self.refresh(name)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(name)
+
+        threading.Thread(target=run, name=f"health-{name}", daemon=True).start()
+
+
+def check_openai(url: str = OPENAI_STATUS_URL, timeout_s: float = 10.0) -> Tuple[bool, str]:
+    """LLM provider status page; healthy when it reports no incident."""
+    import requests
+
+    status = requests.get(url, timeout=timeout_s).json()["status"]
+    return status.get("indicator") == "none", status.get("description", "unknown")
+
+
+def check_qdrant(vectordb: Any = None, embedding_cache: Optional[Mapping[str, Any]] = None) -> Tuple[bool, str]:
+    """Reachability of the active Qdrant collection.
+
+    Deferred until ``utils.rag`` has finished importing (by the warmup thread
+    or a first question; see ``rag.PIPELINE_READY``), so the check never
+    pulls LangChain in at startup. With ``vectordb`` and ``embedding_cache``
+    given, the pooled vector store is looked up without Streamlit caches.
+    """
+    rag = sys.modules.get(f"{__package__}.rag")
+    if not getattr(rag, "PIPELINE_READY", False):
+        raise CheckDeferred("RAG pipeline not imported yet")
+    vectorstore = rag.get_vectorstore(vectordb, embedding_cache)
+    info = vectorstore.client.get_collection(vectorstore.collection_name)
+    return True, f"{vectorstore.collection_name}: {info.status}"
+
+
+def check_catalog(catalog: Any) -> Tuple[bool, str]:
+    """Catalog backend reachability, via the connector's modified time."""
+    modified_time = catalog.get_catalog_modified_time()
+    if modified_time is None:
+        return False, "catalog modified time unavailable"
+    return True, f"modified {modified_time}"
+
+
+def default_checks(
+    vectordb: Any, catalog: Any, embedding_cache: Optional[Mapping[str, Any]] = None
+) -> Dict[str, HealthCheck]:
+    """Checks for the LLM provider, Qdrant and the catalog backend.
+
+    The connectors and the ``RAG.EMBEDDING_CACHE`` settings are resolved by
+    the caller, so checks running in background threads never go through
+    Streamlit caches.
+    """
+    return {
+        "openai": check_openai,
+        "qdrant": partial(check_qdrant, vectordb, embedding_cache or {}),
+        "catalog": partial(check_catalog, catalog),
+    }
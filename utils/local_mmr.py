@@ -0,0 +1,250 @@
+"""Client-side maximal marginal relevance over a cached candidate pool.
+
+The vector store's built-in MMR sends a new MMR query to Qdrant for every
+request, and changing ``k`` or ``lambda_mult`` re-runs the whole search.
+With ``RAG.RETRIEVAL.search_type: local_mmr``, ``get_retriever`` returns a
+``LocalMMRRetriever`` instead, which
+
+1. fetches the ``fetch_k`` nearest chunks *with their vectors* in one
+   ``query_points`` call,
+2. keeps that candidate pool in ``candidate_pools`` (LRU, keyed on the
+   collection, embedding model, query text, filter, ``fetch_k`` and catalog
+   version), and
+3. selects ``k`` chunks with ``mmr_select``, a NumPy computation over the
+   pool's similarity matrix.
+
+Reranking a cached pool for other ``k``/``lambda_mult`` values (see
+``LocalMMRRetriever.rerank``, e.g. for eval sweeps) takes well under a
+millisecond and never touches Qdrant.
+
+``lambda_mult`` follows LangChain's definition: the weight of relevance to
+the query, 1 meaning no diversity. Qdrant's server-side MMR, as called by
+``QdrantVectorStore``, receives the same number as its ``diversity``
+parameter, so the two modes agree at the usual 0.5 and diverge away from it.
+Each pool holds ``fetch_k`` float32 vectors, about 6 KB per candidate for a
+1536-dimension model, so size ``maxsize`` accordingly.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .answer_cache import AnswerCache
+from .fingerprint import fingerprint
+from .relevance import SCORE_KEY
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CACHE_SIZE = 128
+
+
+def mmr_select(query_similarity: np.ndarray, similarity: np.ndarray, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """Greedy MMR selection of ``k`` candidates.
+
+    Parameters
+    ----------
+    query_similarity : numpy.ndarray
+        ``(n,)`` cosine similarity of each candidate to the query.
+    similarity : numpy.ndarray
+        ``(n, n)`` cosine similarity between candidates.
+    k : int
+        Number of candidates to select.
+    lambda_mult : float, default=0.5
+        Relevance weight; ``1`` ranks by query similarity only, ``0``
+        maximizes diversity.
+
+    Returns
+    -------
+    list[int]
+        Indices of the selected candidates, in selection order.
+    """
+    n = len(query_similarity)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    selected = [int(np.argmax(query_similarity))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    for _ in range(k - 1):
+        scores = lambda_mult * query_similarity - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+    return selected
+
+
+@dataclass(frozen=True)
+class CandidatePool:
+    """The ``fetch_k`` nearest chunks for one query, with their vectors.
+
+    ``query_similarity`` and ``similarity`` are cosine similarities, computed
+    once when the pool is built.
+    """
+
+    docs: List[Document]
+    query_similarity: np.ndarray
+    similarity: np.ndarray
+
+    @classmethod
+    def build(cls, docs: List[Document], query_vector: Any, vectors: Any) -> "CandidatePool":
+        query = _unit(np.asarray(query_vector, dtype=np.float32))
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(docs), -1)
+        if len(docs):
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return cls(docs=docs, query_similarity=matrix @ query, similarity=matrix @ matrix.T)
+
+    def select(self, k: int, lambda_mult: float = 0.5) -> List[Document]:
+        """Return copies of the MMR selection, safe for callers to modify.
+
+        Each copy carries its query similarity as ``metadata["relevance_score"]``.
+        """
+        return [
+            self.docs[i].model_copy(
+                update={"metadata": {**self.docs[i].metadata, SCORE_KEY: float(self.query_similarity[i])}}
+            )
+            for i in mmr_select(self.query_similarity, self.similarity, k, lambda_mult)
+        ]
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def _document_from_point(point: Any, collection_name: str, content_key: str, metadata_key: str) -> Document:
+    """Build a ``Document`` from a Qdrant point the way ``QdrantVectorStore`` searches do."""
+    payload = point.payload or {}
+    return Document(
+        page_content=payload.get(content_key) or "",
+        metadata={**(payload.get(metadata_key) or {}), "_id": point.id, "_collection_name": collection_name},
+    )
+
+
+def fetch_candidate_pool(vectorstore: Any, query: str, fetch_k: int, retrieval_filter: Any = None) -> CandidatePool:
+    """Embed ``query`` and fetch the ``fetch_k`` nearest chunks with vectors.
+
+    ``vectorstore`` is a ``QdrantVectorStore``; its embeddings (including
+    the query embedding cache) and payload keys are used.
+    """
+    query_vector = vectorstore.embeddings.embed_query(query)
+    points = vectorstore.client.query_points(
+        collection_name=vectorstore.collection_name,
+        query=query_vector,
+        query_filter=retrieval_filter,
+        limit=fetch_k,
+        with_payload=True,
+        with_vectors=True,
+        using=vectorstore.vector_name or None,
+    ).points
+    docs = [
+        _document_from_point(
+            point, vectorstore.collection_name, vectorstore.content_payload_key, vectorstore.metadata_payload_key
+        )
+        for point in points
+    ]
+    vectors = [
+        point.vector[vectorstore.vector_name] if isinstance(point.vector, dict) else point.vector
+        for point in points
+    ]
+    return CandidatePool.build(docs, query_vector, vectors)
+
+
+class CandidatePoolCache:
+    """LRU of candidate pools, plus fingerprints of recently seen filters.
+
+    Compiled filters are memoized upstream, so the same ``Filter`` object
+    recurs across requests; its fingerprint is kept per object instead of
+    serializing it on every lookup.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_POOL_CACHE_SIZE, ttl_seconds: Optional[float] = 3600):
+        self.pools = AnswerCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self._filter_keys: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter_key(self, retrieval_filter: Any) -> str:
+        if retrieval_filter is None:
+            return ""
+        with self._lock:
+            entry = self._filter_keys.get(id(retrieval_filter))
+            # Holding the filter keeps its id from being reused
+            if entry is not None and entry[0] is retrieval_filter:
+                return entry[1]
+        key = fingerprint(retrieval_filter.model_dump_json(exclude_none=True))
+        with self._lock:
+            self._filter_keys[id(retrieval_filter)] = (retrieval_filter, key)
+            while len(self._filter_keys) > 32:
+                self._filter_keys.popitem(last=False)
+        return key
+
+    def get_pool(
+        self,
+        vectorstore: Any,
+        query: str,
+        fetch_k: int,
+        retrieval_filter: Any = None,
+        catalog_version: Optional[str] = None,
+    ) -> CandidatePool:
+        """Return the cached pool for this search, fetching it on a miss.
+
+        ``catalog_version`` is part of the key, as in ``make_answer_key``, so
+        pools fetched before a catalog (and index) update are not reused.
+        """
+        key = fingerprint(
+            vectorstore.collection_name,
+            getattr(vectorstore.embeddings, "model_id", type(vectorstore.embeddings).__name__),
+            query,
+            self.filter_key(retrieval_filter),
+            fetch_k,
+            catalog_version or "",
+        )
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = fetch_candidate_pool(vectorstore, query, fetch_k, retrieval_filter)
+            self.pools.put(key, pool)
+        return pool
+
+    def clear(self) -> None:
+        self.pools.clear()
+        with self._lock:
+            self._filter_keys.clear()
+
+
+candidate_pools = CandidatePoolCache()
+
+
+class LocalMMRRetriever(BaseRetriever):
+    """Retriever running MMR locally over a cached ``fetch_k`` candidate pool."""
+
+    vectorstore: Any
+    retrieval_filter: Any = None
+    k: int = 4
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    catalog_version: Optional[str] = None
+    pool_cache: Any = None
+
+    def pool(self, query: str) -> CandidatePool:
+        cache = self.pool_cache or candidate_pools
+        return cache.get_pool(self.vectorstore, query, self.fetch_k, self.retrieval_filter, self.catalog_version)
+
+    def rerank(self, query: str, k: Optional[int] = None, lambda_mult: Optional[float] = None) -> List[Document]:
+        """Select from the cached pool with other ``k``/``lambda_mult`` values."""
+        return self.pool(query).select(
+            self.k if k is None else k,
+            self.lambda_mult if lambda_mult is None else lambda_mult,
+        )
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.rerank(query)
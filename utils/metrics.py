@@ -0,0 +1,212 @@
+"""In-process latency metrics for the RAG pipeline.
+
+Every pipeline run times its stages with a ``StageTimer`` (monotonic
+``time.perf_counter``), returns the durations in ``response["timings"]`` and
+records them in the process-wide ``metrics`` registry as
+``rag.stage.<stage>`` histograms. ``metrics.snapshot()`` reports count, mean
+and p50/p90/p95/p99 per histogram, and ``log_metrics_periodically`` writes
+the per-stage percentiles to the log at a fixed interval (``ui.py`` starts
+it per ``RAG.METRICS.log_interval_s``), so tail latency per stage is visible
+without LangSmith. Counters (``metrics.increment``), such as
+``rag.llm_skipped.low_relevance``, are logged alongside.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bounds in seconds, from in-memory lookups to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PERCENTILES = (50, 90, 95, 99)
+DEFAULT_LOG_INTERVAL_S = 300.0
+
+
+def _nearest_rank(samples: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile ``q`` (0-100) of sorted ``samples``."""
+    if not samples:
+        return None
+    return samples[max(1, math.ceil(q / 100 * len(samples))) - 1]
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles.
+
+    Parameters
+    ----------
+    buckets : sequence of float
+        Increasing bucket upper bounds; an implicit ``+Inf`` bucket follows.
+    window : int, default=2048
+        Number of most recent samples kept to compute percentiles.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+            self._recent.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile ``q`` (0-100) over the recent window."""
+        with self._lock:
+            samples = sorted(self._recent)
+        return _nearest_rank(samples, q)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._recent)
+            summary: Dict[str, Any] = {
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+                "max": self.max if self.count else None,
+            }
+        for q in PERCENTILES:
+            summary[f"p{q}"] = _nearest_rank(samples, q)
+        return summary
+
+
+class MetricsRegistry:
+    """Named histograms and counters shared by all requests in the process."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.default_buckets = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._logged_count = 0
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.default_buckets))
+        return histogram
+
+    def observe(self, name: str, value: float) -> None:
+        self.histogram(name).observe(value)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def counters(self) -> Dict[str, float]:
+        """Return ``{name: total}`` for every counter."""
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return ``{name: summary}`` for every histogram."""
+        return {name: self._histograms[name].summary() for name in sorted(self._histograms)}
+
+    def summary_lines(self) -> List[str]:
+        """Return one line per histogram (count and p50/p95/p99 in milliseconds) and per counter."""
+        lines = []
+        for name, summary in self.snapshot().items():
+            quantiles = "/".join(f"{summary[f'p{q}'] * 1e3:.1f}" for q in (50, 95, 99))
+            lines.append(f"{name} n={summary['count']} p50/p95/p99={quantiles} ms")
+        lines += [f"{name} total={total:g}" for name, total in self.counters().items()]
+        return lines
+
+    def log_summary(self, level: int = logging.INFO) -> bool:
+        """Log ``summary_lines`` if anything was observed since the last call.
+
+        Returns whether a summary was logged.
+        """
+        count = sum(histogram.count for histogram in list(self._histograms.values())) + sum(self.counters().values())
+        with self._lock:
+            if count == self._logged_count:
+                return False
+            self._logged_count = count
+        logger.log(level, "Pipeline metrics:\n  %s", "\n  ".join(self.summary_lines()))
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._logged_count = 0
+
+
+metrics = MetricsRegistry()
+
+
+def log_metrics_periodically(
+    interval_s: float = DEFAULT_LOG_INTERVAL_S, registry: Optional[MetricsRegistry] = None
+) -> threading.Thread:
+    """Start a daemon thread calling ``registry.log_summary()`` every ``interval_s`` seconds.
+
+    Defaults to the process-wide ``metrics``; intervals without new
+    observations log nothing.
+    """
+    registry = metrics if registry is None else registry
+
+    def run() -> None:
+        while True:
+            time.sleep(interval_s)
+            try:
+                registry.log_summary()
+            except Exception as e:
+                logger.warning("Could not log pipeline metrics: %s", e)
+
+    thread = threading.Thread(target=run, name="metrics-log", daemon=True)
+    thread.start()
+    return thread
+
+
+class StageTimer:
+    """Collect per-stage durations, in seconds, for one pipeline run.
+
+    A stage timed more than once accumulates. ``timings`` can be placed in
+    the response dict before the run finishes; ``finish`` adds ``total`` and
+    records every stage in the registry.
+    """
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call ``fn`` and time it as stage ``name``; usable with ``asyncio.to_thread``."""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self, registry: Optional[MetricsRegistry] = None, prefix: str = "rag") -> Dict[str, float]:
+        """Record ``total`` and export all stages as ``<prefix>.stage.<name>``."""
+        self.timings["total"] = time.perf_counter() - self._start
+        registry = metrics if registry is None else registry
+        for name, seconds in self.timings.items():
+            registry.observe(f"{prefix}.stage.{name}", seconds)
+        return self.timings
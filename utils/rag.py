@@ -1,20 +1,34 @@
 import os
-import re
+import time
+import asyncio
 import logging
-from typing import List, Tuple, Optional
+from typing import TYPE_CHECKING, Any, Iterator, List, Mapping, Tuple, Optional
 from typing_extensions import Annotated, TypedDict
 import pandas as pd
-from functools import lru_cache
-from qdrant_client.http import models  # for running filters on the metadata
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.rate_limiters import BaseRateLimiter, InMemoryRateLimiter
 from langsmith import traceable  # RAG pipeline instrumentation platform
-from .filter import build_retrieval_filter, catalog_filter
+from .filter import CompiledFilter, get_catalog_metadata, resolve_retrieval_filter
 from uscgaux import stu
 from .backends_bridge import (
     get_vectordb_connector,
     fetch_table_and_date_from_catalog,
 )
-from .chat_model_factory import create_chat_model
+from .chat_model_factory import get_chat_model
+from .resource_pool import registry
+from .enrichment import get_enrichment_store, get_question_enricher, read_mapping_csv
+from .fingerprint import fingerprint
+from .metrics import StageTimer
+from .context_packer import get_tokenizer, pack_context_for_config
+from .dedup import DEFAULT_THRESHOLD as DEFAULT_DEDUP_THRESHOLD, dedupe_documents
+from .retrieval_cache import make_retrieval_key, retrieval_cache
+from .embedding_cache import with_query_embedding_cache
+from .local_mmr import LocalMMRRetriever
+from .relevance import relevance_gate, relevance_scores, with_relevance_scores
+from .metrics import metrics
+
+if TYPE_CHECKING:
+    from qdrant_client.http import models  # for running filters on the metadata
 
 
 
@@ -27,13 +41,20 @@ if not logger.handlers:
 # retrieval filter function is defined in filter.py
 
 
-def get_retriever(retrieval_filter: Optional[models.Filter]):
+def get_retriever(retrieval_filter: Optional["models.Filter"], catalog_version: Optional[str] = None):
     """Create a document retriever from the active vector store with filters.
 
+    ``RAG.RETRIEVAL.search_type`` is passed to ``as_retriever``, except
+    ``"local_mmr"``, which returns a ``LocalMMRRetriever`` running MMR in
+    process over a cached candidate pool (see ``utils.local_mmr``). Both
+    record each document's similarity score (see ``utils.relevance``).
+
     Parameters
     ----------
     retrieval_filter : Optional[models.Filter]
         Optional Qdrant metadata filter generated by ``build_retrieval_filter``.
+    catalog_version : str, optional
+        Catalog modified time; keys ``local_mmr`` candidate pools.
 
     Returns
     -------
@@ -48,8 +69,17 @@ def get_retriever(retrieval_filter: Optional[models.Filter]):
     fetch_k = config["RAG"]["RETRIEVAL"]["fetch_k"]
     lambda_mult = config["RAG"]["RETRIEVAL"]["lambda_mult"]
 
-    vectordb = get_vectordb_connector()
-    qdrant = vectordb.get_langchain_vectorstore()
+    qdrant = get_vectorstore()
+
+    if search_type == "local_mmr":
+        return LocalMMRRetriever(
+            vectorstore=qdrant,
+            retrieval_filter=retrieval_filter,
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            catalog_version=catalog_version,
+        )
 
     retriever = qdrant.as_retriever(
         search_type=search_type,
@@ -60,7 +90,33 @@ def get_retriever(retrieval_filter: Optional[models.Filter]):
             "filter": retrieval_filter,
         },  # If None, no metadata filtering occurs
     )
-    return retriever
+    return with_relevance_scores(retriever)
+
+
+
+def get_vectorstore(vectordb: Any = None, settings: Optional[Mapping[str, Any]] = None):
+    """Return the pooled LangChain vector store for the active connector.
+
+    The vector store (and its Qdrant client) is built once per connector and
+    reused across requests; only the lightweight retriever wrapper around it
+    is created per call, since its filter changes with every question. The
+    pooled store is built from the connector's store with query embeddings
+    cached per ``RAG.EMBEDDING_CACHE`` (see ``utils.embedding_cache``).
+
+    ``vectordb`` and ``settings`` (the ``RAG.EMBEDDING_CACHE`` section)
+    default to the active connector and config; passing both avoids the
+    Streamlit caches, e.g. from background threads.
+    """
+    if vectordb is None:
+        vectordb = get_vectordb_connector()
+    if settings is None:
+        settings = stu.cached_load_config_by_context()["RAG"].get("EMBEDDING_CACHE") or {}
+    # Keying on the connector object keeps it referenced, so its id is never reused
+    return registry.get(
+        "vectorstore",
+        (id(vectordb), vectordb, fingerprint(settings)),
+        lambda: with_query_embedding_cache(vectordb.get_langchain_vectorstore(), settings),
+    )
 
 
 
@@ -69,18 +125,14 @@ ACRONYMS_PATH = os.path.join(BASE_DIR, 'config', 'acronyms.csv')
 TERMS_PATH = os.path.join(BASE_DIR, 'config', 'terms.csv')
 
 
-@lru_cache(maxsize=64)
 def get_retrieval_context_csv(file_path: str) -> dict:
     """
     Reads a CSV file into a dictionary.
-    """
-    df = pd.read_csv(file_path)
-
-    if df.shape[1] < 2:
-        raise ValueError("CSV must contain at least two columns")
 
-    context_dict: dict = dict(zip(df.iloc[:, 0], df.iloc[:, 1]))
-    return context_dict
+    Reads the file on every call; per-question enrichment uses the compiled,
+    versioned matchers from ``utils.enrichment`` instead.
+    """
+    return read_mapping_csv(file_path)
 
 
 
@@ -93,7 +145,7 @@ def enrich_question(user_question: str, acronyms_csv_path: str, terms_csv_path:
     """
     Enrich a user question by:
     - Expanding acronyms to their full forms
-    - Adding explanations for defined terms
+    - Adding explanations for defined terms (each distinct explanation once)
 
     Parameters
     ----------
@@ -109,51 +161,58 @@ def enrich_question(user_question: str, acronyms_csv_path: str, terms_csv_path:
     str
         The enriched version of the user question.
     """
-    acronyms_dict = get_retrieval_context_csv(acronyms_csv_path)
-    terms_dict = get_retrieval_context_csv(terms_csv_path)
+    return get_question_enricher(acronyms_csv_path, terms_csv_path).enrich(user_question)
 
-    enriched_question = user_question
 
-    # Replace acronyms with full form
-    for acronym, full_form in acronyms_dict.items():
-        if pd.notna(acronym) and pd.notna(full_form):
-            enriched_question = re.sub(
-                r'\b' + re.escape(str(acronym)) + r'\b',
-                str(full_form),
-                enriched_question
-            )
+def enrichment_version() -> tuple[str, str]:
+    """Return the content hashes of the acronym and term CSVs used by ``enrich_question``.
+
+    Part of answer cache keys, so editing either CSV invalidates answers.
+    """
+    return get_enrichment_store(ACRONYMS_PATH, TERMS_PATH).content_key()
 
-    # Add explanations for terms
-    for term, explanation in terms_dict.items():
-        if pd.notna(term) and pd.notna(explanation):
-            if str(term) in enriched_question:
-                enriched_question += f" ({str(explanation)})"
 
-    return enriched_question
+SYSTEM_PROMPT = (
+    "The user is a {identity}."
+    "Use the following pieces of context to answer the users question. "
+    "INCLUDES ALL OF THE DETAILS IN YOUR RESPONSE, INDLUDING REQUIREMENTS AND REGULATIONS. "
+    "National Workshops are required for boat crew, aviation, and telecommunications when they are offered. "
+    "Include Auxiliary Core Training (AUXCT) for questions on certifications or officer positions. "
+    "If you don't know the answer, just say I don't know. \n----------------\n{context}"
+)
 
 
 def create_prompt():
-    system_prompt = (
-        "The user is a {identity}."
-        "Use the following pieces of context to answer the users question. "
-        "INCLUDES ALL OF THE DETAILS IN YOUR RESPONSE, INDLUDING REQUIREMENTS AND REGULATIONS. "
-        "National Workshops are required for boat crew, aviation, and telecommunications when they are offered. "
-        "Include Auxiliary Core Training (AUXCT) for questions on certifications or officer positions. "
-        "If you don't know the answer, just say I don't know. \n----------------\n{context}"
-    )
     return ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        ("system", SYSTEM_PROMPT),
         ("human", "{enriched_question}"),
     ])
 
 
+def pipeline_fingerprint(config: Mapping[str, Any]) -> str:
+    """Fingerprint the settings that change an answer for the same question.
+
+    Covers the generation settings (``RAG_ALL``), retrieval settings
+    (``RAG.RETRIEVAL``), the context token budget (``RAG.CONTEXT``), the
+    relevance gate (``RAG.RELEVANCE_GATE``) and the system prompt. Used in
+    answer cache keys.
+    """
+    return fingerprint(
+        config["RAG_ALL"],
+        config["RAG"]["RETRIEVAL"],
+        config["RAG"].get("CONTEXT", {}),
+        config["RAG"].get("RELEVANCE_GATE", {}),
+        SYSTEM_PROMPT,
+    )
+
+
 
 # Function to format documents (doesn't require caching)
 def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 
-def attach_catalog_metadata(docs: List, catalog_df: pd.DataFrame) -> List:
+def attach_catalog_metadata(docs: List, catalog_df: pd.DataFrame, catalog_version: Optional[str] = None) -> List:
     """Merge catalog metadata into each document's metadata using ``pdf_id``.
 
     Parameters
@@ -162,21 +221,20 @@ def attach_catalog_metadata(docs: List, catalog_df: pd.DataFrame) -> List:
         Documents returned from Qdrant.
     catalog_df : pandas.DataFrame
         DataFrame containing catalog metadata with a ``pdf_id`` column.
+    catalog_version : str, optional
+        Catalog modified time; the ``pdf_id`` lookup is built once per version.
 
     Returns
     -------
     list
         Documents with metadata updated from the catalog.
     """
-    if "pdf_id" not in catalog_df.columns:
-        return docs
-
-    indexed = catalog_df.set_index("pdf_id")
+    lookup = get_catalog_metadata(catalog_df, catalog_version)
     for doc in docs:
         pdf_id = doc.metadata.get("pdf_id")
-        if pdf_id and pdf_id in indexed.index:
-            row = indexed.loc[pdf_id]
-            doc.metadata.update(row.to_dict())
+        record = lookup.get(pdf_id) if pdf_id else None
+        if record is not None:
+            doc.metadata.update(record)
     return docs
 
 
@@ -194,6 +252,263 @@ class AnswerWithSources(TypedDict):
 
 
 # --- Main RAG pipeline function ---
+IDENTITY = "Auxiliary member"
+NO_DOCUMENTS_ANSWER = (
+    "❗️I couldn't find any documents that match your filters. Please try relaxing your filters."
+)
+LOW_RELEVANCE_ANSWER = (
+    "❗️I couldn't find anything in the documents that answers this question closely enough. "
+    "Please try rephrasing your question or relaxing your filters."
+)
+
+
+def _new_response(user_question: str, enriched_question: str, timer: Optional[StageTimer] = None) -> dict:
+    """Return the initial response dict returned by every pipeline variant.
+
+    ``timings`` is the timer's live dict of stage durations in seconds; it is
+    complete, including ``total``, once the pipeline returns.
+    """
+    return {
+        "answer": "⚠️ Something went wrong before answering.",
+        "sources": [],
+        "user_question": user_question,
+        "enriched_question": enriched_question,
+        "context": [],
+        "timings": timer.timings if timer is not None else {},
+    }
+
+
+def get_indexed_payload_fields() -> dict[str, str]:
+    """Return ``{payload key: index type}`` for the active Qdrant collection.
+
+    Read once per pooled vector store. Returns an empty dict when the schema
+    cannot be read, which makes the filter compiler fall back to id lists.
+    """
+    vectorstore = get_vectorstore()
+
+    def read_schema() -> dict[str, str]:
+        try:
+            info = vectorstore.client.get_collection(vectorstore.collection_name)
+            return {
+                key: str(getattr(schema.data_type, "value", schema.data_type))
+                for key, schema in (info.payload_schema or {}).items()
+            }
+        except Exception as e:
+            logger.warning("Could not read Qdrant payload schema: %s", e)
+            return {}
+
+    return registry.get("payload_schema", (id(vectorstore), vectorstore), read_schema)
+
+
+def _resolve_retrieval_filter(
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]],
+    config: Mapping[str, Any],
+    timer: Optional[StageTimer] = None,
+) -> Tuple[pd.DataFrame, str, CompiledFilter]:
+    """Load the catalog and compile the Qdrant filter for ``filter_conditions``.
+
+    Returns the catalog, its version (modified time) and the compiled filter.
+
+    ``RAG.RETRIEVAL.filter_mode`` selects the filter shape: ``"ids"``
+    (default, allowed pdf_id list) or ``"auto"`` (payload-native conditions
+    or an excluded-id complement when smaller; see
+    ``compile_retrieval_filter``).
+    """
+    logger.info("Received filter conditions from user: %s", filter_conditions)
+    timer = timer or StageTimer()
+
+    with timer.stage("catalog_load"):
+        catalog_df, catalog_version = fetch_table_and_date_from_catalog()
+
+    with timer.stage("catalog_filter"):
+        mode = config["RAG"]["RETRIEVAL"].get("filter_mode", "ids")
+        indexed_fields = get_indexed_payload_fields() if mode == "auto" else None
+        # Memoized per filter combination and catalog version
+        compiled = resolve_retrieval_filter(catalog_df, filter_conditions, catalog_version, mode, indexed_fields)
+    logger.info(
+        "Retrieval filter allows %d documents (%s, %d bytes)",
+        len(compiled.allowed_pdf_ids),
+        compiled.strategy,
+        compiled.payload_bytes,
+    )
+    return catalog_df, catalog_version, compiled
+
+
+def _dedupe_context(response: dict, context: list, config: Mapping[str, Any]) -> list:
+    """Drop duplicate chunks and record ``response["dedup"]``."""
+    threshold = (config["RAG"].get("CONTEXT") or {}).get("dedup_threshold", DEFAULT_DEDUP_THRESHOLD)
+    result = dedupe_documents(context, threshold)
+    removed_tokens = 0
+    if result.removed:
+        tokenizer = get_tokenizer(config["RAG_ALL"].get("generation_model"))
+        removed_tokens = sum(len(tokenizer.encode(doc.page_content or "")) for doc in result.removed)
+        logger.info("Removed %d duplicate chunks (%d tokens)", len(result.removed), removed_tokens)
+    response["dedup"] = {"removed": len(result.removed), "removed_tokens": removed_tokens}
+    return result.docs
+
+
+def _accept_context(
+    response: dict,
+    context: list,
+    catalog_df: pd.DataFrame,
+    timer: Optional[StageTimer] = None,
+    config: Optional[Mapping[str, Any]] = None,
+) -> Tuple[list, bool]:
+    """Dedupe retrieved documents, attach catalog metadata, pack and record them.
+
+    Exact and near-duplicate chunks are removed first, keeping the
+    best-ranked copy (``RAG.CONTEXT.dedup_threshold``, see ``utils.dedup``);
+    ``response["dedup"]`` records how many chunks and tokens that removed.
+    The documents are then packed into the ``RAG.CONTEXT.max_tokens`` budget (see
+    ``utils.context_packer``); only the packed documents are returned and
+    recorded as ``response["context"]``, so sources match what the model
+    saw. ``response["context_tokens"]`` is the packed context size and
+    ``response["context_packing"]`` the packing counters.
+
+    Returns the documents and whether generation should proceed. Generation
+    is skipped when the retriever finds no documents, or when no document's
+    similarity score reaches ``RAG.RELEVANCE_GATE.min_score``; ``response``
+    then already carries the user-facing answer. ``response["relevance_scores"]``
+    lists the retrieved documents' scores, and every skipped LLM call is
+    counted in ``metrics`` as ``rag.llm_skipped.<reason>``.
+    """
+    logger.info("📄 Retrieved context: %d documents", len(context))
+    if not context:
+        response["answer"] = NO_DOCUMENTS_ANSWER
+        metrics.increment("rag.llm_skipped.no_documents")
+        return context, False
+
+    config = config or stu.cached_load_config_by_context()
+    response["relevance_scores"] = relevance_scores(context)
+    min_score = (config["RAG"].get("RELEVANCE_GATE") or {}).get("min_score")
+    passed, best = relevance_gate(context, min_score)
+    if not passed:
+        logger.info("Best relevance score %.3f is below %.3f; skipping the LLM", best, min_score)
+        response["answer"] = LOW_RELEVANCE_ANSWER
+        metrics.increment("rag.llm_skipped.low_relevance")
+        return [], False
+
+    timer = timer or StageTimer()
+    with timer.stage("dedup"):
+        context = _dedupe_context(response, context, config)
+    # Attach catalog metadata based on pdf_id
+    with timer.stage("attach_metadata"):
+        context = attach_catalog_metadata(context, catalog_df, response.get("catalog_version"))
+    with timer.stage("context_pack"):
+        packed = pack_context_for_config(context, config)
+    logger.info(
+        "Packed %d of %d documents into %d context tokens (budget %s)",
+        len(packed.docs), len(context), packed.tokens, packed.budget,
+    )
+    response["context"] = packed.docs
+    response["context_tokens"] = packed.tokens
+    response["context_packing"] = packed.stats()
+    return packed.docs, True
+
+
+def _retrieval_key(response: dict, compiled_filter: CompiledFilter, config: Mapping[str, Any]) -> Optional[str]:
+    """Return the retrieval cache key for ``response``, or ``None`` to bypass the cache.
+
+    The cache is bypassed without a catalog version (nothing to invalidate
+    on) and when ``RAG.RETRIEVAL_CACHE.enabled`` is false.
+    """
+    version = response.get("catalog_version")
+    if not version or version == "--":
+        return None
+    if not (config["RAG"].get("RETRIEVAL_CACHE") or {}).get("enabled", True):
+        return None
+    return make_retrieval_key(
+        response["enriched_question"], compiled_filter.filter_key, config["RAG"]["RETRIEVAL"], version
+    )
+
+
+def _cached_documents(response: dict, retrieval_key: Optional[str]) -> Optional[list]:
+    """Return cached documents for ``retrieval_key`` and record ``response["retrieval_cache"]``."""
+    response["retrieval_cache"] = "off" if retrieval_key is None else "miss"
+    if retrieval_key is None:
+        return None
+    try:
+        documents = retrieval_cache.get(retrieval_key, get_vectorstore)
+    except Exception as e:
+        logger.warning("Retrieval cache lookup failed: %s", e)
+        return None
+    if documents is not None:
+        response["retrieval_cache"] = "hit"
+        logger.info("Retrieval cache hit (%d documents)", len(documents))
+    return documents
+
+
+def _store_documents(retrieval_key: Optional[str], documents: list) -> None:
+    if retrieval_key is not None:
+        retrieval_cache.put(retrieval_key, documents)
+
+
+def _retrieve_context(
+    user_question: str,
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]],
+    config: Mapping[str, Any],
+    timer: StageTimer,
+) -> Tuple[dict, list, bool]:
+    """Enrich the question, filter the catalog and retrieve context documents.
+
+    Shared by ``rag`` and ``rag_stream``. Stage durations are recorded on
+    ``timer``. Retrieval goes through ``utils.retrieval_cache``;
+    ``response["retrieval_cache"]`` is ``"hit"``, ``"miss"`` or ``"off"``.
+
+    Returns
+    -------
+    tuple[dict, list, bool]
+        The initialized response dict, the retrieved documents with catalog
+        metadata attached, and whether generation should proceed.
+    """
+    logger.info("🤖 Initiated RAG pipeline")
+    # Enrich the question
+    with timer.stage("enrich"):
+        enriched_question = enrich_question(user_question, ACRONYMS_PATH, TERMS_PATH)
+    logger.info("Question has been enriched")
+    response = _new_response(user_question, enriched_question, timer)
+
+    # build filter (optional) and retriever
+    catalog_df, catalog_version, compiled_filter = _resolve_retrieval_filter(filter_conditions, config, timer)
+    response["catalog_version"] = catalog_version
+    response["filter_payload_bytes"] = compiled_filter.payload_bytes
+
+    # Prepare tracing metadata from config
+    _rag_all = config["RAG_ALL"]  # attach full RAG_ALL as retriever metadata
+    with timer.stage("retriever_build"):
+        retriever = get_retriever(compiled_filter.retrieval_filter, catalog_version).with_config(metadata=_rag_all)
+    
+    
+    # Retrieve relevant documents using the enriched question, or reuse a
+    # cached result for the same question, filter, settings and catalog
+    retrieval_key = _retrieval_key(response, compiled_filter, config)
+    context: list = []
+    try:
+        with timer.stage("retrieve"):
+            documents = _cached_documents(response, retrieval_key)
+            if documents is None:
+                documents = retriever.invoke(enriched_question)
+                _store_documents(retrieval_key, documents)
+        context, proceed = _accept_context(response, documents, catalog_df, timer, config)
+        if not proceed:
+            return response, context, False
+    except Exception as e:
+        logger.exception("Retriever Error: %s", e)
+
+    return response, context, True
+
+
+def _format_prompt(response: dict, context: list) -> str:
+    """Render the chat prompt for the enriched question and its context."""
+    prompt = create_prompt()
+    prompt_input = {
+        "identity": IDENTITY,
+        "enriched_question": response["enriched_question"],
+        "context": format_docs(context),  # list of documents from vectorstore
+    }
+    return prompt.format(**prompt_input)
+
+
 @traceable(run_type="chain")
 def rag(
     user_question: str,
@@ -218,87 +533,309 @@ def rag(
     -------
     dict
         A response dictionary with keys: answer, sources, user_question,
-        enriched_question, and context.
+        enriched_question, context, context_tokens (size of the packed
+        context) and timings (seconds per pipeline stage, plus ``total``).
     """
+    timer = StageTimer()
 
     # Load generation settings from config (hard fail if missing)
     config = stu.cached_load_config_by_context()
-    
-    _model = config["RAG_ALL"]["generation_model"]  # e.g. "gpt-4o-mini"
-    _temperature = config["RAG_ALL"]["temperature"]  # e.g. 0.7
 
     # new approach allows config to determin chat model
-    llm = create_chat_model(config)
+    with timer.stage("chat_model"):
+        llm = get_chat_model(config)
+
+    response, context, proceed = _retrieve_context(user_question, filter_conditions, config, timer)
+    if proceed:
+        # Prepare the prompt input
+        try:
+            with timer.stage("prompt_format"):
+                prompt = _format_prompt(response, context)
+            with timer.stage("llm"):
+                llm_response = llm.invoke(prompt)
+            response["answer"] = llm_response.content
+            response["sources"] = [doc.metadata.get("title", "") for doc in context]
+            logger.info("🧠 Received LLM response")
+        except Exception as e:
+            logger.exception("LLM Error: %s", e)
+            response["answer"] = f"⚠️ There was a problem generating a response: {e}"
+    timer.finish()
+    return response
 
-    logger.info("🤖 Initiated RAG pipeline")
-    # Enrich the question
-    enriched_question = enrich_question(user_question, ACRONYMS_PATH, TERMS_PATH)
-    logger.info("Question has been enriched")
-    
-    # Set the user identity
-    identity = "Auxiliary member"
 
-    # Initialize response dict
-    response = {
-        "answer": "⚠️ Something went wrong before answering.",
-        "sources": [],
-        "user_question": user_question,
-        "enriched_question": enriched_question,
-        "context": [],
-    }
-    
-    # build filter (optional) and retriever
-    logger.info("Received filter conditions from user: %s", filter_conditions)
-    
-    catalog_df, _ = fetch_table_and_date_from_catalog()
-    allowed_ids = catalog_filter(catalog_df, filter_conditions)
-    retrieval_filter = build_retrieval_filter(
-        filter_conditions,
-        allowed_pdf_ids=allowed_ids,
+@traceable(run_type="chain")
+def rag_stream(
+    user_question: str,
+    timeout: int = 60,
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]] = None,
+    langsmith_extra: Optional[dict] = None,
+) -> Iterator[dict]:
+    """Run the RAG pipeline and stream the answer as it is generated.
+
+    Takes the same parameters as ``rag``. Yields event dicts in this order:
+
+    - ``{"type": "sources", "sources": [...], "context": [...]}`` once,
+      as soon as retrieval finishes
+    - ``{"type": "token", "content": str}`` for each answer chunk from the
+      chat model's ``stream()``
+    - ``{"type": "done", "response": dict}`` last, with the same response
+      dict ``rag`` would return
+
+    Yields
+    ------
+    dict
+        Pipeline events as described above.
+
+    The response's ``timings`` also include ``llm_first_token``, the time
+    from the start of the LLM call to its first chunk. ``llm`` covers the
+    whole stream, including time spent by the consumer between chunks.
+    """
+    timer = StageTimer()
+    config = stu.cached_load_config_by_context()
+    with timer.stage("chat_model"):
+        llm = get_chat_model(config)
+
+    response, context, proceed = _retrieve_context(user_question, filter_conditions, config, timer)
+    sources = [doc.metadata.get("title", "") for doc in context]
+    yield {"type": "sources", "sources": sources, "context": context}
+
+    if proceed:
+        chunks: List[str] = []
+        try:
+            with timer.stage("prompt_format"):
+                prompt = _format_prompt(response, context)
+            llm_start = time.perf_counter()
+            for chunk in llm.stream(prompt):
+                text = chunk.content if isinstance(chunk.content, str) else ""
+                if text:
+                    if not chunks:
+                        timer.record("llm_first_token", time.perf_counter() - llm_start)
+                        logger.info("🧠 Received first LLM token")
+                    chunks.append(text)
+                    yield {"type": "token", "content": text}
+            timer.record("llm", time.perf_counter() - llm_start)
+            response["answer"] = "".join(chunks)
+            response["sources"] = sources
+            logger.info("🧠 Received LLM response")
+        except Exception as e:
+            logger.exception("LLM Error: %s", e)
+            response["answer"] = f"⚠️ There was a problem generating a response: {e}"
+
+    timer.finish()
+    yield {"type": "done", "response": response}
+
+
+@traceable(run_type="chain")
+async def arag(
+    user_question: str,
+    timeout: int = 60,
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]] = None,
+    langsmith_extra: Optional[dict] = None,
+) -> dict:
+    """Async variant of ``rag`` that overlaps independent stages.
+
+    Chat model construction, question enrichment and catalog filtering do not
+    depend on each other, so they run concurrently in worker threads. The
+    retriever and chat model are then awaited through ``ainvoke``, which
+    releases the event loop while waiting on Qdrant and the LLM provider. One
+    process can therefore serve many questions concurrently.
+
+    Takes the same parameters and returns the same response dict as ``rag``.
+    Stages that run concurrently are timed individually, so their
+    ``timings`` can add up to more than ``total``.
+    """
+    timer = StageTimer()
+    config = await asyncio.to_thread(stu.cached_load_config_by_context)
+
+    logger.info("🤖 Initiated RAG pipeline (async)")
+    llm, enriched_question, (catalog_df, catalog_version, compiled_filter) = await asyncio.gather(
+        asyncio.to_thread(timer.timed, "chat_model", get_chat_model, config),
+        asyncio.to_thread(timer.timed, "enrich", enrich_question, user_question, ACRONYMS_PATH, TERMS_PATH),
+        asyncio.to_thread(_resolve_retrieval_filter, filter_conditions, config, timer),
     )
-    logger.info("Created retrieval filter: %s", retrieval_filter)
+    logger.info("Question has been enriched")
+    response = _new_response(user_question, enriched_question, timer)
+    response["catalog_version"] = catalog_version
+    response["filter_payload_bytes"] = compiled_filter.payload_bytes
+
+    with timer.stage("retriever_build"):
+        retriever = get_retriever(compiled_filter.retrieval_filter, catalog_version).with_config(metadata=config["RAG_ALL"])
+    retrieval_key = _retrieval_key(response, compiled_filter, config)
+    return await _aanswer(response, retriever, llm, catalog_df, timer=timer, retrieval_key=retrieval_key)
+
+
+async def _aanswer(
+    response: dict,
+    retriever: Any,
+    llm: Any,
+    catalog_df: pd.DataFrame,
+    rate_limiter: Optional[BaseRateLimiter] = None,
+    timer: Optional[StageTimer] = None,
+    retrieval_key: Optional[str] = None,
+) -> dict:
+    """Retrieve context for ``response["enriched_question"]`` and generate the answer.
 
-    # Prepare tracing metadata from config
-    _rag_all = config["RAG_ALL"]  # attach full RAG_ALL as retriever metadata
-    retriever = get_retriever(retrieval_filter=retrieval_filter).with_config(metadata=_rag_all)
-    
-    
-    # Retrieve relevant documents using the enriched question
+    Shared by ``arag`` and ``arag_batch``. ``rate_limiter`` is acquired just
+    before the LLM call, so retrieval is never throttled; time spent waiting
+    for it is reported as the ``rate_limit`` stage. ``retrieval_key`` enables
+    the retrieval cache (see ``_retrieval_key``). ``timer`` is finished
+    before returning.
+    """
+    timer = timer or StageTimer()
+    response["timings"] = timer.timings
     context: list = []
+    proceed = True
     try:
-        context = retriever.invoke(enriched_question)
-        logger.info("📄 Retrieved context: %d documents", len(context))
-        if not context:
-            response["answer"] = (
-                "❗️I couldn't find any documents that match your filters. Please try relaxing your filters."
-            )
-            return response
-
-        # Attach catalog metadata based on pdf_id
-        context = attach_catalog_metadata(context, catalog_df)
-        response["context"] = context
-
+        with timer.stage("retrieve"):
+            documents = await asyncio.to_thread(_cached_documents, response, retrieval_key)
+            if documents is None:
+                documents = await retriever.ainvoke(response["enriched_question"])
+                _store_documents(retrieval_key, documents)
+        context, proceed = _accept_context(response, documents, catalog_df, timer)
     except Exception as e:
         logger.exception("Retriever Error: %s", e)
-    
-    # Prepare the prompt input
-    try:
-        prompt = create_prompt()
-        prompt_input = {
-            "identity": identity,
-            "enriched_question": enriched_question,
-            "context": format_docs(context),  # list of documents from vectorstore
-        }
-        llm_response = llm.invoke(prompt.format(**prompt_input))
-        response["answer"] = llm_response.content
-        response["sources"] = [doc.metadata.get("title", "") for doc in context]
-        logger.info("🧠 Received LLM response")
-    except Exception as e:
-        logger.exception("LLM Error: %s", e)
-        response["answer"] = f"⚠️ There was a problem generating a response: {e}"
+
+    if proceed:
+        try:
+            if rate_limiter is not None:
+                with timer.stage("rate_limit"):
+                    await rate_limiter.aacquire()
+            with timer.stage("prompt_format"):
+                prompt = _format_prompt(response, context)
+            with timer.stage("llm"):
+                llm_response = await llm.ainvoke(prompt)
+            response["answer"] = llm_response.content
+            response["sources"] = [doc.metadata.get("title", "") for doc in context]
+            logger.info("🧠 Received LLM response")
+        except Exception as e:
+            logger.exception("LLM Error: %s", e)
+            response["answer"] = f"⚠️ There was a problem generating a response: {e}"
+    timer.finish()
     return response
 
 
+# --- Batch API for evaluation runs and cache warmup ---
+# Default LLM request rate per provider when RAG_ALL.requests_per_second is
+# not set. Local Ollama models are limited by max_concurrency only.
+DEFAULT_REQUESTS_PER_SECOND: dict[str, Optional[float]] = {
+    "ChatOpenAI": 2.0,
+    "ChatOllama": None,
+}
+
+
+def create_rate_limiter(config: Mapping[str, Any]) -> Optional[BaseRateLimiter]:
+    """Return a token-bucket rate limiter for the configured chat model provider.
+
+    Reads ``RAG_ALL.requests_per_second`` when present, otherwise falls back
+    to ``DEFAULT_REQUESTS_PER_SECOND`` for the provider. Returns ``None`` when
+    the provider should not be rate limited.
+    """
+    rag_all = config["RAG_ALL"]
+    rps = rag_all.get(
+        "requests_per_second",
+        DEFAULT_REQUESTS_PER_SECOND.get(rag_all.get("langchain_chat_model", "")),
+    )
+    if not rps:
+        return None
+    return InMemoryRateLimiter(
+        requests_per_second=float(rps),
+        check_every_n_seconds=0.05,
+        max_bucket_size=max(1.0, float(rps)),
+    )
+
+
+@traceable(run_type="chain", name="rag")
+async def _arag_batch_item(
+    user_question: str,
+    retriever: Any,
+    llm: Any,
+    catalog_df: pd.DataFrame,
+    rate_limiter: Optional[BaseRateLimiter],
+    catalog_version: Optional[str] = None,
+    compiled_filter: Optional[CompiledFilter] = None,
+    config: Optional[Mapping[str, Any]] = None,
+) -> dict:
+    timer = StageTimer()
+    enriched_question = await asyncio.to_thread(
+        timer.timed, "enrich", enrich_question, user_question, ACRONYMS_PATH, TERMS_PATH
+    )
+    response = _new_response(user_question, enriched_question, timer)
+    response["catalog_version"] = catalog_version
+    retrieval_key = None
+    if compiled_filter is not None and config is not None:
+        retrieval_key = _retrieval_key(response, compiled_filter, config)
+    return await _aanswer(response, retriever, llm, catalog_df, rate_limiter, timer, retrieval_key)
+
+
+async def arag_batch(
+    questions: List[str],
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]] = None,
+    max_concurrency: int = 4,
+) -> List[dict]:
+    """Answer many questions concurrently with shared pipeline resources.
+
+    One chat model, one retriever and one catalog snapshot are built for the
+    whole batch. At most ``max_concurrency`` questions are in flight, and LLM
+    calls are additionally throttled by ``create_rate_limiter``. Each question
+    is traced as its own ``rag`` run.
+
+    Parameters
+    ----------
+    questions : list[str]
+        Questions to answer.
+    filter_conditions : dict, optional
+        Filter selections applied to every question.
+    max_concurrency : int, default=4
+        Maximum number of questions processed at the same time.
+
+    Returns
+    -------
+    list[dict]
+        One item per question, in input order, with keys ``question``,
+        ``response`` (the ``rag`` response dict, or ``None`` on error),
+        ``error`` (``None`` or the error message) and ``elapsed_s``.
+    """
+    config = await asyncio.to_thread(stu.cached_load_config_by_context)
+    llm, (catalog_df, catalog_version, compiled_filter) = await asyncio.gather(
+        asyncio.to_thread(get_chat_model, config),
+        asyncio.to_thread(_resolve_retrieval_filter, filter_conditions, config),
+    )
+    retriever = get_retriever(compiled_filter.retrieval_filter, catalog_version).with_config(metadata=config["RAG_ALL"])
+    rate_limiter = create_rate_limiter(config)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(question: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            item: dict = {"question": question, "response": None, "error": None}
+            try:
+                item["response"] = await _arag_batch_item(
+                    question, retriever, llm, catalog_df, rate_limiter, catalog_version, compiled_filter, config
+                )
+                item["response"]["filter_payload_bytes"] = compiled_filter.payload_bytes
+            except Exception as e:
+                logger.exception("Batch item failed: %s", question)
+                item["error"] = f"{type(e).__name__}: {e}"
+            item["elapsed_s"] = time.perf_counter() - start
+            return item
+
+    logger.info("🤖 Running RAG batch of %d questions (max_concurrency=%d)", len(questions), max_concurrency)
+    return list(await asyncio.gather(*(run_one(q) for q in questions)))
+
+
+def rag_batch(
+    questions: List[str],
+    filter_conditions: Optional[dict[str, str | bool | None | list[str]]] = None,
+    max_concurrency: int = 4,
+) -> List[dict]:
+    """Synchronous wrapper around ``arag_batch`` for scripts and tests.
+
+    Inside a running event loop (e.g. Jupyter), ``await arag_batch(...)``
+    instead.
+    """
+    return asyncio.run(arag_batch(questions, filter_conditions, max_concurrency=max_concurrency))
+
+
 # Adapter for running evals to LangSmith. No longer used
 def rag_for_eval(input: dict) -> dict:
     # Accepts a input dict from langsmith.evaluation.LangChainStringEvaluator
@@ -308,12 +845,15 @@ def rag_for_eval(input: dict) -> dict:
     return {"answer": response["answer"]}
 
 
-def create_source_lists(response: dict, catalog_df: pd.DataFrame) -> Tuple:
+def create_source_lists(response: dict, catalog_df: pd.DataFrame, catalog_version: Optional[str] = None) -> Tuple:
     """
     Creates and returns both the short and long source lists as strings.
 
     Args:
         response (dict): Contains a 'context' key with a list of document objects.
+        catalog_df (pd.DataFrame): Catalog with a 'pdf_id' column.
+        catalog_version (str, optional): Catalog modified time; defaults to
+            response['catalog_version'] when the pipeline recorded it.
 
     Returns:
         tuple: (short_source_list, long_source_list) where:
@@ -324,11 +864,11 @@ def create_source_lists(response: dict, catalog_df: pd.DataFrame) -> Tuple:
     long_source_markdown_list = []
 
 
-    indexed = catalog_df.set_index("pdf_id") if "pdf_id" in catalog_df.columns else None
+    lookup = get_catalog_metadata(catalog_df, catalog_version or response.get("catalog_version"))
 
     for i, doc in enumerate(response['context'], start=1):
         pdf_id = doc.metadata.get('pdf_id')
-        row = indexed.loc[pdf_id] if indexed is not None and pdf_id in indexed.index else {}
+        row = lookup.get(pdf_id, {}) if pdf_id else {}
 
         title = row.get('title', '')
         date = row.get('issue_date', '')[:4]
@@ -353,3 +893,8 @@ def create_source_lists(response: dict, catalog_df: pd.DataFrame) -> Tuple:
     long_source_list = '  \n'.join(long_source_markdown_list)
     
     return short_source_list, long_source_list
+
+
+# Set last, so a module seen in sys.modules mid-import is not taken as usable
+# (see utils.health.check_qdrant)
+PIPELINE_READY = True
@@ -0,0 +1,97 @@
+"""Similarity scores on retrieved chunks and the relevance gate.
+
+Retrieved documents carry their similarity to the query in
+``metadata["relevance_score"]``:
+
+- ``ScoredVectorStoreRetriever`` (``get_retriever`` upgrades the vector
+  store's ``mmr``/``similarity`` retriever to it) reads the scores Qdrant
+  returns alongside each point
+- ``LocalMMRRetriever`` takes them from its candidate pool
+
+For the cosine collections used here the score is the cosine similarity of
+the chunk to the query embedding. ``relevance_gate`` compares the best score
+with ``RAG.RELEVANCE_GATE.min_score``; when nothing clears it the pipeline
+returns ``LOW_RELEVANCE_ANSWER`` without calling the LLM.
+"""
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import VectorStoreRetriever
+
+
+SCORE_KEY = "relevance_score"
+
+
+class ScoredVectorStoreRetriever(VectorStoreRetriever):
+    """``VectorStoreRetriever`` that records each document's similarity score.
+
+    Handles ``mmr`` and ``similarity`` through the vector store's
+    ``*_with_score`` searches; other search types behave as in the parent
+    class and carry no scores.
+    """
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs: Any
+    ) -> List[Document]:
+        search_kwargs = self.search_kwargs | kwargs
+        if self.search_type == "mmr":
+            embedding = self.vectorstore.embeddings.embed_query(query)
+            scored = self.vectorstore.max_marginal_relevance_search_with_score_by_vector(embedding, **search_kwargs)
+        elif self.search_type == "similarity":
+            scored = self.vectorstore.similarity_search_with_score(query, **search_kwargs)
+        else:
+            return super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+        for doc, score in scored:
+            doc.metadata[SCORE_KEY] = float(score)
+        return [doc for doc, _ in scored]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, **kwargs: Any
+    ) -> List[Document]:
+        # QdrantVectorStore has no native async MMR search
+        return await run_in_executor(
+            None, self._get_relevant_documents, query, run_manager=run_manager.get_sync(), **kwargs
+        )
+
+
+def with_relevance_scores(retriever: Any) -> Any:
+    """Return ``retriever`` as a ``ScoredVectorStoreRetriever`` when it can score.
+
+    Applies to ``VectorStoreRetriever`` instances whose vector store offers
+    the scored MMR search (``QdrantVectorStore``); anything else is returned
+    unchanged.
+    """
+    if not isinstance(retriever, VectorStoreRetriever) or isinstance(retriever, ScoredVectorStoreRetriever):
+        return retriever
+    if not hasattr(retriever.vectorstore, "max_marginal_relevance_search_with_score_by_vector"):
+        return retriever
+    return ScoredVectorStoreRetriever(
+        vectorstore=retriever.vectorstore,
+        search_type=retriever.search_type,
+        search_kwargs=retriever.search_kwargs,
+        tags=retriever.tags,
+        metadata=retriever.metadata,
+    )
+
+
+def relevance_scores(docs: List[Any]) -> List[Optional[float]]:
+    """Return each document's score, ``None`` where the retriever gave none."""
+    return [doc.metadata.get(SCORE_KEY) for doc in docs]
+
+
+def relevance_gate(docs: List[Any], min_score: Optional[float]) -> Tuple[bool, Optional[float]]:
+    """Decide whether ``docs`` are relevant enough to answer from.
+
+    Returns ``(passed, best_score)``. The gate passes when ``min_score`` is
+    ``None`` or when no document carries a score, since there is nothing to
+    judge by.
+    """
+    scores = [score for score in relevance_scores(docs) if score is not None]
+    best = max(scores) if scores else None
+    if min_score is None or best is None:
+        return True, best
+    return best >= min_score, best
@@ -0,0 +1,50 @@
+"""Process-wide registry for long-lived clients.
+
+Chat models and vector stores wrap HTTP/gRPC clients with their own
+connection pools. Building them per request throws those pools away, so
+they are created once per configuration fingerprint and shared by every
+Streamlit session in the process.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """Thread-safe slots holding one instance per name and config fingerprint.
+
+    ``get(name, key, factory)`` returns the instance stored under ``name`` if
+    it was built for the same ``key``; otherwise ``factory()`` is called once,
+    even when several threads ask at the same time, and replaces the old
+    instance. Lookups of an existing instance take no lock.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[str, Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, key: Any, factory: Callable[[], Any]) -> Any:
+        slot = self._slots.get(name)
+        if slot is not None and slot[0] == key:
+            return slot[1]
+        with self._lock:
+            slot = self._slots.get(name)
+            if slot is not None and slot[0] == key:
+                return slot[1]
+            if slot is not None:
+                logger.info("Config changed for %s; rebuilding", name)
+            instance = factory()
+            self._slots[name] = (key, instance)
+            return instance
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+
+
+registry = ResourceRegistry()
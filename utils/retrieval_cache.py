@@ -0,0 +1,137 @@
+"""Retrieval result cache below the answer cache.
+
+When an answer has to be regenerated (a prompt or model change, or an
+answer cache miss for a question that differs only before enrichment), the
+Qdrant search for the same enriched question and filter still returns the
+same chunks. ``RetrievalCache`` keys retrieval results on the enriched
+question, the compiled filter's fingerprint, the ``RAG.RETRIEVAL`` settings
+and the catalog version, and skips both the query embedding and the search
+on a hit.
+
+Entries hold compact references ``(point id, pdf_id, page, relevance
+score)`` rather than
+documents, so memory stays bounded by ``maxsize`` entries of ``k`` short
+tuples. On a hit the chunks are rehydrated with one
+``vectorstore.get_by_ids`` call; if a point no longer exists the entry is
+dropped and the lookup counts as a miss.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .answer_cache import AnswerCache
+from .fingerprint import fingerprint
+from .relevance import SCORE_KEY
+
+
+logger = logging.getLogger(__name__)
+
+# (Qdrant point id, pdf_id, page, relevance score)
+DocRef = Tuple[Any, Optional[str], Optional[int], Optional[float]]
+
+
+def make_retrieval_key(
+    enriched_question: str,
+    filter_key: str,
+    retrieval_config: Mapping[str, Any],
+    catalog_version: str,
+) -> str:
+    """Return the cache key for one retrieval.
+
+    Parameters
+    ----------
+    enriched_question : str
+        The question as sent to the retriever.
+    filter_key : str
+        ``CompiledFilter.filter_key`` of the Qdrant filter.
+    retrieval_config : Mapping
+        The ``RAG.RETRIEVAL`` section (search type, k, fetch_k, ...).
+    catalog_version : str
+        Catalog modified time from ``fetch_table_and_date_from_catalog``.
+    """
+    return fingerprint(enriched_question.strip(), filter_key, dict(retrieval_config), str(catalog_version))
+
+
+def document_refs(docs: Sequence[Any]) -> Optional[Tuple[DocRef, ...]]:
+    """Return compact references for ``docs``, or ``None`` if any lacks a point id."""
+    refs = []
+    for doc in docs:
+        point_id = doc.metadata.get("_id")
+        if point_id is None:
+            return None
+        refs.append((point_id, doc.metadata.get("pdf_id"), doc.metadata.get("page"), doc.metadata.get(SCORE_KEY)))
+    return tuple(refs)
+
+
+def rehydrate(refs: Sequence[DocRef], vectorstore: Any) -> Optional[List[Any]]:
+    """Fetch the documents for ``refs`` in their cached order.
+
+    Cached relevance scores are restored into the documents' metadata.
+    Returns ``None`` when any point is missing from the collection.
+    """
+    if not refs:
+        return []
+    ids = [ref[0] for ref in refs]
+    by_id = {doc.metadata.get("_id"): doc for doc in vectorstore.get_by_ids(ids)}
+    if any(point_id not in by_id for point_id in ids):
+        return None
+    docs = [by_id[point_id] for point_id in ids]
+    for doc, ref in zip(docs, refs):
+        if ref[3] is not None:
+            doc.metadata[SCORE_KEY] = ref[3]
+    return docs
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results stored as document references.
+
+    Parameters
+    ----------
+    maxsize : int, default=2048
+        Maximum number of cached retrievals.
+    ttl_seconds : float, optional
+        Entries older than this are treated as misses. ``None`` disables expiry.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl_seconds: Optional[float] = 6 * 3600):
+        self._refs = AnswerCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.stale = 0
+        self.uncacheable = 0
+
+    def get(self, key: str, get_vectorstore: Callable[[], Any]) -> Optional[List[Any]]:
+        """Return the rehydrated documents for ``key`` or ``None`` on a miss.
+
+        ``get_vectorstore`` is only called on a hit.
+        """
+        refs = self._refs.get(key)
+        if refs is None:
+            return None
+        docs = rehydrate(refs, get_vectorstore())
+        if docs is None:
+            logger.info("Retrieval cache entry refers to missing points; dropping it")
+            self._refs.discard(key)
+            self.stale += 1
+        return docs
+
+    def put(self, key: str, docs: Sequence[Any]) -> bool:
+        """Store references to ``docs``; returns ``False`` if they have no point ids."""
+        refs = document_refs(docs)
+        if refs is None:
+            self.uncacheable += 1
+            return False
+        self._refs.put(key, refs)
+        return True
+
+    def clear(self) -> None:
+        self._refs.clear()
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters plus stale and uncacheable counts."""
+        return {**self._refs.stats(), "stale": self.stale, "uncacheable": self.uncacheable}
+
+
+retrieval_cache = RetrievalCache()